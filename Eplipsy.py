@@ -1,43 +1,171 @@
 # Test Code
-import RPi.GPIO as GPIO
+import argparse
+import json
+import multiprocessing as mp
+import os
 import time
 
-import pandas as pd
 import joblib
-GPIO.setmode(GPIO.BOARD)
+import numpy as np
+
+from eeg_recording import Recording, open_recording
 
 led = 3
+DATA_PATH = '/home/naveen/Desktop/LED/SPANDANA.xlsx'
+MODEL_PATH = '/home/naveen/Desktop/LED/decision_tree_model.joblib'
+
+# One row per scored row/window: 15 bytes
+SCORE_DTYPE = np.dtype([("column", "<u2"), ("start", "<u8"), ("prediction", "<i1"), ("probability", "<f4")])
+
+
+def test_case(n=12):
+    import RPi.GPIO as GPIO
+    GPIO.setmode(GPIO.BOARD)
+    GPIO.setup(led,GPIO.OUT)
+
+    # Converted once to a memory-mapped .npy next to the sheet; only the queried recording is read
+    recording = open_recording(DATA_PATH)
+    y = recording.labels
+
+    print("\n--- Test Case: Prediction with the Saved Model ---")
+
+    # Create a test case from recording n: shape (1, samples), the same row x.iloc[n:n+1] used to be
+    sample_query_column = recording.recording_vector(n)
+    print(f"Sample query column (recording {recording.columns[n]}, label {None if y is None else y[n]}):\n{sample_query_column}")
+
+    # Load the saved model
+    loaded_model = joblib.load(MODEL_PATH)
+    print(f"Model loaded successfully")
+
+    # Make a prediction using the loaded model
+    prediction = loaded_model.predict(sample_query_column)
+
+    print(f"Predicted 'Y' label for the sample query: {prediction[0]}")
+
+    while (prediction[0]==1):
+
+        GPIO.output(led,True)
+        time.sleep(0.1)
+        GPIO.output(led,False)
+        time.sleep(0.3)
+
+
+# --- Batch scoring (no GPIO) ---
+_worker = {}  # Per-process model and recording, set up once by _init_worker
+
+
+def _init_worker(model_path, npy_path):
+    _worker["model"] = joblib.load(model_path)
+    _worker["recording"] = Recording(npy_path)
+
+
+def _score_chunk(task):
+    """task: ("rows", first, last) scores whole columns first..last-1 as feature vectors;
+    ("windows", column, first, count, size, hop) scores `count` windows of one column.
+    Returns (columns, starts, predictions, probabilities, predict_ms)."""
+    model, recording = _worker["model"], _worker["recording"]
+    if task[0] == "rows":
+        _, first, last = task
+        features = np.ascontiguousarray(recording.samples[:, first:last].T)
+        columns = np.arange(first, last)
+        starts = np.zeros(last - first, dtype=np.int64)
+    else:
+        _, column, first, count, size, hop = task
+        stop = first + (count - 1) * hop + size
+        view = np.lib.stride_tricks.sliding_window_view(recording.column(column, first, stop), size)[::hop]
+        features = np.ascontiguousarray(view)
+        recording.release(first, stop - size + hop)  # Constant RSS across a long recording
+        columns = np.full(count, column)
+        starts = first + np.arange(count, dtype=np.int64) * hop
+    t0 = time.perf_counter()
+    if hasattr(model, "predict_proba"):
+        # Predictions are the argmax of the probabilities: one model call per chunk, not two
+        proba = model.predict_proba(features)
+        predictions = model.classes_[proba.argmax(axis=1)]
+        probabilities = proba[:, -1]
+    else:
+        predictions = model.predict(features)
+        probabilities = np.full(len(features), -1.0)
+    return columns, starts, predictions, probabilities, (time.perf_counter() - t0) * 1000
 
-GPIO.setup(led,GPIO.OUT)
 
-data = pd.read_excel('/home/naveen/Desktop/LED/SPANDANA.xlsx')
-df = pd.DataFrame(data)
-df = df.drop(['Time'], axis=1)
-df = df.transpose()
-x = df.iloc[:, :-1]
-y = df.iloc[:, -1]
+def _tasks(recording, n_features, window_hop, chunk, columns):
+    if window_hop is None:
+        for first in range(0, recording.n_columns, chunk):
+            yield ("rows", first, min(first + chunk, recording.n_columns))
+        return
+    total = (len(recording) - n_features) // window_hop + 1 if len(recording) >= n_features else 0
+    for column in columns:
+        for first in range(0, total, chunk):
+            yield ("windows", column, first * window_hop, min(chunk, total - first), n_features, window_hop)
 
-print("\n--- Test Case: Prediction with the Saved Model ---")
 
-# Specify the row number for the sample query (e.g., n=12 for the 12th row, as Python is 0-indexed)
-n = 12
+def score(source, model_path=MODEL_PATH, out=None, window_hop=None, columns=None, chunk=256, workers=None):
+    """Scores every recording (column) of `source`, or with `window_hop` every window of the model's
+    input size along each column. Writes a SCORE_DTYPE .npy plus a .json summary; returns the summary."""
+    recording = open_recording(source)
+    model = joblib.load(model_path)
+    n_features = getattr(model, "n_features_in_", len(recording))
+    if window_hop is None and n_features != len(recording):
+        raise ValueError(f"Model takes {n_features} features but the columns have {len(recording)} samples; "
+                         f"score windows with --hop instead")
+    columns = list(range(recording.n_columns)) if columns is None else columns
+    tasks = list(_tasks(recording, n_features, window_hop, chunk, columns))
+    workers = workers or min(len(tasks), os.cpu_count() or 1) or 1
+    out = out or os.path.splitext(recording.path)[0] + ".scores.npy"
 
-# Create a test case by selecting the specified row from X
-sample_query_column = x.iloc[n:n+1] # Selects row 'n' as a DataFrame slice
-print(f"Sample query column (row {n} of x):\n{sample_query_column}")
+    t0 = time.perf_counter()
+    if workers == 1:
+        _init_worker(model_path, recording.path)
+        results = [_score_chunk(task) for task in tasks]
+    else:
+        with mp.Pool(workers, initializer=_init_worker, initargs=(model_path, recording.path)) as pool:
+            results = pool.map(_score_chunk, tasks)
+    wall_s = time.perf_counter() - t0
 
-# Load the saved model
-loaded_model = joblib.load('/home/naveen/Desktop/LED/decision_tree_model.joblib')
-print(f"Model loaded successfully")
+    scores = np.empty(sum(len(r[0]) for r in results), dtype=SCORE_DTYPE)
+    offset = 0
+    for result in results:
+        count = len(result[0])
+        for field, values in zip(SCORE_DTYPE.names, result[:4]):
+            scores[field][offset:offset + count] = values
+        offset += count
+    np.save(out, scores)
 
-# Make a prediction using the loaded model
-prediction = loaded_model.predict(sample_query_column)
+    chunk_ms = np.array([r[4] for r in results]) if results else np.zeros(1)
+    summary = {
+        "source": recording.path, "model": model_path, "mode": "rows" if window_hop is None else "windows",
+        "hop": window_hop, "scored": len(scores), "positive": int((scores["prediction"] == 1).sum()),
+        "workers": workers, "chunks": len(results), "wall_s": round(wall_s, 3),
+        "per_s": round(len(scores) / wall_s, 1) if wall_s else None,
+        "predict_us_per_item": round(1000 * chunk_ms.sum() / max(len(scores), 1), 2),
+        "chunk_ms_p50": round(float(np.percentile(chunk_ms, 50)), 2),
+        "chunk_ms_p95": round(float(np.percentile(chunk_ms, 95)), 2),
+    }
+    with open(out + ".json", "w") as f:
+        json.dump(summary, f, indent=2)
+    print(f"Scored {len(scores)} {summary['mode']} with {workers} workers in {wall_s:.2f} s "
+          f"({summary['per_s']}/s), {summary['positive']} positive -> {out}")
+    return summary
 
-print(f"Predicted 'Y' label for the sample query: {prediction[0]}")
 
-while (prediction[0]==1):
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Seizure model: LED test case, or batch scoring")
+    sub = parser.add_subparsers(dest="command")
+    test = sub.add_parser("test", help="Predict one recording and blink the LED on a seizure (default)")
+    test.add_argument("-n", type=int, default=12, help="Recording index (0-based)")
+    scorer = sub.add_parser("score", help="Score a whole recording without GPIO")
+    scorer.add_argument("source", nargs="?", default=DATA_PATH, help=".xlsx/.csv/.npy recording")
+    scorer.add_argument("--model", default=MODEL_PATH)
+    scorer.add_argument("--out", help="Output .npy (default: next to the recording)")
+    scorer.add_argument("--hop", type=int, help="Score sliding windows with this hop instead of whole columns")
+    scorer.add_argument("--columns", help="Comma-separated column indices for --hop (default: all)")
+    scorer.add_argument("--chunk", type=int, default=256, help="Rows/windows per predict() call")
+    scorer.add_argument("--workers", type=int, help="Processes (default: one per CPU, at most one per chunk)")
+    args = parser.parse_args()
 
-    GPIO.output(led,True)
-    time.sleep(0.1)
-    GPIO.output(led,False)
-    time.sleep(0.3)
\ No newline at end of file
+    if args.command == "score":
+        score(args.source, args.model, args.out, args.hop,
+              [int(c) for c in args.columns.split(",")] if args.columns else None, args.chunk, args.workers)
+    else:
+        test_case(args.n if args.command == "test" else 12)
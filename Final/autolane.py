@@ -1,10 +1,15 @@
-from flask import Flask, render_template_string, Response
+from flask import Flask, render_template_string, Response, jsonify
 import cv2
 import RPi.GPIO as GPIO
 import time
 import threading
 import sys 
 
+# camera_stream and lane_detect live in the repository root: run this from there as
+#   python -m Final.autolane
+from camera_stream import CameraStream
+from lane_detect import LaneDetector, SteeringController
+
 app = Flask(__name__)
 
 # --- Global State and Thread Setup ---
@@ -12,6 +17,18 @@ current_state = "Stopped"
 # Flag indicates the robot is operating autonomously/manually and needs monitoring
 is_moving = False 
 monitor_thread = None 
+# Held while checking is_moving / is_lane_following and driving the motors on that basis,
+# so a stop (IR monitor or /stop) can never be followed by a drive command decided before it
+motor_lock = threading.Lock()
+
+# --- Camera Lane Following ---
+is_lane_following = False
+lane_thread = None
+LANE_BASE_DUTY = 25      # % duty on both sides when the lane is centred
+LANE_LOST_FRAMES = 10    # Consecutive frames without a lane before stopping
+lane_detector = LaneDetector(roi_top=0.55, scale=4, line_color="bright")
+steering = SteeringController(base_duty=LANE_BASE_DUTY)
+lane_status = {"offset": None, "heading": None, "confidence": 0.0, "fps": 0.0}
 
 # --- Motor Pin Setup (BCM) ---
 IN1 = 26
@@ -76,6 +93,19 @@ def left():
     GPIO.output(IN3, False)
     GPIO.output(IN4, False)
 
+def drive_differential(left_duty, right_duty):
+    # Forward on both sides, steering by duty: en_b (q) drives the left pair, en_a (p) the right
+    GPIO.output(IN1, True)
+    GPIO.output(IN4, True)
+    GPIO.output(IN2, False)
+    GPIO.output(IN3, False)
+    q.ChangeDutyCycle(left_duty)
+    p.ChangeDutyCycle(right_duty)
+
+def restore_duty():
+    p.ChangeDutyCycle(DUTY_CYCLE)
+    q.ChangeDutyCycle(DUTY_CYCLE)
+
 # --- IR Sensor Reading & Monitoring Functions ---
 
 def get_sensor_status():
@@ -100,11 +130,16 @@ def obstacle_monitor():
             
             # Scenario 1: Both Blocked -> STOP (Highest Priority)
             if left_state == GPIO.LOW and right_state == GPIO.LOW:
-                stop_motors()
-                current_state = "🚨 AUTO STOP: Obstacle on Both Sides"
-                is_moving = False  # Stop continuous monitoring until new command
+                with motor_lock:
+                    stop_motors()
+                    current_state = "🚨 AUTO STOP: Obstacle on Both Sides"
+                    is_moving = False  # Stop continuous monitoring until new command
                 print(current_state)
             
+            # In lane mode the camera controller steers; the IRs only trigger the stop above
+            elif is_lane_following:
+                pass
+
             # Scenario 2: Left Blocked, Right Clear -> TURN RIGHT
             elif left_state == GPIO.LOW and right_state == GPIO.HIGH:
                 # Sequence: Stop -> Pause -> Turn -> Pause -> Resume Forward
@@ -149,22 +184,74 @@ except Exception as e:
     print(f"General Camera Error: {e}")
     camera = None
 
+# One capture thread: the video stream and the lane follower share the same frames
+camera_stream = None
+if camera:
+    camera_stream = CameraStream(camera)
+    camera_stream.start()
+
 
 def gen_frames():
     """Generates frames for the video stream."""
-    if not camera:
+    if not camera_stream:
         # Yield a placeholder frame if camera failed
         return
-    
+    yield from camera_stream.frames()
+
+# **Lane Following Thread: one control update per captured camera frame**
+def lane_follow_loop():
+    global current_state, is_moving, is_lane_following
+    last_seq = 0
+    lost_frames = 0
+    last_frame_time = None
+
     while True:
-        success, frame = camera.read()
-        if not success:
-            break
-        else:
-            ret, buffer = cv2.imencode('.jpg', frame)
-            frame = buffer.tobytes()
-            yield (b'--frame\r\n'
-                   b'Content-Type: image/jpeg\r\n\r\n' + frame + b'\r\n')
+        if not is_lane_following or not camera_stream:
+            time.sleep(0.1)
+            continue
+
+        seq, frame = camera_stream.wait_frame(last_seq, profile="raw")
+        if seq == last_seq or frame is None:
+            continue
+        last_seq = seq
+
+        now = time.monotonic()
+        if last_frame_time is not None:
+            lane_status["fps"] = round(1.0 / max(now - last_frame_time, 1e-6), 1)
+        last_frame_time = now
+
+        lane = lane_detector.detect(frame)
+
+        if lane is None:
+            lost_frames += 1
+            lane_status["confidence"] = 0.0
+            if lost_frames < LANE_LOST_FRAMES:
+                continue
+            with motor_lock:
+                if not is_lane_following or not is_moving:
+                    continue  # Stopped by the user or by the IR monitor while processing
+                stop_motors()
+                restore_duty()
+                steering.reset()
+                is_lane_following = False
+                is_moving = False
+                current_state = "🚨 LANE LOST: Stopped"
+            print(current_state)
+            continue
+
+        lost_frames = 0
+        left_duty, right_duty = steering.update(lane.offset, lane.heading, now)
+        with motor_lock:
+            # Re-checked under the lock: a stop issued during detection wins over this frame
+            if not is_lane_following or not is_moving:
+                continue
+            drive_differential(left_duty, right_duty)
+        lane_status["offset"] = round(lane.offset, 3)
+        lane_status["heading"] = round(lane.heading, 3)
+        lane_status["confidence"] = round(lane.confidence, 2)
+
+lane_thread = threading.Thread(target=lane_follow_loop, daemon=True)
+lane_thread.start()
 
 # --- HTML Template ---
 html = """
@@ -181,9 +268,18 @@ html = """
 <form action="/left"><button>Left</button></form>
 <form action="/right"><button>Right</button></form>
 <form action="/stop"><button>Stop</button></form>
+<form action="/lane_follow"><button>Lane Follow</button></form>
+<p><a href="/lane_stats">Lane detection timing</a></p>
 """
 
 # --- Flask Routes ---
+def leave_lane_mode():
+    """Manual commands take over from the lane follower and restore the fixed duty cycle. Caller holds motor_lock."""
+    global is_lane_following
+    if is_lane_following:
+        is_lane_following = False
+        restore_duty()
+
 @app.route("/")
 def index():
     sensor_status = get_sensor_status()
@@ -194,48 +290,81 @@ def video_feed():
     return Response(gen_frames(),
                     mimetype='multipart/x-mixed-replace; boundary=frame')
 
+@app.route("/lane_stats")
+def lane_stats():
+    """Latest lane estimate plus per-stage detection timing (ms)."""
+    return jsonify({
+        "lane_following": is_lane_following,
+        "lane": lane_status,
+        "timing": lane_detector.timer.summary()
+    })
+
+@app.route("/lane_follow")
+def go_lane_follow():
+    global current_state, is_moving, is_lane_following
+    if not camera_stream:
+        current_state = "Lane Follow unavailable (no camera)"
+        return index()
+    with motor_lock:
+        steering.reset()
+        is_lane_following = True
+        is_moving = True  # IR monitor keeps the emergency stop active
+    current_state = "Lane Following (Camera + IR Stop)"
+    print(current_state)
+    return index()
+
 @app.route("/forward")
 def go_forward():
     global current_state, is_moving
-    forward()
+    with motor_lock:
+        leave_lane_mode()
+        forward()
+        is_moving = True  # Start autonomous monitoring
     current_state = "Moving Forward (Auto-Avoidance ON)"
-    is_moving = True  # Start autonomous monitoring
     print(current_state)
     return index()
 
 @app.route("/backward")
 def go_backward():
     global current_state, is_moving
-    backward()
+    with motor_lock:
+        leave_lane_mode()
+        backward()
+        is_moving = True  # Start autonomous monitoring
     current_state = "Moving Backward (Auto-Avoidance ON)"
-    is_moving = True  # Start autonomous monitoring
     print(current_state)
     return index()
 
 @app.route("/left")
 def go_left():
     global current_state, is_moving
-    left()
+    with motor_lock:
+        leave_lane_mode()
+        left()
+        is_moving = True  # Start autonomous monitoring
     current_state = "Turning Left (Auto-Avoidance ON)"
-    is_moving = True  # Start autonomous monitoring
     print(current_state)
     return index()
 
 @app.route("/right")
 def go_right():
     global current_state, is_moving
-    right()
+    with motor_lock:
+        leave_lane_mode()
+        right()
+        is_moving = True  # Start autonomous monitoring
     current_state = "Turning Right (Auto-Avoidance ON)"
-    is_moving = True  # Start autonomous monitoring
     print(current_state)
     return index()
 
 @app.route("/stop")
 def go_stop():
     global current_state, is_moving
-    stop_motors()
+    with motor_lock:
+        leave_lane_mode()
+        stop_motors()
+        is_moving = False # Stop autonomous monitoring
     current_state = "Stopped"
-    is_moving = False # Stop autonomous monitoring
     print(current_state)
     return index()
 
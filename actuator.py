@@ -0,0 +1,112 @@
+import threading
+import time
+from collections import deque, namedtuple
+
+DriveCommand = namedtuple("DriveCommand", ["mode", "duty", "timestamp", "source"])
+
+# Motor driver input levels (IN1, IN2, IN3, IN4) for each drive mode
+PIN_PATTERNS = {
+    "forward": (True, False, False, True),
+    "backward": (False, True, True, False),
+    "left": (True, False, False, False),
+    "right": (False, False, False, True),
+    "stop": (False, False, False, False),
+}
+
+
+class Actuator:
+    """The only thread that touches the motor pins and PWM duty cycle.
+
+    Callers submit timestamped DriveCommands to a bounded queue. A new drive command
+    supersedes every drive command still waiting (only the latest intent matters),
+    and a "speed" command is folded into a waiting drive command. The actuator thread
+    writes all four direction pins in a single call, so no other thread can ever see
+    or create a half-applied pin state.
+    """
+
+    def __init__(self, write_pins, set_duty, max_depth=16, latency_samples=200):
+        self.write_pins = write_pins  # write_pins((in1, in2, in3, in4))
+        self.set_duty = set_duty      # set_duty(duty_cycle)
+        self._queue = deque(maxlen=max_depth)
+        self._cond = threading.Condition()
+        self._latencies = deque(maxlen=latency_samples)
+        self.mode = "stop"
+        self.duty = 0
+        self.applied = 0
+        self.merged = 0
+        self.max_depth_seen = 0
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def submit(self, mode, duty=0, source=""):
+        """Queues a command and returns immediately. mode is a PIN_PATTERNS key or "speed"."""
+        if mode != "speed" and mode not in PIN_PATTERNS:
+            raise ValueError(f"Unknown drive mode: {mode}")
+        command = DriveCommand(mode, duty, time.monotonic(), source)
+        with self._cond:
+            if mode == "speed":
+                for i in range(len(self._queue) - 1, -1, -1):
+                    queued = self._queue[i]
+                    if queued.mode != "stop":
+                        # Same intent, new duty: keep the original timestamp for latency accounting
+                        self._queue[i] = queued._replace(duty=duty)
+                        self.merged += 1
+                        return
+            else:
+                superseded = len(self._queue)
+                self._queue.clear()
+                self.merged += superseded
+            self._queue.append(command)
+            self.max_depth_seen = max(self.max_depth_seen, len(self._queue))
+            self._cond.notify()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: len(self._queue) > 0)
+                command = self._queue.popleft()
+            try:
+                self._apply(command)
+            except Exception as e:
+                print(f"Actuator error applying {command.mode}: {e}")
+                continue
+            with self._cond:
+                self._latencies.append(time.monotonic() - command.timestamp)
+                self.applied += 1
+
+    def _apply(self, command):
+        if command.mode == "speed":
+            if self.mode != "stop":
+                self.set_duty(command.duty)
+                self.duty = command.duty
+            return
+        if command.mode == "stop":
+            # Pins low first so the motors stop even if the PWM update is slow
+            self.write_pins(PIN_PATTERNS["stop"])
+            self.set_duty(0)
+            self.duty = 0
+        else:
+            self.set_duty(command.duty)
+            self.write_pins(PIN_PATTERNS[command.mode])
+            self.duty = command.duty
+        self.mode = command.mode
+
+    def stats(self):
+        with self._cond:
+            latencies = sorted(self._latencies)
+            depth = len(self._queue)
+        report = {
+            "mode": self.mode,
+            "duty": self.duty,
+            "queue_depth": depth,
+            "max_queue_depth": self.max_depth_seen,
+            "applied": self.applied,
+            "merged": self.merged,
+        }
+        if latencies:
+            report["latency_ms"] = {
+                "mean": round(sum(latencies) / len(latencies) * 1000, 3),
+                "p95": round(latencies[int(0.95 * (len(latencies) - 1))] * 1000, 3),
+                "max": round(latencies[-1] * 1000, 3),
+            }
+        return report
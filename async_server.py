@@ -0,0 +1,221 @@
+"""asyncio (aiohttp) serving mode for the robot web app.
+
+Start with `python usirapli.py --async`. The routes and JSON payloads are the same as
+the Flask app, but every connection is a coroutine on one event loop instead of an OS
+thread: MJPEG viewers wait on a per-camera frame signal, /events pushes status over
+Server-Sent Events (or /status long-polls on the state version), and drive commands
+only queue work for the actuator thread. No handler reads the sensors: the sensor
+poll thread publishes them into the robot state.
+"""
+import asyncio
+import json
+import time
+
+from aiohttp import web
+
+
+class AsyncSignal:
+    """Wakes every waiting coroutine; safe to fire from any thread."""
+
+    def __init__(self, loop):
+        self.loop = loop
+        self._future = loop.create_future()
+
+    def fire_threadsafe(self):
+        self.loop.call_soon_threadsafe(self._fire)
+
+    def _fire(self):
+        future, self._future = self._future, self.loop.create_future()
+        future.set_result(None)
+
+    async def wait(self, timeout=None):
+        try:
+            await asyncio.wait_for(asyncio.shield(self._future), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+
+def _asset_response(request, asset, cache_control):
+    """aiohttp equivalent of static_assets.asset_response()."""
+    etag = f'"{asset.etag}"'
+    headers = {"ETag": etag, "Cache-Control": cache_control, "Vary": "Accept-Encoding"}
+    if etag in request.headers.get("If-None-Match", ""):
+        return web.Response(status=304, headers=headers)
+    if "gzip" in request.headers.get("Accept-Encoding", ""):
+        headers["Content-Encoding"] = "gzip"
+        body = asset.gzip_body
+    else:
+        body = asset.body
+    headers["Content-Type"] = asset.content_type
+    return web.Response(body=body, headers=headers)
+
+
+def create_app(robot):
+    """Builds the aiohttp application around an already-initialised robot module (usirapli)."""
+    app = web.Application()
+    frame_signals = {}
+    events = {"signal": None, "payload": None, "version": None}
+
+    async def on_startup(app):
+        loop = asyncio.get_running_loop()
+        for cam_id, stream in robot.camera_streams.items():
+            frame_signals[cam_id] = AsyncSignal(loop)
+            stream.add_listener(frame_signals[cam_id].fire_threadsafe)
+        events["signal"] = AsyncSignal(loop)
+        publish_state()
+        # The state store calls this from whichever thread changed the state
+        robot.robot_state.add_listener(lambda state: loop.call_soon_threadsafe(publish_state))
+
+    def publish_state():
+        # One encoded payload per state version, shared by every SSE client
+        state = robot.robot_state.get()
+        if state.version != events["version"]:
+            events["version"] = state.version
+            events["payload"] = json.dumps(state.to_dict())
+            events["signal"]._fire()
+
+    # --- Page and static files ---
+    async def index(request):
+        return _asset_response(request, robot.index_page, robot.REVALIDATE)
+
+    async def static_file(request):
+        asset = robot.static_assets.get(request.match_info["filename"])
+        if asset is None:
+            return web.json_response({"success": False, "error": "Not found"}, status=404)
+        return _asset_response(request, asset, "public, max-age=31536000, immutable")
+
+    # --- Status ---
+    async def status(request):
+        # Same contract as the Flask route: ETag = state version, 304 on match, ?wait= long-poll
+        if_none_match = request.headers.get("If-None-Match", "")
+        state = robot.robot_state.get()
+        wait = robot.parse_wait(request.query.get("wait"))
+        deadline = time.monotonic() + wait
+        while f'"{robot.status_etag(state)}"' in if_none_match and time.monotonic() < deadline:
+            await events["signal"].wait(timeout=deadline - time.monotonic())
+            state = robot.robot_state.get()
+        etag = f'"{robot.status_etag(state)}"'
+        headers = {"ETag": etag, "Cache-Control": "no-cache"}
+        if etag in if_none_match:
+            return web.Response(status=304, headers=headers)
+        return web.json_response(state.to_dict(), headers=headers)
+
+    async def logs(request):
+        try:
+            since = int(request.query.get("since", 0))
+            limit = int(request.query.get("limit", 100))
+        except ValueError:
+            return web.json_response({"success": False, "error": "since/limit must be integers"}, status=400)
+        return web.json_response({"entries": robot.log.recent(since, limit), "last_seq": robot.log.seq})
+
+    async def stats(request):
+        # stats_payload() may query the EEG ingest process over a socket: keep it off the event loop
+        payload = await asyncio.get_running_loop().run_in_executor(None, robot.stats_payload)
+        return web.json_response(payload)
+
+    async def radar_data(request):
+        return web.json_response(robot.radar_payload())
+
+    async def event_stream(request):
+        response = web.StreamResponse(headers={"Content-Type": "text/event-stream",
+                                               "Cache-Control": "no-cache"})
+        await response.prepare(request)
+        sent = None
+        try:
+            while True:
+                payload = events["payload"]
+                if payload is not None and payload != sent:
+                    await response.write(f"data: {payload}\n\n".encode())
+                    sent = payload
+                if not await events["signal"].wait(timeout=15):
+                    await response.write(b": keep-alive\n\n")
+        except (ConnectionResetError, asyncio.CancelledError):
+            pass
+        return response
+
+    # --- Commands: queue and return the JSON delta ---
+    def command(delta_fn):
+        async def handler(request):
+            return web.json_response({"success": True, "queued": True, **delta_fn()})
+        return handler
+
+    def setting(setting_fn, key, default_fn):
+        async def handler(request):
+            try:
+                data = await request.json()
+                return web.json_response(setting_fn(data.get(key, default_fn())))
+            except Exception as e:
+                return web.json_response({"success": False, "error": str(e)}, status=400)
+        return handler
+
+    # --- Video ---
+    async def video_feed(request):
+        cam_id = int(request.match_info.get("cam_id", 0))
+        stream = robot.camera_streams.get(cam_id)
+        if stream is None:
+            return web.json_response({"success": False, "error": f"Unknown camera {cam_id}"}, status=404)
+        profile = "preview" if request.query.get("profile") == "preview" else "full"
+
+        response = web.StreamResponse(headers={"Content-Type": "multipart/x-mixed-replace; boundary=frame"})
+        await response.prepare(request)
+        if profile == "preview":
+            stream.track_preview_client(+1)
+        last_seq = 0
+        try:
+            while stream.running:
+                seq = stream.seq
+                jpeg = stream.preview_jpeg if profile == "preview" else stream.jpeg
+                if seq != last_seq and jpeg is not None:
+                    last_seq = seq
+                    await response.write(b'--frame\r\nContent-Type: image/jpeg\r\n\r\n' + jpeg + b'\r\n')
+                await frame_signals[cam_id].wait(timeout=1.0)
+        except (ConnectionResetError, asyncio.CancelledError):
+            pass
+        finally:
+            if profile == "preview":
+                stream.track_preview_client(-1)
+        return response
+
+    async def snapshot(request):
+        cam_id = int(request.match_info.get("cam_id", 0))
+        stream = robot.camera_streams.get(cam_id)
+        if stream is None:
+            return web.json_response({"success": False, "error": "Camera unavailable"}, status=503)
+        etag, jpeg = stream.latest()
+        if jpeg is None:
+            return web.json_response({"success": False, "error": "No frame captured yet"}, status=503)
+        headers = {"ETag": f'"{etag}"', "Cache-Control": "no-cache"}
+        if headers["ETag"] in request.headers.get("If-None-Match", ""):
+            return web.Response(status=304, headers=headers)
+        return web.Response(body=jpeg, content_type="image/jpeg", headers=headers)
+
+    app.router.add_get("/", index)
+    app.router.add_get("/static/{filename}", static_file)
+    app.router.add_get("/status", status)
+    app.router.add_get("/stats", stats)
+    app.router.add_get("/logs", logs)
+    app.router.add_get("/radar_data", radar_data)
+    app.router.add_get("/events", event_stream)
+    for mode in ("forward", "backward", "left", "right", "stop"):
+        app.router.add_post(f"/{mode}", command(lambda mode=mode: robot.drive_command(mode)))
+    app.router.add_post("/start_radar", command(lambda: robot.radar_command(True)))
+    app.router.add_post("/stop_radar", command(lambda: robot.radar_command(False)))
+    app.router.add_post("/set_linear_speed",
+                        setting(robot.set_linear_speed_command, "speed", lambda: robot.robot_state.get().linear_speed))
+    app.router.add_post("/set_turn_speed",
+                        setting(robot.set_turn_speed_command, "speed", lambda: robot.robot_state.get().turn_speed))
+    app.router.add_post("/set_test_row_index",
+                        setting(robot.set_test_row_command, "row_index", lambda: robot.robot_state.get().test_row_index))
+    app.router.add_get("/video_feed", video_feed)
+    app.router.add_get("/video_feed/{cam_id:\\d+}", video_feed)
+    app.router.add_get("/snapshot.jpg", snapshot)
+    app.router.add_get("/snapshot/{cam_id:\\d+}.jpg", snapshot)
+
+    app.on_startup.append(on_startup)
+    return app
+
+
+def run(robot, host="0.0.0.0", port=8000):
+    print(f"Starting asyncio server on http://{host}:{port}")
+    web.run_app(create_app(robot), host=host, port=port, access_log=None)
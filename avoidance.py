@@ -0,0 +1,43 @@
+from collections import namedtuple
+
+# The IR modules pull their output LOW (GPIO.LOW == 0) when something is in front of them
+IR_DETECTED = 0
+
+# One read of the five sensors: IR raw GPIO levels, ultrasonic distances in cm (0 = no echo)
+SensorReading = namedtuple("SensorReading", ["left_ir", "right_ir", "front", "left", "right"])
+
+# Tunables of obstacle_monitor. Times are in seconds.
+AvoidanceConfig = namedtuple("AvoidanceConfig",
+                             ["avoid_distance_cm", "stop_pause_s", "turn_s", "poll_s"],
+                             defaults=[20, 0.05, 0.3, 0.05])
+
+# Decisions
+CONTINUE = "continue"
+STOP = "stop"                # Obstacle in front (or both IRs): stop and leave manual control to the user
+AVOID_RIGHT = "avoid_right"  # Obstacle on the left: short right turn, then forward again
+AVOID_LEFT = "avoid_left"    # Obstacle on the right: short left turn, then forward again
+
+
+def _close(distance, config):
+    return 0 < distance < config.avoid_distance_cm
+
+
+def decide(reading, config=AvoidanceConfig()):
+    """What obstacle_monitor does with one sensor reading while the robot is moving. No side effects."""
+    if _close(reading.front, config) or (reading.left_ir == IR_DETECTED and reading.right_ir == IR_DETECTED):
+        return STOP
+    if _close(reading.left, config) or reading.left_ir == IR_DETECTED:
+        return AVOID_RIGHT
+    if _close(reading.right, config) or reading.right_ir == IR_DETECTED:
+        return AVOID_LEFT
+    return CONTINUE
+
+
+def plan(action, config=AvoidanceConfig()):
+    """Motor commands for a decision as [(delay_before_s, command), ...]; command is a drive mode."""
+    if action == STOP:
+        return [(0.0, "stop")]
+    if action in (AVOID_RIGHT, AVOID_LEFT):
+        turn = "right" if action == AVOID_RIGHT else "left"
+        return [(0.0, "stop"), (config.stop_pause_s, turn), (config.turn_s, "stop"), (0.0, "forward")]
+    return []
@@ -0,0 +1,267 @@
+import glob
+import os
+import threading
+import time
+
+import cv2
+import numpy as np
+
+
+class CameraStream:
+    """Reads one camera on its own thread and encodes each frame to JPEG once.
+
+    Every /video_feed client shares the latest encoded frame instead of calling
+    camera.read() itself, and each frame is also pushed into the optional FrameRing.
+    A low-resolution "preview" JPEG is encoded in the same pass, but only while at
+    least one preview client is connected. With a SharedFramePool the encoding runs in
+    the pool's worker processes and the capture thread only copies the frame.
+    """
+
+    def __init__(self, capture, ring=None, jpeg_quality=80, preview_width=320, preview_quality=60, pool=None,
+                 name="cam0"):
+        self.name = name
+        self.capture = capture
+        self.ring = ring
+        self.pool = pool
+        self.jpeg_quality = jpeg_quality
+        self.preview_quality = preview_quality
+        self.encode_params = [int(cv2.IMWRITE_JPEG_QUALITY), jpeg_quality]
+        self.preview_width = preview_width
+        self.preview_params = [int(cv2.IMWRITE_JPEG_QUALITY), preview_quality]
+        self.preview_clients = 0
+        self.frame = None  # Latest raw BGR frame, shared with vision consumers (lane following)
+        self.jpeg = None
+        self.preview_jpeg = None
+        self.seq = 0
+        self._capture_seq = 0
+        self._published_seq = 0
+        # Changes on every restart so ETags from a previous run never match
+        self.boot_id = os.urandom(4).hex()
+        self.running = False
+        self._cond = threading.Condition()
+        self._thread = None
+        # Counters reported by stats()
+        self.frames_captured = 0
+        self.frames_dropped = 0   # Captured but never published (pool busy, encode failure, stale)
+        self.read_failures = 0
+        self.fps = 0.0
+        self._fps_count = 0
+        self._fps_window_start = time.monotonic()
+        self._listeners = []  # Called (from the capture/pool thread) after each published frame
+        self._oversize_warned = False
+
+    def start(self):
+        self.running = True
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self.running = False
+        with self._cond:
+            self._cond.notify_all()
+
+    def _run(self):
+        failures = 0
+        while self.running:
+            success, frame = self.capture.read()
+            if not success:
+                failures += 1
+                self.read_failures += 1
+                if failures > 50:
+                    print(f"Warning: Camera {self.name} stopped delivering frames. Video feed disabled.")
+                    break
+                time.sleep(0.1)
+                continue
+            failures = 0
+            timestamp = time.time()
+            self._capture_seq += 1
+            self.frames_captured += 1
+
+            if self.pool is not None and frame.nbytes > self.pool.slot_bytes and not self._oversize_warned:
+                self._oversize_warned = True
+                print(f"Warning: Camera {self.name} frames ({frame.shape[1]}x{frame.shape[0]}) are larger than "
+                      f"the vision pool slots; encoding in-process.")
+            if self.pool is not None and frame.nbytes <= self.pool.slot_bytes:
+                # Offload encoding; if every pool slot is busy the frame is simply skipped
+                preview_width = self.preview_width if self.preview_clients > 0 else None
+                submitted = self.pool.submit(frame, "jpeg", seq=self._capture_seq,
+                                             callback=lambda seq, result, frame=frame, timestamp=timestamp:
+                                                 self._publish(seq, frame, result[0], result[1], timestamp),
+                                             quality=self.jpeg_quality, preview_width=preview_width,
+                                             preview_quality=self.preview_quality)
+                if not submitted:
+                    with self._cond:
+                        self.frames_dropped += 1
+                continue
+
+            ok, buffer = cv2.imencode('.jpg', frame, self.encode_params)
+            if not ok:
+                with self._cond:
+                    self.frames_dropped += 1
+                continue
+            jpeg = buffer.tobytes()
+
+            preview_jpeg = None
+            if self.preview_clients > 0:
+                preview_jpeg = self._encode_preview(frame)
+
+            self._publish(self._capture_seq, frame, jpeg, preview_jpeg, timestamp)
+
+        self.running = False
+        with self._cond:
+            self._cond.notify_all()
+
+    def _publish(self, capture_seq, frame, jpeg, preview_jpeg, timestamp):
+        with self._cond:
+            # Pool workers can finish out of order; never replace a newer frame with an older one
+            if jpeg is None or capture_seq <= self._published_seq:
+                self.frames_dropped += 1
+                return
+            self._published_seq = capture_seq
+            self.frame = frame
+            self.jpeg = jpeg
+            self.preview_jpeg = preview_jpeg
+            self.seq += 1
+            self._cond.notify_all()
+
+            self._fps_count += 1
+            now = time.monotonic()
+            if now - self._fps_window_start >= 1.0:
+                self.fps = round(self._fps_count / (now - self._fps_window_start), 1)
+                self._fps_count = 0
+                self._fps_window_start = now
+
+        if self.ring is not None:
+            self.ring.push(jpeg, timestamp)
+
+        for listener in self._listeners:
+            listener()
+
+    def add_listener(self, callback):
+        """Registers a no-argument callback run after every new frame (e.g. to wake an event loop)."""
+        self._listeners.append(callback)
+
+    def _encode_preview(self, frame):
+        height, width = frame.shape[:2]
+        if width > self.preview_width:
+            preview_height = int(height * self.preview_width / width)
+            frame = cv2.resize(frame, (self.preview_width, preview_height), interpolation=cv2.INTER_AREA)
+        ok, buffer = cv2.imencode('.jpg', frame, self.preview_params)
+        return buffer.tobytes() if ok else None
+
+    def wait_frame(self, last_seq, timeout=1.0, profile="full"):
+        """Blocks until a frame newer than last_seq is available. Returns (seq, data).
+
+        profile "full" / "preview" return JPEG bytes, "raw" returns the BGR array.
+        """
+        with self._cond:
+            self._cond.wait_for(lambda: self.seq != last_seq or not self.running, timeout)
+            if profile == "raw":
+                return self.seq, self.frame
+            return self.seq, (self.preview_jpeg if profile == "preview" else self.jpeg)
+
+    def stats(self):
+        with self._cond:
+            return {
+                "running": self.running,
+                "fps": self.fps,
+                "frames_captured": self.frames_captured,
+                "frames_published": self.seq,
+                "frames_dropped": self.frames_dropped,
+                "read_failures": self.read_failures,
+                "preview_clients": self.preview_clients,
+            }
+
+    def latest(self):
+        """Returns (etag, jpeg) for the most recent full-resolution frame without waiting."""
+        with self._cond:
+            return f"{self.boot_id}-{self.seq}", self.jpeg
+
+    def frames(self, profile="full"):
+        """Generator of multipart MJPEG chunks for a streaming Response."""
+        if profile == "preview":
+            self.track_preview_client(+1)
+        try:
+            last_seq = 0
+            while self.running:
+                seq, jpeg = self.wait_frame(last_seq, profile=profile)
+                if seq == last_seq or jpeg is None:
+                    continue
+                last_seq = seq
+                yield (b'--frame\r\n'
+                       b'Content-Type: image/jpeg\r\n\r\n' + jpeg + b'\r\n')
+        finally:
+            if profile == "preview":
+                self.track_preview_client(-1)
+
+    def track_preview_client(self, delta):
+        """Preview frames are only encoded while this count is above zero."""
+        with self._cond:
+            self.preview_clients += delta
+
+
+class FakeCapture:
+    """Stand-in for cv2.VideoCapture that produces frames without a camera.
+
+    Frames come from a directory of images / .npy files (looped) or, if no directory
+    is given, a synthetic moving gradient. Reads are paced to `fps`.
+    """
+
+    def __init__(self, width=640, height=480, fps=30.0, frames_dir=None, fail_after=None):
+        self.width = width
+        self.height = height
+        self.period = 1.0 / fps if fps else 0.0
+        self.fail_after = fail_after  # Simulate an unplugged camera after N frames
+        self.count = 0
+        self._next_time = time.monotonic()
+        self._opened = True
+        self._frames = []
+        if frames_dir:
+            for path in sorted(glob.glob(os.path.join(frames_dir, "*"))):
+                frame = np.load(path) if path.endswith(".npy") else cv2.imread(path)
+                if frame is not None:
+                    self._frames.append(frame)
+        if not self._frames:
+            gradient = np.linspace(0, 255, width, dtype=np.uint8)
+            self._base = np.broadcast_to(gradient[None, :, None], (height, width, 3))
+
+    def isOpened(self):
+        return self._opened
+
+    def read(self):
+        if not self._opened or (self.fail_after is not None and self.count >= self.fail_after):
+            return False, None
+        if self.period:
+            delay = self._next_time - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            self._next_time = max(self._next_time + self.period, time.monotonic())
+        self.count += 1
+        if self._frames:
+            return True, self._frames[self.count % len(self._frames)].copy()
+        return True, np.roll(self._base, self.count * 4, axis=1).copy()
+
+    def release(self):
+        self._opened = False
+
+
+def open_cameras(max_index=4, fake_count=0):
+    """Opens every camera index that responds, or `fake_count` FakeCaptures when > 0.
+
+    Returns a dict {camera_id: capture} with ids numbered from 0.
+    """
+    if fake_count:
+        return {i: FakeCapture() for i in range(fake_count)}
+
+    captures = {}
+    for index in range(max_index):
+        try:
+            capture = cv2.VideoCapture(index)
+        except cv2.error as e:
+            print(f"OpenCV Error on camera {index}: {e}")
+            continue
+        if capture.isOpened():
+            captures[len(captures)] = capture
+        else:
+            capture.release()
+    return captures
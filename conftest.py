@@ -0,0 +1 @@
+# Lets the tests in tests/ import the top-level modules (usirapli.py, eeg_shm.py, ...) directly.
@@ -0,0 +1,331 @@
+"""Memory-mapped EEG recordings: convert a spreadsheet/CSV once, then read windows lazily.
+
+The sheet layout is the one Seizure_detection.xlsx uses: one row per sample (Time column
+first), one column per recording/channel, and optionally a last row of labels. Conversion
+streams the rows (openpyxl read-only / pandas chunks) into a sample-major float32 .npy plus
+a .json sidecar, so nothing ever holds the whole table. Readers memory-map the .npy and
+release pages they have streamed past, so peak RSS does not grow with the file:
+
+    python eeg_recording.py convert /home/naveen/Desktop/Final/project/Seizure_detection.xlsx
+    python eeg_recording.py info Seizure_detection.npy
+    python eeg_recording.py bench --hours 3 --channels 18      # peak RSS vs file size
+    python eeg_recording.py memory Seizure_detection.xlsx      # DataFrame vs feature matrix RSS
+
+Measured on the shipped Seizure_detection.xlsx (18 recordings x 11000 samples), each path in a
+fresh interpreter: the transposed DataFrame holds 1.59 MB and grows RSS by 16-17 MB after loading
+(peak 89 MB); the float32 feature matrix holds 0.79 MB and grows RSS by 0.8 MB (peak 69 MB).
+"""
+import argparse
+import gc
+import json
+import mmap
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from collections import namedtuple
+
+import numpy as np
+
+SAMPLE_RATE = 1000
+CHUNK_ROWS = 65536
+
+# values: contiguous (recordings, samples) matrix, row i = recording columns[i];
+# column_map: column name -> row; labels: per-recording labels (or None)
+FeatureMatrix = namedtuple("FeatureMatrix", ["values", "columns", "column_map", "labels"])
+
+
+# --- Conversion ---
+def _xlsx_rows(path):
+    from openpyxl import load_workbook
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        yield [str(name) for name in next(rows)]
+        yield from rows
+    finally:
+        workbook.close()
+
+
+def _csv_rows(path, chunk_rows):
+    import pandas as pd
+    first = True
+    for chunk in pd.read_csv(path, chunksize=chunk_rows):
+        if first:
+            yield [str(name) for name in chunk.columns]
+            first = False
+        yield from chunk.itertuples(index=False, name=None)
+
+
+def _chunks(rows, chunk_rows):
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) == chunk_rows:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def convert(source, dest=None, label_row=True, time_column="Time", sample_rate=SAMPLE_RATE,
+            chunk_rows=CHUNK_ROWS):
+    """source (.xlsx or .csv) -> dest .npy (samples, columns) float32 + dest.json. Returns dest."""
+    dest = dest or os.path.splitext(source)[0] + ".npy"
+    rows = _xlsx_rows(source) if source.endswith((".xlsx", ".xlsm")) else _csv_rows(source, chunk_rows)
+    header = next(rows)
+    keep = [i for i, name in enumerate(header) if name != time_column]
+    columns = [header[i] for i in keep]
+
+    count = 0
+    last = None  # Held back one chunk so the label row can be split off at the end
+    with tempfile.NamedTemporaryFile(dir=os.path.dirname(os.path.abspath(dest)), delete=False) as raw:
+        for chunk in _chunks(rows, chunk_rows):
+            block = np.array([[row[i] for i in keep] for row in chunk], dtype=np.float32)
+            if last is not None:
+                raw.write(last.tobytes())
+                count += len(last)
+            last = block
+        labels = None
+        if last is not None:
+            if label_row:
+                labels, last = last[-1], last[:-1]
+            raw.write(last.tobytes())
+            count += len(last)
+    # Both files are written next to dest and swapped in with os.replace, .json first: if the
+    # conversion dies in between, the old .npy is still older than the source and is redone
+    meta = {"source": os.path.abspath(source), "columns": columns, "sample_rate": sample_rate,
+            "labels": labels.tolist() if labels is not None else None}
+    npy_tmp, json_tmp = dest + ".tmp", dest + ".json.tmp"
+    try:
+        with open(npy_tmp, "wb") as out:
+            np.lib.format.write_array_header_1_0(
+                out, {"descr": "<f4", "fortran_order": False, "shape": (count, len(columns))})
+            with open(raw.name, "rb") as f:
+                while True:
+                    data = f.read(1 << 20)
+                    if not data:
+                        break
+                    out.write(data)
+        with open(json_tmp, "w") as f:
+            json.dump(meta, f)
+        os.replace(json_tmp, dest + ".json")
+        os.replace(npy_tmp, dest)
+    finally:
+        os.unlink(raw.name)
+        for path in (npy_tmp, json_tmp):
+            if os.path.exists(path):
+                os.unlink(path)
+
+    print(f"Converted {source}: {count} samples x {len(columns)} columns -> {dest}")
+    return dest
+
+
+# --- Reading ---
+class Recording:
+    """Sample-major (samples, columns) float32 recording, memory-mapped read-only.
+
+    Everything returned is a view into the file mapping; nothing is loaded until touched.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.samples = np.load(path, mmap_mode="r")
+        meta = {}
+        if os.path.exists(path + ".json"):
+            with open(path + ".json") as f:
+                meta = json.load(f)
+        self.columns = meta.get("columns") or [str(i) for i in range(self.samples.shape[1])]
+        self.sample_rate = meta.get("sample_rate", SAMPLE_RATE)
+        self.labels = np.array(meta["labels"], dtype=np.float32) if meta.get("labels") else None
+        self._row_bytes = self.samples.shape[1] * self.samples.itemsize
+        self._data_offset = self.samples.offset
+
+    def __len__(self):
+        return self.samples.shape[0]
+
+    @property
+    def n_columns(self):
+        return self.samples.shape[1]
+
+    def rows(self, start, stop):
+        """Samples start..stop of every column: (stop - start, columns) view."""
+        return self.samples[start:stop]
+
+    def column(self, index, start=0, stop=None):
+        """Samples start..stop of one recording/channel (strided view)."""
+        return self.samples[start:stop, index]
+
+    def recording_vector(self, index):
+        """One whole column as a contiguous (1, samples) array: the decision tree's input for that recording."""
+        return np.ascontiguousarray(self.samples[:, index]).reshape(1, -1)
+
+    def windows(self, index, size, hop, start=0, release=True):
+        """Yields (start, view) windows of one column; pages behind the window are released."""
+        for begin in range(start, len(self) - size + 1, hop):
+            yield begin, self.samples[begin:begin + size, index]
+            if release:
+                self.release(begin, begin + hop)
+
+    def chunks(self, chunk_rows=CHUNK_ROWS, release=True):
+        """Yields (start, rows view) over the whole recording with constant memory."""
+        for begin in range(0, len(self), chunk_rows):
+            yield begin, self.samples[begin:begin + chunk_rows]
+            if release:
+                self.release(begin, begin + chunk_rows)
+
+    def release(self, start, stop):
+        """Tells the kernel the pages holding rows start..stop are not needed any more."""
+        mapping = getattr(self.samples, "_mmap", None)
+        if mapping is None or not hasattr(mapping, "madvise"):
+            return
+        lo = self._data_offset + start * self._row_bytes
+        hi = min(self._data_offset + min(stop, len(self)) * self._row_bytes, len(mapping))
+        lo -= lo % mmap.PAGESIZE
+        hi -= hi % mmap.PAGESIZE
+        if hi > lo:
+            mapping.madvise(mmap.MADV_DONTNEED, lo, hi - lo)
+
+
+def open_recording(source, **convert_args):
+    """Recording for a .npy, or for a spreadsheet/CSV (converted on first use, reused while up to date)."""
+    if source.endswith(".npy"):
+        return Recording(source)
+    dest = os.path.splitext(source)[0] + ".npy"
+    if not (os.path.exists(dest) and os.path.getmtime(dest) >= os.path.getmtime(source)):
+        convert(source, dest, **convert_args)
+    return Recording(dest)
+
+
+def load_feature_matrix(source, dtype=np.float32):
+    """Recording-major copy of a recording: row i is what x_data.iloc[i:i+1] used to be.
+
+    Filled chunk by chunk from the memory map, so only the matrix itself stays resident
+    (the shipped dataset: 18 x 11000 float32 = 0.8 MB).
+    """
+    recording = open_recording(source)
+    values = np.empty((recording.n_columns, len(recording)), dtype=dtype)
+    for start, rows in recording.chunks():
+        values[:, start:start + len(rows)] = rows.T
+    columns = tuple(recording.columns)
+    return FeatureMatrix(values, columns, {name: i for i, name in enumerate(columns)}, recording.labels)
+
+
+# --- Benchmark ---
+def peak_rss_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024  # KiB on Linux
+
+
+def rss_mb():
+    """Current resident set size (Linux)."""
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * mmap.PAGESIZE / 1e6
+
+
+def _measure_holder(source, mode):
+    """Loads `source` the way `mode` does, keeps the result alive and prints one JSON line of RSS figures."""
+    import pandas as pd  # Imported in both modes so library overhead cancels out
+    gc.collect()
+    before = rss_mb()
+    if mode == "dataframe":
+        # What seizure_detection_monitor used to keep for the life of the process
+        df = pd.read_excel(source).drop(['Time'], axis=1).transpose()
+        held = df.iloc[:, :-1]
+        del df
+        held_bytes = int(held.memory_usage(deep=True).sum())
+    else:
+        held = load_feature_matrix(source)
+        held_bytes = held.values.nbytes + sys.getsizeof(held.column_map)
+    gc.collect()
+    print(json.dumps({"mode": mode, "rss_delta_mb": round(rss_mb() - before, 2),
+                      "peak_rss_mb": round(peak_rss_mb(), 1), "held_mb": round(held_bytes / 1e6, 3)}))
+
+
+def memory_report(source):
+    """Runs both loaders in fresh interpreters and compares what they leave resident."""
+    # Convert first so the feature-matrix run measures steady state, not the one-off conversion
+    open_recording(source)
+    for mode in ("dataframe", "matrix"):
+        out = subprocess.run([sys.executable, os.path.abspath(__file__), "_measure", source, mode],
+                             capture_output=True, text=True, check=True).stdout
+        result = json.loads(out.strip().splitlines()[-1])
+        print(f"{mode:9s}: held object {result['held_mb']:.3f} MB | RSS after load +{result['rss_delta_mb']:.1f} MB "
+              f"| peak RSS {result['peak_rss_mb']:.0f} MB")
+
+
+def benchmark(hours=3.0, channels=18, path=None, window=11000, hop=1000, chunk_rows=CHUNK_ROWS):
+    """Writes a synthetic recording of `hours` at 1 kHz, then streams it; prints peak RSS at each step."""
+    path = path or os.path.join(tempfile.gettempdir(), f"eeg_bench_{hours:g}h_{channels}ch.npy")
+    total = int(hours * 3600 * SAMPLE_RATE)
+    print(f"start: peak RSS {peak_rss_mb():.0f} MB")
+    t0 = time.perf_counter()
+    out = np.lib.format.open_memmap(path, mode="w+", dtype=np.float32, shape=(total, channels))
+    rng = np.random.default_rng(0)
+    for begin in range(0, total, chunk_rows):
+        stop = min(begin + chunk_rows, total)
+        out[begin:stop] = rng.standard_normal((stop - begin, channels), dtype=np.float32)
+        out.flush()
+        out._mmap.madvise(mmap.MADV_DONTNEED)  # Written back by flush(); drop the dirty pages from RSS
+    del out
+    size_mb = os.path.getsize(path) / 1e6
+    print(f"wrote {total} x {channels} ({size_mb:,.0f} MB) in {time.perf_counter() - t0:.1f} s: "
+          f"peak RSS {peak_rss_mb():.0f} MB")
+
+    recording = Recording(path)
+    t0 = time.perf_counter()
+    energy = 0.0
+    for _, rows in recording.chunks(chunk_rows):
+        energy += float(np.square(rows, dtype=np.float64).sum())
+    print(f"chunked scan in {time.perf_counter() - t0:.1f} s: peak RSS {peak_rss_mb():.0f} MB")
+
+    t0 = time.perf_counter()
+    count = 0
+    for _, view in recording.windows(0, window, hop * 100):
+        count += 1
+        float(view.mean())
+    print(f"{count} windows of {window} samples in {time.perf_counter() - t0:.1f} s: "
+          f"peak RSS {peak_rss_mb():.0f} MB (file {size_mb:,.0f} MB)")
+    os.unlink(path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    sub = parser.add_subparsers(dest="command", required=True)
+    conv = sub.add_parser("convert", help="Spreadsheet/CSV -> memory-mappable .npy")
+    conv.add_argument("source")
+    conv.add_argument("--out")
+    conv.add_argument("--no-label-row", action="store_true", help="The last row is a sample, not labels")
+    conv.add_argument("--sample-rate", type=int, default=SAMPLE_RATE)
+    info = sub.add_parser("info", help="Shape, columns and labels of a converted recording")
+    info.add_argument("path")
+    bench = sub.add_parser("bench", help="Peak RSS while writing and streaming a large recording")
+    bench.add_argument("--hours", type=float, default=3.0)
+    bench.add_argument("--channels", type=int, default=18)
+    bench.add_argument("--path", help="Where to write the temporary recording")
+    memory = sub.add_parser("memory", help="Resident memory: DataFrame (old monitor) vs feature matrix")
+    memory.add_argument("source")
+    measure = sub.add_parser("_measure")  # Internal: one side of `memory`, in its own interpreter
+    measure.add_argument("source")
+    measure.add_argument("mode", choices=["dataframe", "matrix"])
+    args = parser.parse_args()
+
+    if args.command == "convert":
+        convert(args.source, args.out, not args.no_label_row, sample_rate=args.sample_rate)
+    elif args.command == "info":
+        recording = open_recording(args.path)
+        print(f"{recording.path}: {len(recording)} samples x {recording.n_columns} columns "
+              f"at {recording.sample_rate} Hz")
+        print(f"columns: {recording.columns}")
+        print(f"labels: {None if recording.labels is None else recording.labels.tolist()}")
+    elif args.command == "memory":
+        memory_report(args.source)
+    elif args.command == "_measure":
+        _measure_holder(args.source, args.mode)
+    else:
+        benchmark(args.hours, args.channels, args.path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,303 @@
+"""Framed binary EEG acquisition from a serial port, pipe or pseudo-terminal.
+
+Frame (little-endian, fixed size for a given channel count / samples per frame):
+
+    A5 5A | seq u16 | samples int16[samples_per_frame][channels] | checksum u16
+
+checksum = sum of the seq and sample bytes, mod 65536. Whole runs of frames are decoded
+with one np.frombuffer() view; a bad sync or checksum makes the decoder skip a byte and
+search for the next sync, so a dropped or corrupted byte costs one frame, not the stream.
+
+    python eeg_serial.py acquire --shm <name> --port /dev/ttyUSB0   # feed the seizure pipeline
+    python eeg_serial.py pty-demo --seconds 3                      # stand-in device on a pty
+    python eeg_serial.py bench --channels 8 --frames 200000        # decoder throughput
+"""
+import argparse
+import os
+import termios
+import threading
+import time
+import tty
+
+import numpy as np
+
+SYNC = b"\xa5\x5a"
+SYNC_WORD = 0x5AA5          # SYNC read as a little-endian u16
+DEFAULT_SAMPLES_PER_FRAME = 10
+READ_CHUNK = 65536
+
+
+def frame_dtype(channels, samples_per_frame=DEFAULT_SAMPLES_PER_FRAME):
+    return np.dtype([("sync", "<u2"), ("seq", "<u2"),
+                     ("samples", "<i2", (samples_per_frame, channels)), ("checksum", "<u2")])
+
+
+def _checksums(raw_frames):
+    """(n, frame_size) uint8 -> u16 sum of everything between sync and checksum."""
+    return (raw_frames[:, 2:-2].sum(axis=1, dtype=np.uint32) & 0xFFFF).astype(np.uint16)
+
+
+def encode_frames(samples, samples_per_frame=DEFAULT_SAMPLES_PER_FRAME, start_seq=0):
+    """int16 samples (n * samples_per_frame, channels) -> frame bytes (what the board sends)."""
+    samples = np.asarray(samples, dtype=np.int16)
+    channels = samples.shape[1]
+    count = len(samples) // samples_per_frame
+    dtype = frame_dtype(channels, samples_per_frame)
+    frames = np.zeros(count, dtype=dtype)
+    frames["sync"] = SYNC_WORD
+    frames["seq"] = (start_seq + np.arange(count)) & 0xFFFF
+    frames["samples"] = samples[:count * samples_per_frame].reshape(count, samples_per_frame, channels)
+    frames["checksum"] = _checksums(frames.view(np.uint8).reshape(count, dtype.itemsize))
+    return frames.tobytes()
+
+
+class FrameDecoder:
+    """Incremental decoder: feed() any chunk of bytes, get back the complete samples in it."""
+
+    def __init__(self, channels, samples_per_frame=DEFAULT_SAMPLES_PER_FRAME, scale=1.0):
+        self.channels = channels
+        self.dtype = frame_dtype(channels, samples_per_frame)
+        self.frame_size = self.dtype.itemsize
+        self.scale = np.float32(scale)  # ADC counts -> signal units (e.g. uV)
+        self._pending = b""
+        self._last_seq = None
+        self.frames_ok = 0
+        self.frames_bad = 0      # Sync or checksum mismatch
+        self.frames_missed = 0   # Gaps in the sequence counter
+        self.bytes_skipped = 0   # Discarded while searching for sync
+
+    def feed(self, data):
+        buf = self._pending + bytes(data) if self._pending else bytes(data)
+        size = self.frame_size
+        decoded = []
+        pos = 0
+        while True:
+            start = buf.find(SYNC, pos)
+            if start < 0:
+                # A trailing A5 may be the first half of the next sync
+                keep = 1 if pos < len(buf) and buf[-1] == SYNC[0] else 0
+                self.bytes_skipped += len(buf) - pos - keep
+                pos = len(buf) - keep
+                break
+            self.bytes_skipped += start - pos
+            count = (len(buf) - start) // size
+            if count == 0:
+                pos = start
+                break
+            frames = np.frombuffer(buf, dtype=self.dtype, count=count, offset=start)
+            raw = np.frombuffer(buf, dtype=np.uint8, count=count * size, offset=start).reshape(count, size)
+            ok = (frames["sync"] == SYNC_WORD) & (frames["checksum"] == _checksums(raw))
+            good = count if ok.all() else int(np.argmin(ok))
+            if good:
+                decoded.append(frames["samples"][:good])
+                self._track_seq(frames["seq"][:good])
+                self.frames_ok += good
+            if good == count:
+                pos = start + count * size
+                continue
+            # Frame `good` is corrupt: step one byte into it and look for the next sync
+            self.frames_bad += 1
+            pos = start + good * size + 1
+            self.bytes_skipped += 1
+        self._pending = buf[pos:]
+        if not decoded:
+            return np.empty((0, self.channels), dtype=np.float32)
+        samples = np.concatenate(decoded).reshape(-1, self.channels)
+        return samples.astype(np.float32) * self.scale
+
+    def _track_seq(self, seqs):
+        seqs = seqs.astype(np.int64)
+        if self._last_seq is not None:
+            self.frames_missed += int((seqs[0] - self._last_seq - 1) & 0xFFFF)
+        self.frames_missed += int(((np.diff(seqs) - 1) & 0xFFFF).sum())
+        self._last_seq = int(seqs[-1])
+
+    def stats(self):
+        return {"frames_ok": self.frames_ok, "frames_bad": self.frames_bad,
+                "frames_missed": self.frames_missed, "bytes_skipped": self.bytes_skipped}
+
+
+# --- Ports ---
+def open_port(path, baud=921600):
+    """Opens a serial device (raw mode, `baud`), pty or FIFO for reading. Returns the fd."""
+    fd = os.open(path, os.O_RDONLY | os.O_NOCTTY)
+    if os.isatty(fd):
+        tty.setraw(fd)
+        speed = getattr(termios, f"B{baud}", None)
+        if speed is not None:
+            attrs = termios.tcgetattr(fd)
+            attrs[4] = attrs[5] = speed  # ispeed, ospeed
+            termios.tcsetattr(fd, termios.TCSANOW, attrs)
+        else:
+            print(f"Warning: baud rate {baud} not supported by termios; keeping the port's current speed.")
+    return fd
+
+
+def run_acquisition(fd, decoder, sink, stop_event=None, chunk=READ_CHUNK):
+    """Reads until EOF (or stop_event) and passes every decoded block of samples to sink(samples)."""
+    while stop_event is None or not stop_event.is_set():
+        try:
+            data = os.read(fd, chunk)
+        except OSError:  # pty closed by the other side
+            break
+        if not data:
+            break
+        samples = decoder.feed(data)
+        if len(samples):
+            sink(samples)
+
+
+class PtyEEGDevice:
+    """Stand-in for the EEG board: a pseudo-terminal that emits frames in real time.
+
+    Open `device.port` like a serial port. `source(n)` returns n int16 samples per channel
+    (default: 10 Hz sine plus noise); `corrupt_every` flips a byte in every Nth frame.
+    """
+
+    def __init__(self, channels=1, sample_rate=1000, samples_per_frame=DEFAULT_SAMPLES_PER_FRAME,
+                 source=None, corrupt_every=0, seed=0):
+        self.channels = channels
+        self.sample_rate = sample_rate
+        self.samples_per_frame = samples_per_frame
+        self.corrupt_every = corrupt_every
+        self.rng = np.random.default_rng(seed)
+        self.source = source or self._sine
+        self.master, self._slave = os.openpty()
+        tty.setraw(self._slave)
+        self.port = os.ttyname(self._slave)
+        self.frames_sent = 0
+        self._t = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _sine(self, n):
+        t = (self._t + np.arange(n)) / self.sample_rate
+        wave = 800 * np.sin(2 * np.pi * 10 * t)[:, None] + self.rng.normal(0, 50, (n, self.channels))
+        return wave.astype(np.int16)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def _run(self):
+        tick_s = 0.01
+        per_tick = max(self.samples_per_frame, int(self.sample_rate * tick_s)
+                       // self.samples_per_frame * self.samples_per_frame)
+        next_tick = time.monotonic()
+        while not self._stop.is_set():
+            data = bytearray(encode_frames(self.source(per_tick), self.samples_per_frame, self.frames_sent))
+            frames = per_tick // self.samples_per_frame
+            if self.corrupt_every:
+                size = len(data) // frames
+                for i in range(frames):
+                    if (self.frames_sent + i) % self.corrupt_every == self.corrupt_every - 1:
+                        data[i * size + 5] ^= 0xFF
+            os.write(self.master, data)
+            self.frames_sent += frames
+            self._t += per_tick
+            next_tick += per_tick / self.sample_rate
+            time.sleep(max(0.0, next_tick - time.monotonic()))
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        os.close(self.master)
+        os.close(self._slave)
+
+
+# --- Commands ---
+def benchmark(channels=8, samples_per_frame=DEFAULT_SAMPLES_PER_FRAME, frames=200000,
+              corrupt_fraction=0.001, chunk=4096, seed=0):
+    rng = np.random.default_rng(seed)
+    samples = rng.integers(-2000, 2000, size=(frames * samples_per_frame, channels), dtype=np.int16)
+    stream = bytearray(encode_frames(samples, samples_per_frame))
+    size = frame_dtype(channels, samples_per_frame).itemsize
+    corrupted = rng.choice(frames, size=int(frames * corrupt_fraction), replace=False)
+    for index in corrupted:
+        stream[index * size + rng.integers(0, size)] ^= 0xFF
+    stream = bytes(stream)
+
+    decoder = FrameDecoder(channels, samples_per_frame)
+    decoded = 0
+    t0 = time.perf_counter()
+    for offset in range(0, len(stream), chunk):
+        decoded += len(decoder.feed(stream[offset:offset + chunk]))
+    elapsed_ms = (time.perf_counter() - t0) * 1000
+    print(f"{len(stream) / 1e6:.1f} MB in {chunk}-byte reads, {channels} channels x {samples_per_frame} "
+          f"samples/frame, {len(corrupted)} corrupted frames")
+    print(f"decoded {decoded * channels} channel-samples in {elapsed_ms:.1f} ms = "
+          f"{decoded * channels / elapsed_ms:,.0f} channel-samples/ms | {decoder.stats()}")
+
+
+def pty_demo(seconds=3.0, channels=1, corrupt_every=500):
+    device = PtyEEGDevice(channels=channels, corrupt_every=corrupt_every).start()
+    fd = open_port(device.port)
+    decoder = FrameDecoder(channels)
+    received = []
+    stop = threading.Event()
+    reader = threading.Thread(target=run_acquisition,
+                              args=(fd, decoder, lambda s: received.append(len(s)), stop), daemon=True)
+    reader.start()
+    time.sleep(seconds)
+    stop.set()
+    device.stop()
+    reader.join(1.0)
+    os.close(fd)
+    print(f"pty {device.port}: sent {device.frames_sent} frames, received {sum(received)} samples "
+          f"in {len(received)} reads | {decoder.stats()}")
+
+
+def acquire(shm_name, port, baud, samples_per_frame, scale, parent_pid=None):
+    """Serial -> decoder -> EEG shared-memory ring (replaces the dataset player)."""
+    from eeg_shm import EEGShared
+    shared = EEGShared.attach(shm_name)
+    fd = open_port(port, baud)
+    decoder = FrameDecoder(shared.ring.channels, samples_per_frame, scale)
+    stop = threading.Event()
+    if parent_pid is not None:
+        def watch_parent():
+            while os.getppid() == parent_pid:
+                time.sleep(0.5)
+            stop.set()
+        threading.Thread(target=watch_parent, daemon=True).start()
+    print(f"EEG serial acquisition: {port} -> {shared.ring.channels} channel ring")
+    try:
+        run_acquisition(fd, decoder, shared.ring.write, stop)
+    finally:
+        print(f"EEG serial acquisition stopped: {decoder.stats()}")
+        os.close(fd)
+        shared.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    sub = parser.add_subparsers(dest="command", required=True)
+    acq = sub.add_parser("acquire", help="Decode a port into the EEG shared-memory ring")
+    acq.add_argument("--shm", required=True)
+    acq.add_argument("--port", required=True)
+    acq.add_argument("--baud", type=int, default=921600)
+    acq.add_argument("--samples-per-frame", type=int, default=DEFAULT_SAMPLES_PER_FRAME)
+    acq.add_argument("--scale", type=float, default=1.0, help="ADC counts -> signal units")
+    acq.add_argument("--parent", type=int)
+    demo = sub.add_parser("pty-demo", help="Stand-in device on a pseudo-terminal, decoded live")
+    demo.add_argument("--seconds", type=float, default=3.0)
+    demo.add_argument("--channels", type=int, default=1)
+    demo.add_argument("--corrupt-every", type=int, default=500)
+    bench = sub.add_parser("bench", help="Decoder throughput on an in-memory stream")
+    bench.add_argument("--channels", type=int, default=8)
+    bench.add_argument("--samples-per-frame", type=int, default=DEFAULT_SAMPLES_PER_FRAME)
+    bench.add_argument("--frames", type=int, default=200000)
+    bench.add_argument("--corrupt", type=float, default=0.001, help="Fraction of frames with a flipped byte")
+    bench.add_argument("--chunk", type=int, default=4096, help="Bytes per read")
+    args = parser.parse_args()
+
+    if args.command == "acquire":
+        acquire(args.shm, args.port, args.baud, args.samples_per_frame, args.scale, args.parent)
+    elif args.command == "pty-demo":
+        pty_demo(args.seconds, args.channels, args.corrupt_every)
+    else:
+        benchmark(args.channels, args.samples_per_frame, args.frames, args.corrupt, args.chunk)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,265 @@
+"""Shared-memory handoff between EEG acquisition, seizure inference and the robot server.
+
+One shared memory segment holds:
+  control block (seqlock)  web server -> acquisition: test row of the dataset player
+  status block (seqlock)   inference -> web server: detection flag, prediction, timings
+  sample ring              acquisition -> inference: float32 samples, stored twice so
+                           that any window is one contiguous NumPy view (no copy, no pickling)
+
+Acquisition and inference run as separate interpreters, so the robot server only ever
+reads a few bytes of status and its latency does not depend on inference load:
+
+    python eeg_shm.py player --shm <name> --data Seizure_detection.xlsx
+    python eeg_shm.py infer --shm <name> --model decision_tree_model.joblib
+
+A live board can replace the player: python eeg_serial.py acquire --shm <name> --port /dev/ttyUSB0
+or a remote acquisition box over TCP:  python eeg_tcp.py serve --shm <name> --port 5555
+"""
+import argparse
+import os
+import struct
+import subprocess
+import sys
+import time
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from shm_seqlock import SeqlockBlock, StaleRead, attach_shared_memory
+
+SAMPLE_RATE = 1000        # Hz: the dataset's Time column steps by 1 ms
+WINDOW_SAMPLES = 11000    # One recording: what the decision tree takes as its feature vector
+HOP_SAMPLES = 1000        # Run inference once per this many new samples
+
+CONTROL = struct.Struct("<I")                 # test_row_index
+STATUS = struct.Struct("<BbfQfIddI")
+STATUS_FIELDS = ["detected", "prediction", "probability", "window_end", "inference_ms",
+                 "inferences", "updated_at", "heartbeat", "pid"]
+RING_HEADER = struct.Struct("<QIIf")          # write_index, capacity, channels, sample_rate
+
+_CONTROL_OFFSET = 0
+_STATUS_OFFSET = 64
+_RING_OFFSET = 128
+_DATA_OFFSET = 192        # 64-byte aligned start of the sample array
+
+
+def segment_size(capacity, channels):
+    return _DATA_OFFSET + 2 * capacity * channels * 4
+
+
+class EEGRing:
+    """Single-writer ring of float32 samples (rows = time, columns = channels).
+
+    Every sample is written at i and i + capacity, so the latest n <= capacity samples are
+    always data[start:start + n] for some start < capacity: one contiguous slice.
+    """
+
+    def __init__(self, buf, offset=_RING_OFFSET):
+        self.buf = buf
+        self.offset = offset
+        _, self.capacity, self.channels, self.sample_rate = RING_HEADER.unpack_from(buf, offset)
+        self.data = np.ndarray((2 * self.capacity, self.channels), dtype=np.float32,
+                               buffer=buf, offset=_DATA_OFFSET)
+
+    @property
+    def write_index(self):
+        """Total samples written so far."""
+        return RING_HEADER.unpack_from(self.buf, self.offset)[0]
+
+    def write(self, samples):
+        samples = np.asarray(samples, dtype=np.float32).reshape(-1, self.channels)
+        total = len(samples)
+        if total > self.capacity:
+            samples = samples[-self.capacity:]
+        index = self.write_index + total - len(samples)
+        start = index % self.capacity
+        first = min(len(samples), self.capacity - start)
+        for base in (0, self.capacity):
+            self.data[base + start:base + start + first] = samples[:first]
+            self.data[base:base + len(samples) - first] = samples[first:]
+        # Publish only after the samples are in place
+        struct.pack_into("<Q", self.buf, self.offset, index + len(samples))
+
+    def latest(self, n):
+        """(end_index, view of the last n samples). Check still_valid(end_index, n) after using it."""
+        end = self.write_index
+        start = (end - n) % self.capacity
+        return end, self.data[start:start + n]
+
+    def still_valid(self, end, n):
+        """False if the writer has since overwritten part of the window ending at `end`."""
+        return self.write_index - end <= self.capacity - n
+
+
+class EEGShared:
+    """The whole segment: control and status blocks plus the sample ring."""
+
+    def __init__(self, shm, owner):
+        self.shm = shm
+        self.name = shm.name
+        self._owner = owner
+        self.control = SeqlockBlock(shm.buf, _CONTROL_OFFSET, CONTROL)
+        self.status_block = SeqlockBlock(shm.buf, _STATUS_OFFSET, STATUS)
+        self.ring = EEGRing(shm.buf)
+        self._last_status = dict.fromkeys(STATUS_FIELDS, 0)
+
+    @classmethod
+    def create(cls, capacity=4 * WINDOW_SAMPLES, channels=1, sample_rate=SAMPLE_RATE):
+        size = segment_size(capacity, channels)
+        shm = shared_memory.SharedMemory(create=True, size=size)
+        shm.buf[:_DATA_OFFSET] = bytes(_DATA_OFFSET)
+        RING_HEADER.pack_into(shm.buf, _RING_OFFSET, 0, capacity, channels, sample_rate)
+        return cls(shm, owner=True)
+
+    @classmethod
+    def attach(cls, name):
+        return cls(attach_shared_memory(name), owner=False)
+
+    def set_test_row(self, row_index):
+        self.control.write(row_index)
+
+    def test_row(self):
+        """Selected row, or -1 (the player skips it) if the web process died mid-write."""
+        try:
+            return self.control.read()[1][0]
+        except StaleRead:
+            return -1
+
+    def status(self):
+        """Latest inference status; the last good one if the inference process died mid-write
+        (its heartbeat then ages, so the monitor reports it as not responding)."""
+        try:
+            self._last_status = dict(zip(STATUS_FIELDS, self.status_block.read()[1]))
+        except StaleRead:
+            pass
+        return self._last_status
+
+    def close(self):
+        self.ring = None  # Drop the NumPy view before closing the mapping
+        self.shm.close()
+        if self._owner:
+            self.shm.unlink()
+
+
+# --- Acquisition: dataset player ---
+def run_player(shared, data_path, interval_s=1.0, parent_pid=None, dtype=np.float32):
+    """Writes the selected recording into the ring once per `interval_s`.
+
+    Each write is one whole recording, so the inference window lines up with it exactly,
+    the same input the old in-thread loop gave the model every second. The player keeps
+    only a contiguous (recordings, samples) matrix of `dtype` and a column map
+    (eeg_recording.load_feature_matrix), not the transposed DataFrame.
+    """
+    from eeg_recording import load_feature_matrix
+    features = load_feature_matrix(data_path, dtype)
+    count, samples = features.values.shape
+    print(f"EEG player: {count} recordings of {samples} samples ({features.values.nbytes / 1e6:.1f} MB "
+          f"{features.values.dtype}) from {data_path}")
+    while parent_pid is None or os.getppid() == parent_pid:
+        row = shared.test_row()
+        if 0 <= row < count:
+            shared.ring.write(features.values[row])
+        else:
+            print(f"EEG player: invalid row index {row}, skipping.")
+        time.sleep(interval_s)
+
+
+# --- Inference ---
+def run_inference(shared, model_path, window=WINDOW_SAMPLES, hop=HOP_SAMPLES, channel=0, parent_pid=None):
+    """Predicts on the newest window whenever `hop` new samples have arrived; publishes the status."""
+    import joblib
+    try:
+        model = joblib.load(model_path)
+    except Exception as e:
+        print(f"EEG inference: could not load model {model_path}: {e}", file=sys.stderr)
+        raise SystemExit(1)
+    ring = shared.ring
+    has_proba = hasattr(model, "predict_proba")
+    print(f"EEG inference: model {type(model).__name__}, window {window}, hop {hop} samples")
+    last_end = inferences = 0
+    status = (0, -1, -1.0, 0, 0.0, 0, 0.0)
+    while parent_pid is None or os.getppid() == parent_pid:
+        end = ring.write_index
+        if end < window or end - last_end < hop:
+            shared.status_block.write(*status, time.monotonic(), os.getpid())  # Heartbeat only
+            time.sleep(0.01)
+            continue
+        end, view = ring.latest(window)
+        # (1, window) view into shared memory; float32 is what sklearn trees use internally
+        features = view[:, channel].reshape(1, -1)
+        t0 = time.perf_counter()
+        if has_proba:
+            # One pass: predict() is the argmax of predict_proba() (and a cascade would run twice)
+            proba = model.predict_proba(features)[0]
+            prediction = int(model.classes_[proba.argmax()])
+            probability = float(proba[-1])
+        else:
+            prediction = int(model.predict(features)[0])
+            probability = -1.0
+        elapsed_ms = (time.perf_counter() - t0) * 1000
+        if not ring.still_valid(end, window):
+            continue  # Overwritten while predicting: try again on the newest window
+        last_end = end
+        inferences += 1
+        if hasattr(model, "stats") and inferences % 600 == 0:
+            print(f"EEG inference: cascade {model.stats()}")  # Stage-1 pass rate, ms per window
+        status = (prediction == 1, prediction, probability, end, elapsed_ms, inferences, time.time())
+        shared.status_block.write(*status, time.monotonic(), os.getpid())
+
+
+def start_inference_process(shared, model_path, hop=HOP_SAMPLES):
+    """Starts only the inference process (fresh interpreter) on an existing segment."""
+    return subprocess.Popen([sys.executable, os.path.abspath(__file__), "infer", "--shm", shared.name,
+                             "--parent", str(os.getpid()), "--model", model_path, "--hop", str(hop)])
+
+
+def start_eeg_processes(shared, data_path, model_path, serial_port=None, baud=921600, tcp_port=None,
+                        synthetic=False):
+    """Starts acquisition and inference processes (fresh interpreters). Returns the Popen objects.
+
+    Acquisition is the dataset player, the live decoder in eeg_serial.py if `serial_port` is
+    set, the TCP ingestion server in eeg_tcp.py (stats on tcp_port + 1) if `tcp_port` is set,
+    or the real-time generator in eeg_synth.py if `synthetic` is set.
+    """
+    base = [sys.executable, os.path.abspath(__file__)]
+    common = ["--shm", shared.name, "--parent", str(os.getpid())]
+    here = os.path.dirname(os.path.abspath(__file__))
+    if synthetic:
+        acquisition = subprocess.Popen([sys.executable, os.path.join(here, "eeg_synth.py"), "feed"] + common)
+    elif serial_port:
+        acquisition = subprocess.Popen([sys.executable, os.path.join(here, "eeg_serial.py"), "acquire",
+                                        "--port", serial_port, "--baud", str(baud)] + common)
+    elif tcp_port:
+        acquisition = subprocess.Popen([sys.executable, os.path.join(here, "eeg_tcp.py"), "serve",
+                                        "--port", str(tcp_port), "--stats-port", str(tcp_port + 1)] + common)
+    else:
+        acquisition = subprocess.Popen(base + ["player"] + common + ["--data", data_path])
+    return [acquisition, start_inference_process(shared, model_path)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("role", choices=["player", "infer"])
+    parser.add_argument("--shm", required=True, help="Segment created by EEGShared.create()")
+    parser.add_argument("--parent", type=int, help="Exit when this process goes away")
+    parser.add_argument("--data", help="Dataset for the player")
+    parser.add_argument("--model", help="joblib model for inference")
+    parser.add_argument("--interval", type=float, default=1.0, help="Player: seconds between recordings")
+    parser.add_argument("--hop", type=int, default=HOP_SAMPLES)
+    parser.add_argument("--dtype", default="float32", help="Player: dtype of the in-memory recordings")
+    args = parser.parse_args()
+
+    shared = EEGShared.attach(args.shm)
+    try:
+        if args.role == "player":
+            run_player(shared, args.data, args.interval, args.parent, np.dtype(args.dtype))
+        else:
+            run_inference(shared, args.model, hop=args.hop, parent_pid=args.parent)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        shared.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,246 @@
+"""Synthetic multi-channel EEG with injectable seizure-like bursts, for load-testing inference.
+
+Blocks are generated with array operations (background noise, a 10 Hz alpha rhythm and
+~3 Hz spike-and-wave bursts), so generation is never the bottleneck. The generator writes
+into the same shared-memory ring as the dataset player, in real time or many times faster:
+
+    python eeg_synth.py feed --shm <name> --burst-every 30           # acquisition source
+    python eeg_synth.py bench-gen --channels 64 --seconds 600         # generator throughput
+    python eeg_synth.py bench-pipeline --model decision_tree_model.joblib --speed 20 --seconds 300
+"""
+import argparse
+import bisect
+import os
+import threading
+import time
+
+import numpy as np
+
+from eeg_shm import HOP_SAMPLES, SAMPLE_RATE, WINDOW_SAMPLES, EEGShared, start_inference_process
+
+MODEL_PATH = '/home/naveen/Desktop/LED/decision_tree_model.joblib'
+
+
+class SynthEEG:
+    """Stateful generator: consecutive block(n) calls continue the same signal.
+
+    bursts holds (start_sample, end_sample) of every injected burst: the ground truth for
+    detection-latency measurements.
+    """
+
+    def __init__(self, channels=1, sample_rate=SAMPLE_RATE, noise=30.0, alpha=20.0,
+                 burst_gain=8.0, burst_hz=3.0, seed=0):
+        self.channels = channels
+        self.sample_rate = sample_rate
+        self.noise = noise
+        self.alpha = alpha
+        self.burst_gain = burst_gain
+        self.burst_hz = burst_hz
+        self.rng = np.random.default_rng(seed)
+        self._phase = self.rng.uniform(0, 2 * np.pi, channels)
+        self._channel_gain = self.rng.uniform(0.6, 1.4, channels)  # Bursts are stronger on some channels
+        self.index = 0
+        self.bursts = []
+        self._longest = 0
+
+    def inject(self, start_s, duration_s):
+        """Adds a burst at `start_s` seconds of signal time."""
+        start = int(start_s * self.sample_rate)
+        length = int(duration_s * self.sample_rate)
+        bisect.insort(self.bursts, (start, start + length))
+        self._longest = max(self._longest, length)
+
+    def schedule(self, every_s, duration_s, total_s, jitter=0.3):
+        """Bursts roughly every `every_s` seconds (+/- jitter * every_s) up to `total_s`."""
+        t = every_s
+        while t + duration_s < total_s:
+            self.inject(t, duration_s)
+            t += every_s * (1 + self.rng.uniform(-jitter, jitter))
+
+    def block(self, n):
+        """Next n samples as float32 (n, channels)."""
+        t = (self.index + np.arange(n)) / self.sample_rate
+        out = self.rng.standard_normal((n, self.channels), dtype=np.float32) * np.float32(self.noise)
+        out += (self.alpha * np.sin(2 * np.pi * 10 * t[:, None] + self._phase)).astype(np.float32)
+        end = self.index + n
+        # Only the bursts starting before `end` and not longer ago than the longest one can overlap
+        for i in range(bisect.bisect_left(self.bursts, (end,)) - 1, -1, -1):
+            start, stop = self.bursts[i]
+            if start + self._longest <= self.index:
+                break
+            if stop <= self.index:
+                continue
+            lo, hi = max(start, self.index), min(stop, end)
+            out[lo - self.index:hi - self.index] += self._burst(lo, hi, start, stop)
+        self.index = end
+        return out
+
+    def _burst(self, lo, hi, start, stop):
+        """Spike-and-wave samples lo..hi of the burst start..stop, with 0.5 s ramps at both ends."""
+        k = np.arange(lo, hi)
+        cycle = ((k - start) * self.burst_hz / self.sample_rate) % 1.0
+        wave = -3.0 * np.exp(-(cycle / 0.04) ** 2) + np.sin(2 * np.pi * cycle)
+        ramp = self.sample_rate // 2
+        envelope = np.clip(np.minimum(k - start, stop - k) / ramp, 0.0, 1.0)
+        amplitude = self.burst_gain * self.alpha * envelope * wave
+        return (amplitude[:, None] * self._channel_gain).astype(np.float32)
+
+
+def run_feed(shared, synth, speed=1.0, tick_s=0.01, duration_s=None, parent_pid=None,
+             stop_event=None, on_write=None):
+    """Writes the generator into the ring at `speed` x real time (0: as fast as possible).
+
+    on_write(write_index) is called after every block.
+    """
+    ring = shared.ring
+    per_tick = max(1, int(synth.sample_rate * tick_s * speed)) if speed > 0 else synth.sample_rate
+    total = int(duration_s * synth.sample_rate) if duration_s else None
+    start = time.monotonic()
+    written = 0
+    while total is None or written < total:
+        if stop_event is not None and stop_event.is_set():
+            break
+        if parent_pid is not None and os.getppid() != parent_pid:
+            break
+        ring.write(synth.block(per_tick))
+        written += per_tick
+        if on_write:
+            on_write(ring.write_index)
+        if speed > 0:
+            time.sleep(max(0.0, start + written / (synth.sample_rate * speed) - time.monotonic()))
+    return written
+
+
+# --- Benchmarks ---
+def bench_generator(channels=64, seconds=600.0, block=1000, sample_rate=SAMPLE_RATE):
+    synth = SynthEEG(channels, sample_rate)
+    synth.schedule(every_s=30, duration_s=10, total_s=seconds)
+    blocks = int(seconds * sample_rate) // block
+    t0 = time.perf_counter()
+    for _ in range(blocks):
+        synth.block(block)
+    elapsed = time.perf_counter() - t0
+    samples = blocks * block
+    print(f"{samples} samples x {channels} channels ({seconds:.0f} s of signal, {len(synth.bursts)} bursts) "
+          f"in {elapsed:.2f} s = {samples * channels / elapsed / 1000:,.0f} channel-samples/ms, "
+          f"{seconds / elapsed:,.0f}x real time")
+
+
+def bench_pipeline(model_path, channels=1, speed=20.0, seconds=300.0, burst_every_s=30.0, burst_s=12.0,
+                   hop=HOP_SAMPLES):
+    """Drives the real inference process from the generator; reports throughput and detection latency."""
+    shared = EEGShared.create(channels=channels)
+    synth = SynthEEG(channels)
+    synth.schedule(burst_every_s, burst_s, seconds)
+    written_at = {}  # burst index -> wall time its first sample reached the ring
+
+    def on_write(write_index):
+        for i, (start, _) in enumerate(synth.bursts):
+            if i not in written_at and start < write_index:
+                written_at[i] = time.monotonic()
+
+    infer = start_inference_process(shared, model_path, hop)
+    try:
+        print("Waiting for the inference process to load the model...")
+        while not shared.status()["heartbeat"]:
+            if infer.poll() is not None:
+                raise RuntimeError("inference process exited")
+            time.sleep(0.05)
+
+        stop = threading.Event()
+        feeder = threading.Thread(target=run_feed, args=(shared, synth, speed),
+                                  kwargs={"duration_s": seconds, "stop_event": stop, "on_write": on_write})
+        t0 = time.monotonic()
+        feeder.start()
+        seen = 0
+        tp = fp = 0
+        inference_ms = []
+        detected_at = {}  # burst index -> (signal samples after burst start, wall seconds)
+        drain_until = None
+        while True:
+            status = shared.status()
+            if not feeder.is_alive():
+                # Let inference take the last windows, but don't wait forever if it has stalled
+                drain_until = drain_until or time.monotonic() + 5.0
+                if status["window_end"] >= shared.ring.write_index - hop or time.monotonic() > drain_until:
+                    break
+            if status["inferences"] == seen:
+                time.sleep(0.001)
+                continue
+            seen = status["inferences"]
+            inference_ms.append(status["inference_ms"])
+            end = status["window_end"]
+            hit = next((i for i, (start, stop) in enumerate(synth.bursts)
+                        if start < end and stop > end - WINDOW_SAMPLES), None)
+            if not status["detected"]:
+                continue
+            if hit is None:
+                fp += 1
+                continue
+            tp += 1
+            if hit not in detected_at:
+                detected_at[hit] = (end - synth.bursts[hit][0], time.monotonic() - written_at.get(hit, t0))
+        wall = time.monotonic() - t0
+        stop.set()
+        feeder.join()
+    finally:
+        infer.terminate()
+        infer.wait()
+        shared.close()
+
+    print(f"{seconds:.0f} s of {channels}-channel signal in {wall:.1f} s ({seconds / wall:.1f}x real time), "
+          f"{seen} inferences ({seen / wall:.1f}/s), inference {np.mean(inference_ms):.2f} ms mean / "
+          f"{np.max(inference_ms):.2f} ms max" if inference_ms else "no inferences")
+    print(f"bursts detected {len(detected_at)}/{len(synth.bursts)}, detections in burst windows {tp}, "
+          f"false positives {fp}")
+    if detected_at:
+        signal_ms = np.array([v[0] for v in detected_at.values()]) * 1000 / synth.sample_rate
+        wall_ms = np.array([v[1] for v in detected_at.values()]) * 1000
+        print(f"detection latency: signal {np.median(signal_ms):.0f} ms median / {signal_ms.max():.0f} ms max, "
+              f"wall {np.median(wall_ms):.0f} ms median / {wall_ms.max():.0f} ms max")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    sub = parser.add_subparsers(dest="command", required=True)
+    feed = sub.add_parser("feed", help="Real-time acquisition source for the EEG shared-memory ring")
+    feed.add_argument("--shm", required=True)
+    feed.add_argument("--parent", type=int)
+    feed.add_argument("--speed", type=float, default=1.0, help="x real time (0: unpaced)")
+    feed.add_argument("--burst-every", type=float, default=60.0, help="Seconds between bursts (0: none)")
+    feed.add_argument("--burst-s", type=float, default=12.0)
+    feed.add_argument("--seed", type=int, default=0)
+    gen = sub.add_parser("bench-gen", help="Generator throughput")
+    gen.add_argument("--channels", type=int, default=64)
+    gen.add_argument("--seconds", type=float, default=600.0)
+    gen.add_argument("--block", type=int, default=1000)
+    pipe = sub.add_parser("bench-pipeline", help="Inference throughput and detection latency")
+    pipe.add_argument("--model", default=MODEL_PATH)
+    pipe.add_argument("--channels", type=int, default=1)
+    pipe.add_argument("--speed", type=float, default=20.0)
+    pipe.add_argument("--seconds", type=float, default=300.0)
+    pipe.add_argument("--burst-every", type=float, default=30.0)
+    pipe.add_argument("--burst-s", type=float, default=12.0)
+    pipe.add_argument("--hop", type=int, default=HOP_SAMPLES)
+    args = parser.parse_args()
+
+    if args.command == "bench-gen":
+        bench_generator(args.channels, args.seconds, args.block)
+    elif args.command == "bench-pipeline":
+        bench_pipeline(args.model, args.channels, args.speed, args.seconds, args.burst_every, args.burst_s,
+                       args.hop)
+    else:
+        shared = EEGShared.attach(args.shm)
+        synth = SynthEEG(shared.ring.channels, int(shared.ring.sample_rate), seed=args.seed)
+        if args.burst_every:
+            synth.schedule(args.burst_every, args.burst_s, total_s=24 * 3600)
+        try:
+            run_feed(shared, synth, args.speed, parent_pid=args.parent)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            shared.close()
+
+
+if __name__ == "__main__":
+    main()
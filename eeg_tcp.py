@@ -0,0 +1,233 @@
+"""TCP ingestion of EEG from a separate acquisition box, with backpressure.
+
+A sender connects, says hello (b"EEG" + channel count byte) and then streams the same
+frames as the serial link (eeg_serial.py). Samples go into the EEG shared-memory ring, so
+inference sees them exactly like the dataset player's. When inference falls behind (more
+than `max_lag` samples written past its last window) the server stops reading the socket;
+the kernel buffers fill up and the sender's send() blocks until inference catches up.
+
+    python eeg_tcp.py serve --shm <name> --port 5555 --stats-port 5556
+    python eeg_tcp.py send --port 5555 --seconds 10            # stand-in acquisition box
+    python eeg_tcp.py send --port 5555 --seconds 10 --fast     # as fast as backpressure allows
+"""
+import argparse
+import asyncio
+import json
+import os
+import socket
+import time
+from collections import deque
+
+import numpy as np
+
+from eeg_serial import DEFAULT_SAMPLES_PER_FRAME, FrameDecoder, encode_frames
+from eeg_shm import SAMPLE_RATE, WINDOW_SAMPLES, EEGShared
+
+HELLO = b"EEG"
+HELLO_TIMEOUT_S = 5.0
+READ_CHUNK = 65536
+BACKPRESSURE_POLL_S = 0.005
+
+
+class IngestServer:
+    """One sender at a time writes into the ring (it has a single writer); others are refused."""
+
+    def __init__(self, shared, max_lag=None, stale_s=2.0, samples_per_frame=DEFAULT_SAMPLES_PER_FRAME,
+                 scale=1.0, report_s=5.0):
+        self.shared = shared
+        self.ring = shared.ring
+        # Past this, the window inference would read next starts being overwritten
+        self.max_lag = max_lag or self.ring.capacity - WINDOW_SAMPLES
+        self.stale_s = stale_s
+        self.samples_per_frame = samples_per_frame
+        self.scale = scale
+        self.report_s = report_s
+        self.connections = {}            # peer -> stats dict (open connections)
+        self.closed = deque(maxlen=20)   # Stats of the last closed connections
+        self.rejected = 0
+        self._active = None
+
+    def inference_lag(self):
+        """Samples written since the last inference window, or None if inference isn't running."""
+        status = self.shared.status()
+        if not status["heartbeat"] or time.monotonic() - status["heartbeat"] > self.stale_s:
+            return None
+        return self.ring.write_index - status["window_end"]
+
+    async def handle(self, reader, writer):
+        peer = "%s:%s" % writer.get_extra_info("peername")[:2]
+        try:
+            hello = await asyncio.wait_for(reader.readexactly(len(HELLO) + 1), HELLO_TIMEOUT_S)
+        except (asyncio.TimeoutError, asyncio.IncompleteReadError, ConnectionError):
+            hello = b""
+        if hello[:len(HELLO)] != HELLO or hello[-1] != self.ring.channels or self._active:
+            reason = "busy" if self._active else f"bad hello {hello!r} (ring has {self.ring.channels} channels)"
+            print(f"EEG TCP: refused {peer}: {reason}")
+            self.rejected += 1
+            writer.close()
+            return
+
+        self._active = peer
+        decoder = FrameDecoder(self.ring.channels, self.samples_per_frame, self.scale)
+        now = time.monotonic()
+        stats = {"peer": peer, "connected_at": time.time(), "bytes": 0, "samples": 0,
+                 "samples_per_s": 0.0, "lag_samples": 0, "max_lag_samples": 0,
+                 "pauses": 0, "paused_s": 0.0, "_started": now, "_mark": (now, 0)}
+        self.connections[peer] = stats
+        print(f"EEG TCP: streaming from {peer}")
+        try:
+            while True:
+                data = await reader.read(READ_CHUNK)
+                if not data:
+                    break
+                samples = decoder.feed(data)
+                if len(samples):
+                    self.ring.write(samples)
+                stats["bytes"] += len(data)
+                stats["samples"] += len(samples)
+                lag = self.inference_lag()
+                if lag is None:
+                    continue
+                stats["lag_samples"] = lag
+                stats["max_lag_samples"] = max(stats["max_lag_samples"], lag)
+                if lag > self.max_lag:
+                    # Backpressure: stop reading until inference has taken a newer window
+                    paused_at = time.monotonic()
+                    stats["pauses"] += 1
+                    while lag is not None and lag > self.max_lag:
+                        await asyncio.sleep(BACKPRESSURE_POLL_S)
+                        lag = self.inference_lag()
+                    stats["paused_s"] += time.monotonic() - paused_at
+        except ConnectionError as e:
+            print(f"EEG TCP: {peer} connection error: {e}")
+        finally:
+            self._active = None
+            stats.update(decoder.stats())
+            stats["disconnected_at"] = time.time()
+            # stats() only refreshes the rate of open connections: keep the average over the connection
+            duration = time.monotonic() - stats["_started"]
+            stats["samples_per_s"] = round(stats["samples"] / duration, 1) if duration > 0 else 0.0
+            self.closed.append(self.connections.pop(peer))
+            writer.close()
+            print(f"EEG TCP: {peer} closed after {stats['samples']} samples, {stats['pauses']} pauses")
+
+    def stats(self):
+        now = time.monotonic()
+        for stats in self.connections.values():
+            mark_t, mark_samples = stats["_mark"]
+            if now - mark_t >= 0.5:
+                stats["samples_per_s"] = round((stats["samples"] - mark_samples) / (now - mark_t), 1)
+                stats["_mark"] = (now, stats["samples"])
+
+        def public(stats):
+            return {k: (round(v, 3) if isinstance(v, float) else v) for k, v in stats.items() if not k.startswith("_")}
+        return {"open": [public(s) for s in self.connections.values()],
+                "closed": [public(s) for s in self.closed],
+                "rejected": self.rejected, "max_lag": self.max_lag, "inference_lag": self.inference_lag()}
+
+    async def send_stats(self, reader, writer):
+        writer.write(json.dumps(self.stats()).encode() + b"\n")
+        await writer.drain()
+        writer.close()
+
+    async def report(self):
+        while True:
+            await asyncio.sleep(self.report_s)
+            for stats in self.stats()["open"]:
+                print(f"EEG TCP: {stats['peer']} {stats['samples_per_s']:.0f} samples/s, "
+                      f"lag {stats['lag_samples']}, paused {stats['paused_s']:.1f} s")
+
+
+async def serve(server, host, port, stats_port=None, parent_pid=None):
+    listeners = [await asyncio.start_server(server.handle, host, port, limit=READ_CHUNK)]
+    if stats_port:
+        listeners.append(await asyncio.start_server(server.send_stats, host, stats_port))
+    print(f"EEG TCP ingestion on {host}:{port}" + (f", stats on :{stats_port}" if stats_port else ""))
+    asyncio.create_task(server.report())
+    try:
+        while parent_pid is None or os.getppid() == parent_pid:
+            await asyncio.sleep(0.5)
+    finally:
+        for listener in listeners:
+            listener.close()
+
+
+def fetch_stats(host="127.0.0.1", port=5556, timeout=1.0):
+    """Reads the JSON stats line from a running server's stats port."""
+    with socket.create_connection((host, port), timeout=timeout) as sock:
+        return json.loads(sock.makefile().readline())
+
+
+# --- Stand-in sender ---
+def send(host, port, channels=1, seconds=10.0, rate=SAMPLE_RATE, fast=False,
+         samples_per_frame=DEFAULT_SAMPLES_PER_FRAME, seed=0):
+    """Streams a sine-plus-noise signal; with `fast` it sends as quickly as the server accepts."""
+    rng = np.random.default_rng(seed)
+    block = max(samples_per_frame, rate // 100 // samples_per_frame * samples_per_frame)  # ~10 ms
+    sock = socket.create_connection((host, port))
+    sock.sendall(HELLO + bytes([channels]))
+    sent = seq = 0
+    blocked_s = 0.0
+    start = time.monotonic()
+    try:
+        while time.monotonic() - start < seconds:
+            t = (sent + np.arange(block)) / rate
+            samples = 800 * np.sin(2 * np.pi * 10 * t)[:, None] + rng.normal(0, 50, (block, channels))
+            data = encode_frames(samples.astype(np.int16), samples_per_frame, seq)
+            t0 = time.monotonic()
+            sock.sendall(data)
+            blocked_s += time.monotonic() - t0
+            sent += block
+            seq += block // samples_per_frame
+            if not fast:
+                time.sleep(max(0.0, start + sent / rate - time.monotonic()))
+    except (BrokenPipeError, ConnectionResetError) as e:
+        print(f"Server closed the connection: {e}")
+    finally:
+        sock.close()
+    elapsed = time.monotonic() - start
+    print(f"sent {sent} samples x {channels} channels in {elapsed:.1f} s = {sent / elapsed:,.0f} samples/s, "
+          f"{blocked_s:.1f} s blocked in send()")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    sub = parser.add_subparsers(dest="command", required=True)
+    srv = sub.add_parser("serve", help="Accept a sender and feed the EEG shared-memory ring")
+    srv.add_argument("--shm", help="Segment created by EEGShared.create() (default: create one)")
+    srv.add_argument("--host", default="0.0.0.0")
+    srv.add_argument("--port", type=int, default=5555)
+    srv.add_argument("--stats-port", type=int, default=5556)
+    srv.add_argument("--max-lag", type=int, help="Samples past the last inference window before pausing")
+    srv.add_argument("--samples-per-frame", type=int, default=DEFAULT_SAMPLES_PER_FRAME)
+    srv.add_argument("--scale", type=float, default=1.0, help="ADC counts -> signal units")
+    srv.add_argument("--parent", type=int)
+    snd = sub.add_parser("send", help="Stand-in acquisition box")
+    snd.add_argument("--host", default="127.0.0.1")
+    snd.add_argument("--port", type=int, default=5555)
+    snd.add_argument("--channels", type=int, default=1)
+    snd.add_argument("--seconds", type=float, default=10.0)
+    snd.add_argument("--rate", type=int, default=SAMPLE_RATE)
+    snd.add_argument("--fast", action="store_true", help="Don't pace to the sample rate")
+    snd.add_argument("--samples-per-frame", type=int, default=DEFAULT_SAMPLES_PER_FRAME)
+    sub.add_parser("stats", help="Print a running server's stats").add_argument("--port", type=int, default=5556)
+    args = parser.parse_args()
+
+    if args.command == "send":
+        send(args.host, args.port, args.channels, args.seconds, args.rate, args.fast, args.samples_per_frame)
+    elif args.command == "stats":
+        print(json.dumps(fetch_stats(port=args.port), indent=2))
+    else:
+        shared = EEGShared.attach(args.shm) if args.shm else EEGShared.create()
+        server = IngestServer(shared, args.max_lag, samples_per_frame=args.samples_per_frame, scale=args.scale)
+        try:
+            asyncio.run(serve(server, args.host, args.port, args.stats_port, args.parent))
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.ring = None  # Drop the NumPy view before closing the mapping
+            shared.close()
+
+
+if __name__ == "__main__":
+    main()
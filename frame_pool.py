@@ -0,0 +1,227 @@
+import argparse
+import multiprocessing as mp
+import os
+import threading
+import time
+from multiprocessing import shared_memory
+
+import numpy as np
+
+_STOP = None  # Sentinel telling workers / the collector to exit
+
+
+# --- Worker-side tasks: each receives a read-only view of the frame in its slot ---
+
+def _task_jpeg(frame, state, quality=80, preview_width=None, preview_quality=60):
+    import cv2
+    ok, buffer = cv2.imencode('.jpg', frame, [int(cv2.IMWRITE_JPEG_QUALITY), quality])
+    jpeg = buffer.tobytes() if ok else None
+    preview = None
+    if preview_width:
+        # Same as CameraStream._encode_preview: downscale only frames wider than the preview
+        small = frame
+        if frame.shape[1] > preview_width:
+            preview_height = int(frame.shape[0] * preview_width / frame.shape[1])
+            small = cv2.resize(frame, (preview_width, preview_height), interpolation=cv2.INTER_AREA)
+        ok, buffer = cv2.imencode('.jpg', small, [int(cv2.IMWRITE_JPEG_QUALITY), preview_quality])
+        preview = buffer.tobytes() if ok else None
+    return jpeg, preview
+
+
+TASKS = {
+    "jpeg": _task_jpeg,
+}
+
+
+def _worker_main(shm, slot_bytes, tasks, results):
+    # `shm` is the parent's block, inherited through fork: no attach, so the worker never
+    # registers or unregisters it with the resource tracker (which it shares with the parent)
+    state = {}  # Per-worker cache for tasks that keep state between frames
+    try:
+        while True:
+            message = tasks.get()
+            if message is _STOP:
+                break
+            slot, seq, task, shape, kwargs = message
+            start = slot * slot_bytes
+            frame = np.ndarray(shape, dtype=np.uint8, buffer=shm.buf, offset=start)
+            t0 = time.perf_counter()
+            try:
+                result = TASKS[task](frame, state, **kwargs)
+                error = None
+            except Exception as e:
+                result, error = None, str(e)
+            elapsed = time.perf_counter() - t0
+            del frame  # Release the buffer export before signalling that the slot is free
+            results.put((slot, seq, task, result, error, elapsed))
+    finally:
+        state.clear()
+        shm.close()
+
+
+class SharedFramePool:
+    """Process pool that receives frames through shared-memory slots instead of pickling.
+
+    submit() copies a frame into a free slot and sends only (slot, seq, task, shape,
+    kwargs) to the workers; results come back on a SimpleQueue and are delivered to the
+    submit callback from a collector thread. When every slot is busy the frame is dropped
+    (counted in stats) rather than queued, so the capture thread never waits on the pool.
+
+    The pool uses the "fork" start method and must be created before the parent starts
+    any threads.
+    """
+
+    def __init__(self, workers=None, slot_bytes=1280 * 720 * 3, slots=None):
+        self.workers = workers or max(1, (os.cpu_count() or 2) - 1)
+        self.slot_bytes = slot_bytes
+        self.slots = slots or self.workers * 2
+        self._shm = shared_memory.SharedMemory(create=True, size=self.slot_bytes * self.slots)
+        self._free = list(range(self.slots))
+        self._callbacks = {}
+        self._lock = threading.Lock()
+        self._idle = threading.Condition(self._lock)
+        self.submitted = 0
+        self.completed = 0
+        self.dropped = 0
+        self.errors = 0
+        self.busy_s = 0.0
+
+        ctx = mp.get_context("fork")
+        self._tasks = ctx.Queue()
+        self._results = ctx.SimpleQueue()
+        self._procs = [
+            ctx.Process(target=_worker_main, args=(self._shm, self.slot_bytes, self._tasks, self._results),
+                        daemon=True)
+            for _ in range(self.workers)
+        ]
+        for proc in self._procs:
+            proc.start()
+
+        self._collector = threading.Thread(target=self._collect, daemon=True)
+        self._collector.start()
+
+    def submit(self, frame, task, seq=0, callback=None, **kwargs):
+        """Queues one frame for `task`. Returns False (frame dropped) if no slot is free."""
+        if frame.nbytes > self.slot_bytes:
+            raise ValueError(f"Frame of {frame.nbytes} bytes does not fit a {self.slot_bytes} byte slot")
+        with self._lock:
+            if not self._free:
+                self.dropped += 1
+                return False
+            slot = self._free.pop()
+            self._callbacks[slot] = callback
+            self.submitted += 1
+
+        start = slot * self.slot_bytes
+        view = np.ndarray(frame.shape, dtype=np.uint8, buffer=self._shm.buf, offset=start)
+        np.copyto(view, frame, casting="unsafe")
+        del view
+        self._tasks.put((slot, seq, task, frame.shape, kwargs))
+        return True
+
+    def _collect(self):
+        while True:
+            message = self._results.get()
+            if message is _STOP:
+                break
+            slot, seq, task, result, error, elapsed = message
+            with self._lock:
+                callback = self._callbacks.pop(slot, None)
+                self._free.append(slot)
+                self.completed += 1
+                self.busy_s += elapsed
+                if error:
+                    self.errors += 1
+                self._idle.notify_all()
+            if error:
+                print(f"Frame pool '{task}' error: {error}")
+            elif callback is not None:
+                callback(seq, result)
+
+    def wait_slot(self, timeout=None):
+        """Blocks until at least one slot is free."""
+        with self._idle:
+            return self._idle.wait_for(lambda: len(self._free) > 0, timeout)
+
+    def wait_idle(self, timeout=None):
+        """Blocks until every submitted frame has been processed."""
+        with self._idle:
+            return self._idle.wait_for(lambda: len(self._free) == self.slots, timeout)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "slots_busy": self.slots - len(self._free),
+                "submitted": self.submitted,
+                "completed": self.completed,
+                "dropped": self.dropped,
+                "errors": self.errors,
+                "avg_task_ms": round(self.busy_s / self.completed * 1000, 2) if self.completed else 0.0,
+            }
+
+    def close(self):
+        for _ in self._procs:
+            self._tasks.put(_STOP)
+        for proc in self._procs:
+            proc.join(timeout=2)
+            if proc.is_alive():
+                proc.terminate()
+        self._results.put(_STOP)
+        self._collector.join(timeout=2)
+        self._shm.close()
+        self._shm.unlink()
+
+
+def _synthetic_frames(count, shape):
+    """Distinct, non-trivial frames so JPEG encoding cost is realistic."""
+    rng = np.random.default_rng(0)
+    base = np.linspace(0, 255, shape[1], dtype=np.float32)[None, :, None]
+    frames = []
+    for i in range(count):
+        noise = rng.normal(0, 20, shape).astype(np.float32)
+        frames.append(np.clip(base + noise + i, 0, 255).astype(np.uint8))
+    return frames
+
+
+def benchmark(task, frame_count, shape, worker_counts):
+    """Frames per second for the inline (in-process) path and for each pool size."""
+    frames = _synthetic_frames(8, shape)
+    state = {}
+
+    t0 = time.perf_counter()
+    for i in range(frame_count):
+        TASKS[task](frames[i % len(frames)], state)
+    inline_fps = frame_count / (time.perf_counter() - t0)
+    print(f"{task:<7} inline          : {inline_fps:8.1f} frames/s")
+
+    for workers in worker_counts:
+        pool = SharedFramePool(workers=workers, slot_bytes=frames[0].nbytes, slots=workers * 2)
+        # Warm up each worker (imports) before timing
+        for _ in range(workers * 2):
+            pool.submit(frames[0], task)
+        pool.wait_idle()
+
+        t0 = time.perf_counter()
+        submitted = 0
+        while submitted < frame_count:
+            if pool.submit(frames[submitted % len(frames)], task, seq=submitted):
+                submitted += 1
+            else:
+                pool.wait_slot()  # Benchmark is lossless: wait for a slot instead of dropping
+        pool.wait_idle()
+        fps = frame_count / (time.perf_counter() - t0)
+        pool.close()
+        print(f"{task:<7} pool x{workers:<2} workers: {fps:8.1f} frames/s ({fps / inline_fps:.2f}x inline)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the shared-memory frame pool.")
+    parser.add_argument("--task", choices=sorted(TASKS), default="jpeg")
+    parser.add_argument("--frames", type=int, default=600)
+    parser.add_argument("--width", type=int, default=640)
+    parser.add_argument("--height", type=int, default=480)
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    benchmark(args.task, args.frames, (args.height, args.width, 3), range(1, args.max_workers + 1))
@@ -0,0 +1,122 @@
+import os
+import queue
+import struct
+import threading
+import time
+from collections import deque
+
+# Index record written next to every clip: capture timestamp, byte offset, length
+CLIP_INDEX_RECORD = struct.Struct("<dQI")
+
+
+class FrameRing:
+    """Holds the most recent encoded JPEG frames, bounded by total bytes and age."""
+
+    def __init__(self, max_bytes=8 * 1024 * 1024, max_age_s=10.0):
+        self.max_bytes = max_bytes
+        self.max_age_s = max_age_s
+        self._frames = deque()  # (timestamp, jpeg_bytes), oldest first
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def push(self, jpeg, timestamp=None):
+        """Adds one already-encoded frame and evicts whatever no longer fits."""
+        if timestamp is None:
+            timestamp = time.time()
+        with self._lock:
+            self._frames.append((timestamp, jpeg))
+            self._bytes += len(jpeg)
+            oldest_allowed = timestamp - self.max_age_s
+            while self._frames and (self._bytes > self.max_bytes or self._frames[0][0] < oldest_allowed):
+                _, dropped = self._frames.popleft()
+                self._bytes -= len(dropped)
+
+    def snapshot(self):
+        """Returns a list copy of the buffered frames (references only, no JPEG copies)."""
+        with self._lock:
+            return list(self._frames)
+
+    def stats(self):
+        with self._lock:
+            count = len(self._frames)
+            span = self._frames[-1][0] - self._frames[0][0] if count > 1 else 0.0
+            return {"frames": count, "bytes": self._bytes, "seconds": round(span, 2)}
+
+
+class ClipWriter:
+    """Writes FrameRing snapshots to disk on a background thread.
+
+    dump() only copies the list of frame references and hands it to the writer
+    queue, so it is safe to call from the capture and control threads.
+    """
+
+    def __init__(self, ring, clip_dir, min_interval_s=5.0, max_pending=4, name=None):
+        self.ring = ring
+        self.name = name  # Added to clip file names when several cameras record
+        self.clip_dir = clip_dir
+        self.min_interval_s = min_interval_s
+        self._pending = queue.Queue(maxsize=max_pending)
+        self._last_dump = {}
+        self._dump_lock = threading.Lock()  # dump() is called from several trigger threads
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def dump(self, reason):
+        """Schedules a clip of the buffered frames. Never blocks; returns False if skipped."""
+        now = time.time()
+        with self._dump_lock:
+            # Check and update the rate limit together, or two triggers could both pass it
+            if now - self._last_dump.get(reason, 0.0) < self.min_interval_s:
+                return False
+            frames = self.ring.snapshot()
+            if not frames:
+                return False
+            try:
+                self._pending.put_nowait((reason, now, frames))
+            except queue.Full:
+                print(f"Warning: clip writer busy, dropped '{reason}' clip.")
+                return False
+            self._last_dump[reason] = now
+        return True
+
+    def _run(self):
+        while True:
+            reason, event_time, frames = self._pending.get()
+            try:
+                path = self._write_clip(reason, event_time, frames)
+                print(f"📼 Saved {len(frames)} pre-event frames to {path}")
+            except OSError as e:
+                print(f"Clip write error: {e}")
+
+    def _write_clip(self, reason, event_time, frames):
+        os.makedirs(self.clip_dir, exist_ok=True)
+        stamp = time.strftime("%Y%m%d-%H%M%S", time.localtime(event_time))
+        prefix = f"clip_{self.name}" if self.name else "clip"
+        base = os.path.join(self.clip_dir, f"{prefix}_{stamp}_{reason}")
+
+        # Frames are concatenated as plain MJPEG (playable with ffmpeg/VLC),
+        # the .idx file holds one CLIP_INDEX_RECORD per frame for random access.
+        index = bytearray()
+        offset = 0
+        with open(base + ".mjpeg.tmp", "wb") as clip_file:
+            for timestamp, jpeg in frames:
+                clip_file.write(jpeg)
+                index += CLIP_INDEX_RECORD.pack(timestamp, offset, len(jpeg))
+                offset += len(jpeg)
+        with open(base + ".idx.tmp", "wb") as index_file:
+            index_file.write(index)
+
+        os.replace(base + ".mjpeg.tmp", base + ".mjpeg")
+        os.replace(base + ".idx.tmp", base + ".idx")
+        return base + ".mjpeg"
+
+
+def read_clip(path):
+    """Yields (timestamp, jpeg_bytes) for each frame of a saved clip."""
+    index_path = path[:-len(".mjpeg")] + ".idx" if path.endswith(".mjpeg") else path + ".idx"
+    with open(index_path, "rb") as index_file:
+        index = index_file.read()
+    with open(path, "rb") as clip_file:
+        for timestamp, offset, length in CLIP_INDEX_RECORD.iter_unpack(index):
+            clip_file.seek(offset)
+            yield timestamp, clip_file.read(length)
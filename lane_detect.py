@@ -0,0 +1,228 @@
+import argparse
+import glob
+import os
+import time
+from collections import namedtuple
+
+import numpy as np
+
+LaneResult = namedtuple("LaneResult", ["offset", "heading", "confidence", "timings"])
+
+STAGES = ("crop", "gray", "threshold", "fit")
+
+
+class StageTimer:
+    """Accumulates per-stage wall time so the pipeline cost can be reported at runtime."""
+
+    def __init__(self, stages=STAGES, keep=500):
+        self.keep = keep
+        self.samples = {stage: [] for stage in stages}
+
+    def add(self, timings):
+        for stage, seconds in timings.items():
+            samples = self.samples.setdefault(stage, [])
+            samples.append(seconds)
+            if len(samples) > self.keep:
+                del samples[:len(samples) - self.keep]
+
+    def summary(self):
+        """Mean / p95 / max in milliseconds for every stage."""
+        report = {}
+        for stage, samples in self.samples.items():
+            if not samples:
+                continue
+            ms = np.asarray(samples) * 1000.0
+            report[stage] = {
+                "mean_ms": round(float(ms.mean()), 3),
+                "p95_ms": round(float(np.percentile(ms, 95)), 3),
+                "max_ms": round(float(ms.max()), 3),
+            }
+        return report
+
+
+class LaneDetector:
+    """Finds the lane centre in the lower part of a BGR camera frame.
+
+    The region of interest is cropped and downscaled by striding (views, no copies),
+    converted to gray with integer weights, then thresholded for lane colour and
+    vertical edges (brightness changes along a row, where the lane lines cross it). Lane pixels left and right of the image centre give one line
+    position per row; a first-order fit over the rows gives offset and heading.
+    """
+
+    def __init__(self, roi_top=0.55, scale=4, line_color="bright", color_k=1.5,
+                 edge_threshold=40, min_pixels_per_row=2, min_rows=4, lane_half_width=0.35):
+        self.roi_top = roi_top              # Fraction of the frame height where the ROI starts
+        self.scale = scale                  # Keep every Nth pixel in both directions
+        self.line_color = line_color        # "bright" (white tape) or "dark" (black tape)
+        self.color_k = color_k              # Std-devs from the ROI mean that count as lane colour
+        self.edge_threshold = edge_threshold
+        self.min_pixels_per_row = min_pixels_per_row
+        self.min_rows = min_rows
+        self.lane_half_width = lane_half_width  # Fraction of ROI width, used when one line is missing
+        self.timer = StageTimer()
+
+    def detect(self, frame):
+        """Returns a LaneResult, or None if no lane is visible in the frame."""
+        timings = {}
+        t0 = time.perf_counter()
+
+        # 1. Crop + downscale
+        height = frame.shape[0]
+        roi = frame[int(height * self.roi_top):, :][::self.scale, ::self.scale]
+        t1 = time.perf_counter()
+        timings["crop"] = t1 - t0
+
+        # 2. Gray (BT.601 weights in fixed point: 29 B + 150 G + 77 R >> 8)
+        if roi.ndim == 3:
+            gray = (roi[..., 0].astype(np.uint16) * 29
+                    + roi[..., 1].astype(np.uint16) * 150
+                    + roi[..., 2].astype(np.uint16) * 77) >> 8
+        else:
+            gray = roi.astype(np.uint16)
+        t2 = time.perf_counter()
+        timings["gray"] = t2 - t1
+
+        # 3. Colour threshold relative to the ROI statistics, plus vertical edges (gradient along each row)
+        mean = gray.mean()
+        spread = self.color_k * gray.std()
+        if self.line_color == "dark":
+            color_mask = gray < mean - spread
+        else:
+            color_mask = gray > mean + spread
+        edge_mask = np.zeros_like(color_mask)
+        edge_mask[:, 1:] = np.abs(np.diff(gray.astype(np.int16), axis=1)) > self.edge_threshold
+        mask = color_mask | edge_mask
+        t3 = time.perf_counter()
+        timings["threshold"] = t3 - t2
+
+        # 4. Per-row line positions on each half, then fit the lane centre
+        result = self._fit_centre(mask)
+        t4 = time.perf_counter()
+        timings["fit"] = t4 - t3
+
+        self.timer.add(timings)
+        if result is None:
+            return None
+        offset, heading, confidence = result
+        return LaneResult(offset, heading, confidence, timings)
+
+    def _fit_centre(self, mask):
+        rows, width = mask.shape
+        half = width // 2
+        columns = np.arange(width, dtype=np.float32)
+
+        left_mask = mask[:, :half]
+        right_mask = mask[:, half:]
+        left_count = left_mask.sum(axis=1)
+        right_count = right_mask.sum(axis=1)
+        left_pos = (left_mask @ columns[:half]) / np.maximum(left_count, 1)
+        right_pos = (right_mask @ columns[half:]) / np.maximum(right_count, 1)
+
+        has_left = left_count >= self.min_pixels_per_row
+        has_right = right_count >= self.min_pixels_per_row
+        half_lane = self.lane_half_width * width
+
+        centre = np.where(has_left & has_right, (left_pos + right_pos) / 2.0,
+                          np.where(has_left, left_pos + half_lane, right_pos - half_lane))
+        valid = has_left | has_right
+        if valid.sum() < self.min_rows:
+            return None
+
+        y = np.nonzero(valid)[0].astype(np.float32)
+        slope, intercept = np.polyfit(y, centre[valid], 1)
+
+        # Offset at the bottom row (closest to the robot), -1 = far left, +1 = far right
+        bottom_x = slope * (rows - 1) + intercept
+        offset = float(np.clip((bottom_x - width / 2.0) / (width / 2.0), -1.0, 1.0))
+        # Columns per row, converted to the same normalised units (positive = lane bends right)
+        heading = float(-slope * rows / (width / 2.0))
+        confidence = float(valid.mean())
+        return offset, heading, confidence
+
+
+class SteeringController:
+    """PD controller turning lane offset/heading into left and right duty cycles."""
+
+    def __init__(self, base_duty=25, kp=0.6, kd=0.1, k_heading=0.3, max_steer=1.0):
+        self.base_duty = base_duty
+        self.kp = kp
+        self.kd = kd
+        self.k_heading = k_heading
+        self.max_steer = max_steer
+        self._last_offset = None
+        self._last_time = None
+
+    def reset(self):
+        self._last_offset = None
+        self._last_time = None
+
+    def update(self, offset, heading, now=None):
+        """Returns (left_duty, right_duty); positive offset means the lane is to the right."""
+        if now is None:
+            now = time.monotonic()
+        derivative = 0.0
+        if self._last_offset is not None and now > self._last_time:
+            derivative = (offset - self._last_offset) / (now - self._last_time)
+        self._last_offset = offset
+        self._last_time = now
+
+        steer = self.kp * offset + self.kd * derivative + self.k_heading * heading
+        steer = max(-self.max_steer, min(self.max_steer, steer))
+
+        left_duty = max(0.0, min(100.0, self.base_duty * (1.0 + steer)))
+        right_duty = max(0.0, min(100.0, self.base_duty * (1.0 - steer)))
+        return left_duty, right_duty
+
+
+def load_frames(directory):
+    """Yields (name, frame) for recorded frames (.jpg/.png via OpenCV, .npy via NumPy) in name order."""
+    paths = []
+    for pattern in ("*.jpg", "*.jpeg", "*.png", "*.npy"):
+        paths.extend(glob.glob(os.path.join(directory, pattern)))
+    for path in sorted(paths):
+        if path.endswith(".npy"):
+            frame = np.load(path)
+        else:
+            import cv2
+            frame = cv2.imread(path)
+        if frame is not None:
+            yield os.path.basename(path), frame
+
+
+def run_on_directory(directory, detector=None, controller=None, verbose=True):
+    """Runs the full detect + steer pipeline over recorded frames and returns the per-frame results."""
+    detector = detector or LaneDetector()
+    controller = controller or SteeringController()
+    results = []
+    frame_period = 1.0 / 30.0  # Recorded frames are replayed on a 30 fps virtual clock
+    for i, (name, frame) in enumerate(load_frames(directory)):
+        lane = detector.detect(frame)
+        if lane is None:
+            controller.reset()
+            results.append((name, None, None, (0.0, 0.0)))
+            if verbose:
+                print(f"{name}: lane lost")
+            continue
+        duties = controller.update(lane.offset, lane.heading, now=i * frame_period)
+        results.append((name, lane.offset, lane.heading, duties))
+        if verbose:
+            print(f"{name}: offset={lane.offset:+.3f} heading={lane.heading:+.3f} "
+                  f"conf={lane.confidence:.2f} duty L/R={duties[0]:.1f}/{duties[1]:.1f}")
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run lane detection over a directory of recorded frames.")
+    parser.add_argument("frames_dir")
+    parser.add_argument("--roi-top", type=float, default=0.55)
+    parser.add_argument("--scale", type=int, default=4)
+    parser.add_argument("--line-color", choices=["bright", "dark"], default="bright")
+    parser.add_argument("--quiet", action="store_true")
+    args = parser.parse_args()
+
+    lane_detector = LaneDetector(roi_top=args.roi_top, scale=args.scale, line_color=args.line_color)
+    frame_results = run_on_directory(args.frames_dir, lane_detector, verbose=not args.quiet)
+    found = sum(1 for r in frame_results if r[1] is not None)
+    print(f"\nFrames: {len(frame_results)} | Lane found: {found}")
+    for stage, stats in lane_detector.timer.summary().items():
+        print(f"  {stage:<10} mean {stats['mean_ms']:.3f} ms | p95 {stats['p95_ms']:.3f} ms | max {stats['max_ms']:.3f} ms")
@@ -0,0 +1,165 @@
+"""Latency benchmark for the robot web server under concurrent clients.
+
+Run it against a live server (the motors will move, so lift the robot off the ground):
+
+    python loadtest.py --url http://robot.local:8000 --clients 8 --requests 200
+
+To compare before/after, start the older build and the current one in turn and run
+the same command against each; the routes and request mix are identical.
+
+Before/after numbers for the compact JSON control responses are not recorded yet: the
+server only starts on the robot (RPi.GPIO, the servo kit and the cameras), and it has
+not been run there since that change. Run the command above against the build before
+it and against this one, and keep both outputs next to each other.
+
+To compare the threaded Flask server with the asyncio mode (`usirapli.py --async`),
+hold open MJPEG viewers while the command load runs:
+
+    python loadtest.py --url http://robot.local:8000 --streams 20 --clients 8
+
+Threaded vs asyncio numbers are not recorded yet either, for the same reason: run that
+command once against `python usirapli.py` and once against `python usirapli.py --async`
+on the robot, with the same number of viewers.
+"""
+import argparse
+import http.client
+import threading
+import time
+from urllib.parse import urlsplit
+
+DRIVE_ROUTES = ["/forward", "/left", "/right", "/backward", "/stop"]
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(fraction * len(sorted_values)))]
+
+
+def run_client(host, port, routes, count, latencies, errors, method="POST"):
+    """One keep-alive connection issuing `count` requests round-robin over `routes`."""
+    conn = http.client.HTTPConnection(host, port, timeout=10)
+    for i in range(count):
+        route = routes[i % len(routes)]
+        t0 = time.perf_counter()
+        try:
+            conn.request(method, route, headers={"Content-Length": "0"} if method == "POST" else {})
+            response = conn.getresponse()
+            response.read()
+            if response.status >= 400:
+                errors.append(response.status)
+        except (OSError, http.client.HTTPException) as e:
+            errors.append(str(e))
+            conn.close()
+            conn = http.client.HTTPConnection(host, port, timeout=10)
+            continue
+        latencies.append(time.perf_counter() - t0)
+    conn.close()
+
+
+class StreamReader(threading.Thread):
+    """Holds one /video_feed connection open and counts the frames and bytes received."""
+
+    def __init__(self, host, port, path):
+        super().__init__(daemon=True)
+        self.host, self.port, self.path = host, port, path
+        self.frames = 0
+        self.bytes = 0
+        self.error = None
+        self.connected = threading.Event()
+        self.stop_event = threading.Event()
+
+    def run(self):
+        try:
+            conn = http.client.HTTPConnection(self.host, self.port, timeout=10)
+            conn.request("GET", self.path)
+            response = conn.getresponse()
+            self.connected.set()
+            tail = b""
+            while not self.stop_event.is_set():
+                chunk = response.read1(65536)
+                if not chunk:
+                    break
+                self.bytes += len(chunk)
+                data = tail + chunk
+                self.frames += data.count(b"--frame")
+                tail = data[-7:]
+            conn.close()
+        except (OSError, http.client.HTTPException) as e:
+            self.error = str(e)
+            self.connected.set()
+
+
+def run_streams(url, count, path="/video_feed"):
+    parts = urlsplit(url)
+    readers = [StreamReader(parts.hostname, parts.port or 80, path) for _ in range(count)]
+    for reader in readers:
+        reader.start()
+    for reader in readers:
+        reader.connected.wait(10)
+    return readers
+
+
+def report_streams(readers, elapsed):
+    connected = [r for r in readers if r.error is None]
+    frames = sum(r.frames for r in connected)
+    total_bytes = sum(r.bytes for r in connected)
+    print(f"--- {len(readers)} MJPEG viewers ---")
+    print(f"connected: {len(connected)} | failed: {len(readers) - len(connected)}")
+    if connected:
+        per_viewer = frames / len(connected) / elapsed
+        print(f"frames/s per viewer: {per_viewer:.1f} | total throughput: {total_bytes / elapsed / 1e6:.2f} MB/s")
+
+
+def run_load(url, routes, clients, requests_per_client, method="POST"):
+    parts = urlsplit(url)
+    latencies, errors = [], []
+    threads = [
+        threading.Thread(target=run_client,
+                         args=(parts.hostname, parts.port or 80, routes, requests_per_client, latencies, errors, method))
+        for _ in range(clients)
+    ]
+    t0 = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - t0
+    return sorted(latencies), errors, elapsed
+
+
+def report(title, latencies, errors, elapsed):
+    ms = [value * 1000 for value in latencies]
+    print(f"--- {title} ---")
+    print(f"requests: {len(ms)} ok, {len(errors)} errors in {elapsed:.2f} s ({len(ms) / elapsed:.1f} req/s)")
+    if ms:
+        print(f"latency ms: mean {sum(ms) / len(ms):.1f} | p50 {percentile(ms, 0.5):.1f} | "
+              f"p95 {percentile(ms, 0.95):.1f} | p99 {percentile(ms, 0.99):.1f} | max {ms[-1]:.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument("--clients", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=100, help="Requests per client")
+    parser.add_argument("--routes", default=",".join(DRIVE_ROUTES), help="Comma-separated routes to cycle through")
+    parser.add_argument("--method", default="POST")
+    parser.add_argument("--streams", type=int, default=0, help="MJPEG viewers held open during the run")
+    parser.add_argument("--stream-path", default="/video_feed")
+    args = parser.parse_args()
+
+    viewers = run_streams(args.url, args.streams, args.stream_path) if args.streams else []
+    stream_start = time.perf_counter()
+
+    route_list = [route.strip() for route in args.routes.split(",") if route.strip()]
+    results = run_load(args.url, route_list, args.clients, args.requests, args.method)
+    report(f"{args.clients} clients x {args.requests} requests on {args.url}", *results)
+
+    if viewers:
+        stream_elapsed = time.perf_counter() - stream_start
+        for viewer in viewers:
+            viewer.stop_event.set()
+        report_streams(viewers, stream_elapsed)
+
+    # Leave the robot stopped whatever the last route was
+    run_load(args.url, ["/stop"], 1, 1)
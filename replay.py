@@ -0,0 +1,182 @@
+"""Replays IR/ultrasonic timelines through the obstacle_monitor decisions on a virtual clock.
+
+Recorded runs come from the telemetry log (SENSORS records); synthetic runs are generated
+from a seed, so every replay is deterministic. Compare thresholds in one go:
+
+    python replay.py /home/naveen/Desktop/Final/project/telemetry --distances 15,20,30
+    python replay.py --synthetic 600 --seed 1 --turn-s 0.2,0.3,0.5 --out commands.csv
+"""
+import argparse
+import bisect
+import csv
+import random
+
+from avoidance import (AvoidanceConfig, SensorReading, decide, plan, IR_DETECTED,
+                       CONTINUE, STOP, AVOID_LEFT, AVOID_RIGHT)
+
+
+class VirtualClock:
+    """Stands in for time.time()/time.sleep(): sleeping just moves the clock forward."""
+
+    def __init__(self, start=0.0):
+        self.now = start
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+class SensorTimeline:
+    """Sorted (timestamp, SensorReading) samples; at(t) returns the latest sample not after t."""
+
+    def __init__(self, samples):
+        samples = sorted(samples, key=lambda sample: sample[0])
+        self.times = [t for t, _ in samples]
+        self.readings = [reading for _, reading in samples]
+
+    @property
+    def start(self):
+        return self.times[0]
+
+    @property
+    def end(self):
+        return self.times[-1]
+
+    def at(self, t):
+        index = bisect.bisect_right(self.times, t) - 1
+        return self.times[max(index, 0)], self.readings[max(index, 0)]
+
+
+def load_telemetry(path):
+    """SENSORS records of a telemetry segment or log directory as a SensorTimeline."""
+    from telemetry_log import read_log, SENSORS
+    samples = [(float(r["timestamp"]), SensorReading(int(r["ir_left"]), int(r["ir_right"]), float(r["us_front"]),
+                                                     float(r["us_left"]), float(r["us_right"])))
+               for segment in read_log(path) for r in segment[segment["kind"] == SENSORS]]
+    if not samples:
+        raise ValueError(f"No sensor records in {path}")
+    return SensorTimeline(samples)
+
+
+def synthetic_timeline(duration_s=300.0, rate_hz=20.0, seed=0):
+    """Random-walk distances with occasional obstacles on each side and rare IR (cliff/object) hits."""
+    rng = random.Random(seed)
+    distances = [150.0, 80.0, 80.0]  # front, left, right
+    samples = []
+    for i in range(int(duration_s * rate_hz)):
+        for side in range(3):
+            if rng.random() < 0.01:
+                distances[side] = rng.uniform(5, 40)        # Something appears close
+            else:
+                distances[side] += rng.gauss(0.5, 3.0)      # Drift, mostly opening up
+            distances[side] = min(max(distances[side], 2.0), 400.0)
+        left_ir = IR_DETECTED if rng.random() < 0.005 else 1
+        right_ir = IR_DETECTED if rng.random() < 0.005 else 1
+        # ~2% of echoes are lost (read_distance returns 0)
+        front, left, right = (0.0 if rng.random() < 0.02 else round(d, 2) for d in distances)
+        samples.append((i / rate_hz, SensorReading(left_ir, right_ir, front, left, right)))
+    return SensorTimeline(samples)
+
+
+def replay(timeline, config, resume_after_s=1.0, read_time_s=0.0):
+    """Runs the monitor loop over the timeline. Returns (commands, events).
+
+    commands: [(t, command, action)] as the actuator would receive them.
+    events: [(t, action, reading_t)] for every non-CONTINUE decision; reading_t is the
+    timestamp of the sample that triggered it (for reaction latency).
+    After an AUTO STOP the user is assumed to press Forward again after `resume_after_s`.
+    """
+    clock = VirtualClock(timeline.start)
+    commands = [(clock.now, "forward", "start")]
+    events = []
+    moving = True
+    stopped_at = None
+    while clock.now <= timeline.end:
+        if not moving:
+            if resume_after_s is None:
+                break
+            if clock.now - stopped_at >= resume_after_s:
+                moving = True
+                commands.append((clock.now, "forward", "resume"))
+            clock.sleep(config.poll_s)
+            continue
+        clock.sleep(read_time_s)
+        reading_t, reading = timeline.at(clock.now)
+        action = decide(reading, config)
+        if action != CONTINUE:
+            events.append((clock.now, action, reading_t))
+        for delay, command in plan(action, config):
+            clock.sleep(delay)
+            commands.append((clock.now, command, action))
+        if action == STOP:
+            moving = False
+            stopped_at = clock.now
+        clock.sleep(config.poll_s)
+    commands.append((clock.now, "stop", "end"))
+    return commands, events
+
+
+def summarize(commands, events):
+    """Counts, time spent per drive mode and reaction latency of a replay."""
+    duration = commands[-1][0] - commands[0][0]
+    time_in = {}
+    for (t, command, _), (next_t, _, _) in zip(commands, commands[1:]):
+        time_in[command] = time_in.get(command, 0.0) + next_t - t
+    latencies = sorted(t - reading_t for t, action, reading_t in events)
+    return {
+        "duration_s": round(duration, 2),
+        "commands": len(commands),
+        "auto_stops": sum(1 for _, action, _ in events if action == STOP),
+        "avoid_turns": sum(1 for _, action, _ in events if action in (AVOID_LEFT, AVOID_RIGHT)),
+        "forward_pct": round(100 * time_in.get("forward", 0.0) / duration, 1) if duration else 0.0,
+        "turning_pct": round(100 * (time_in.get("left", 0.0) + time_in.get("right", 0.0)) / duration, 1)
+                       if duration else 0.0,
+        "reaction_ms_mean": round(1000 * sum(latencies) / len(latencies), 1) if latencies else 0.0,
+        "reaction_ms_max": round(1000 * latencies[-1], 1) if latencies else 0.0,
+    }
+
+
+def write_commands(path, commands):
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["time_s", "command", "reason"])
+        for t, command, reason in commands:
+            writer.writerow([f"{t:.3f}", command, reason])
+
+
+def _floats(text):
+    return [float(value) for value in text.split(",")]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("log", nargs="?", help="Telemetry segment or directory to replay")
+    parser.add_argument("--synthetic", type=float, metavar="SECONDS", help="Replay a generated timeline instead")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--distances", default=str(AvoidanceConfig().avoid_distance_cm),
+                        help="Comma-separated avoid distances (cm) to compare")
+    parser.add_argument("--turn-s", default=str(AvoidanceConfig().turn_s), help="Comma-separated turn durations")
+    parser.add_argument("--poll-s", type=float, default=AvoidanceConfig().poll_s)
+    parser.add_argument("--resume-after", type=float, default=1.0,
+                        help="Seconds before the simulated user drives forward again after an auto stop")
+    parser.add_argument("--read-time", type=float, default=0.0, help="Simulated sensor read time per loop (s)")
+    parser.add_argument("--out", help="Write the command timeline of the first configuration to CSV")
+    args = parser.parse_args()
+
+    if args.synthetic:
+        sensor_timeline = synthetic_timeline(args.synthetic, seed=args.seed)
+    elif args.log:
+        sensor_timeline = load_telemetry(args.log)
+    else:
+        parser.error("give a telemetry log or --synthetic SECONDS")
+
+    print(f"{len(sensor_timeline.times)} sensor samples, {sensor_timeline.end - sensor_timeline.start:.1f} s")
+    first = True
+    for distance in _floats(args.distances):
+        for turn_s in _floats(args.turn_s):
+            config = AvoidanceConfig(avoid_distance_cm=distance, turn_s=turn_s, poll_s=args.poll_s)
+            commands, events = replay(sensor_timeline, config, args.resume_after, args.read_time)
+            print(f"distance {distance:5.1f} cm | turn {turn_s:.2f} s | {summarize(commands, events)}")
+            if first and args.out:
+                write_commands(args.out, commands)
+                print(f"Command timeline written to {args.out}")
+            first = False
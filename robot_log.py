@@ -0,0 +1,149 @@
+import os
+import queue
+import sys
+import threading
+import time
+from collections import deque
+
+
+class RobotLog:
+    """Non-blocking logger for the control loops.
+
+    log() does a dict lookup and a put_nowait(); formatting, stdout and file writes all
+    happen on a background thread, in batches. The same message (or `key`) is logged at
+    most once per `min_repeat_s`: repeats are counted and reported with the next line
+    that gets through. A token bucket caps the total rate at `max_per_s` lines.
+    The last `ring_size` entries are kept in memory for the /logs route.
+    Keys not let through for `min_repeat_s` are forgotten once more than `max_keys`
+    are tracked, so messages with changing text do not grow the dedup tables.
+    """
+
+    def __init__(self, path=None, ring_size=500, min_repeat_s=2.0, max_per_s=50,
+                 batch_lines=100, flush_interval_s=0.5, max_pending=5000, max_keys=1000, echo=True):
+        self.path = path
+        self.min_repeat_s = min_repeat_s
+        self.max_per_s = max_per_s
+        self.batch_lines = batch_lines
+        self.flush_interval_s = flush_interval_s
+        self.max_keys = max_keys
+        self.echo = echo
+        self._pending = queue.Queue(maxsize=max_pending)
+        self._ring = deque(maxlen=ring_size)
+        self._ring_lock = threading.Lock()  # Only between the writer and /logs readers
+        self._lock = threading.Lock()  # Token bucket and dedup tables; log() is called from every thread
+        self._last_logged = {}   # key -> time.monotonic() of the last line let through, oldest first
+        self._suppressed = {}    # key -> repeats swallowed since then
+        self._tokens = float(max_per_s)
+        self._tokens_at = time.monotonic()
+        self.seq = 0
+        self.dropped = 0         # Queue full or over the rate limit
+        self.suppressed_total = 0
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def log(self, message, level="INFO", key=None):
+        """Queues one line. Never blocks; returns False if it was deduplicated or dropped."""
+        now = time.monotonic()
+        key = key or message
+        with self._lock:
+            last = self._last_logged.get(key)
+            if last is not None and now - last < self.min_repeat_s:
+                self._suppressed[key] = self._suppressed.get(key, 0) + 1
+                self.suppressed_total += 1
+                return False
+
+            self._tokens = min(float(self.max_per_s), self._tokens + (now - self._tokens_at) * self.max_per_s)
+            self._tokens_at = now
+            if self._tokens < 1.0:
+                self.dropped += 1
+                return False
+            self._tokens -= 1.0
+
+            self._last_logged.pop(key, None)  # Re-insert at the end: the dict stays in time order
+            self._last_logged[key] = now
+            repeats = self._suppressed.pop(key, 0)
+            if len(self._last_logged) > self.max_keys:
+                self._forget(now)
+            try:
+                self._pending.put_nowait((time.time(), level, message, repeats))
+            except queue.Full:
+                self.dropped += 1
+                return False
+        return True
+
+    def _forget(self, now):
+        """Drops keys (oldest first) whose repeat window has passed. Caller holds self._lock."""
+        expired = []
+        for key, last in self._last_logged.items():
+            if now - last < self.min_repeat_s:
+                break
+            expired.append(key)
+        for key in expired:
+            del self._last_logged[key]
+            self._suppressed.pop(key, None)
+
+    def debug(self, message, key=None):
+        return self.log(message, "DEBUG", key)
+
+    def info(self, message, key=None):
+        return self.log(message, "INFO", key)
+
+    def warning(self, message, key=None):
+        return self.log(message, "WARNING", key)
+
+    def error(self, message, key=None):
+        return self.log(message, "ERROR", key)
+
+    def recent(self, since=0, limit=100):
+        """Entries with seq > since (oldest first, at most `limit`) as JSON-friendly dicts."""
+        if limit <= 0:
+            return []
+        with self._ring_lock:
+            entries = [entry for entry in self._ring if entry["seq"] > since]
+        return entries[-limit:]
+
+    def stats(self):
+        return {"lines": self.seq, "pending": self._pending.qsize(), "dropped": self.dropped,
+                "suppressed": self.suppressed_total}
+
+    def flush(self, timeout=2.0):
+        """Waits (up to `timeout`) until everything queued so far has been written."""
+        deadline = time.monotonic() + timeout
+        while self._pending.unfinished_tasks and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+    def _run(self):
+        lines = []
+        last_flush = time.monotonic()
+        while True:
+            try:
+                timestamp, level, message, repeats = self._pending.get(timeout=self.flush_interval_s)
+                self.seq += 1
+                entry = {"seq": self.seq, "time": round(timestamp, 3), "level": level,
+                         "message": message, "repeats": repeats}
+                with self._ring_lock:
+                    self._ring.append(entry)
+                stamp = time.strftime("%H:%M:%S", time.localtime(timestamp))
+                suffix = f" (repeated {repeats}x)" if repeats else ""
+                lines.append(f"{stamp} {level:7s} {message}{suffix}\n")
+            except queue.Empty:
+                pass
+            if lines and (len(lines) >= self.batch_lines or self._pending.empty()
+                          or time.monotonic() - last_flush >= self.flush_interval_s):
+                self._write("".join(lines))
+                for _ in lines:
+                    self._pending.task_done()
+                lines = []
+                last_flush = time.monotonic()
+
+    def _write(self, text):
+        if self.echo:
+            sys.stdout.write(text)
+            sys.stdout.flush()
+        if self.path:
+            try:
+                os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.write(text)
+            except OSError as e:
+                sys.stderr.write(f"Log write error: {e}\n")
@@ -0,0 +1,263 @@
+import argparse
+import sys
+import threading
+import time
+from dataclasses import dataclass, fields, replace
+from enum import Enum
+
+
+class MotionMode(Enum):
+    STOPPED = "stopped"
+    FORWARD = "forward"
+    BACKWARD = "backward"
+    LEFT = "left"
+    RIGHT = "right"
+    AVOID_LEFT = "avoid_left"    # Obstacle on the right, monitor turned left
+    AVOID_RIGHT = "avoid_right"  # Obstacle on the left, monitor turned right
+    AUTO_STOP = "auto_stop"      # Stopped by the obstacle monitor
+
+
+LINEAR_MODES = (MotionMode.FORWARD, MotionMode.BACKWARD)
+TURN_MODES = (MotionMode.LEFT, MotionMode.RIGHT, MotionMode.AVOID_LEFT, MotionMode.AVOID_RIGHT)
+
+
+@dataclass(frozen=True)
+class RobotState:
+    """One immutable snapshot of the robot state. `message` is the text shown on the page."""
+    mode: MotionMode = MotionMode.STOPPED
+    is_moving: bool = False
+    linear_speed: int = 20
+    turn_speed: int = 20
+    radar_running: bool = False
+    seizure_detected: bool = False
+    test_row_index: int = 0
+    message: str = "Stopped"
+    sensor_status: str = ""  # Last published IR/ultrasonic summary (distances rounded)
+    version: int = 0
+
+    def to_dict(self):
+        """JSON-friendly view using the key names /status has always returned."""
+        return {
+            "state": self.message,
+            "mode": self.mode.value,
+            "is_moving": self.is_moving,
+            "is_radar_running": self.radar_running,
+            "linear_speed": self.linear_speed,
+            "turn_speed": self.turn_speed,
+            "is_seizure_detected": self.seizure_detected,
+            "test_row_index": self.test_row_index,
+            "sensor_status": self.sensor_status,
+            "version": self.version,
+        }
+
+
+@dataclass(frozen=True)
+class RadarSweep:
+    """Servo angle the radar is pointing at and the last complete sweep of (angle, distance) points."""
+    angle: int = 90
+    points: tuple = ()
+
+
+_STATE_FIELDS = [f.name for f in fields(RobotState) if f.name != "version"]
+
+
+class Snapshot:
+    """An immutable value that readers load without locking.
+
+    Readers only read one reference (atomic in CPython), so they never wait for a writer
+    and never see a half-built value. Writers serialise on a small lock just long enough
+    to build and swap in the replacement; `seq` counts the swaps.
+    """
+
+    def __init__(self, value):
+        self._value = value
+        self._lock = threading.Lock()
+        self.seq = 0
+
+    def get(self):
+        return self._value
+
+    def set(self, value):
+        with self._lock:
+            self._value = value
+            self.seq += 1
+
+    def update(self, compute):
+        """Swaps in compute(current) atomically with respect to other writers. Returns the new value."""
+        with self._lock:
+            self._value = compute(self._value)
+            self.seq += 1
+            return self._value
+
+
+class StateStore:
+    """Holds the current RobotState and bumps its version on every real change.
+
+    update() is a no-op (no new version, nobody woken) when the new values equal the
+    current ones, so readers can compare versions instead of whole payloads.
+    get() never locks: states are immutable and swapped in whole, so the lock is only
+    held by writers (and by wait_for_change) while a new state is built.
+    """
+
+    def __init__(self, initial):
+        self._state = initial
+        self._cond = threading.Condition()
+        self._listeners = []  # Called with the new state after every change
+
+    def get(self):
+        return self._state
+
+    @property
+    def version(self):
+        return self.get().version
+
+    def update(self, **changes):
+        """Applies field changes atomically. Returns the resulting state."""
+        return self.update_with(lambda state: changes)
+
+    def update_with(self, compute):
+        """compute(state) -> dict of changes (or None); evaluated and applied under the lock."""
+        with self._cond:
+            old = self._state
+            changes = compute(old)
+            if not changes:
+                return old
+            new = replace(old, **changes)
+            if all(getattr(new, name) == getattr(old, name) for name in _STATE_FIELDS):
+                return old
+            new = replace(new, version=old.version + 1)
+            self._state = new
+            self._cond.notify_all()
+        for listener in self._listeners:
+            # A failing listener (telemetry, a closed event loop) must not kill the publishing thread
+            try:
+                listener(new)
+            except Exception as e:
+                print(f"Warning: state listener {listener!r} failed: {e!r}", file=sys.stderr)
+        return new
+
+    def wait_for_change(self, version, timeout=None):
+        """Blocks until the version differs from `version` (or timeout). Returns the current state."""
+        with self._cond:
+            self._cond.wait_for(lambda: self._state.version != version, timeout)
+            return self._state
+
+    def add_listener(self, callback):
+        self._listeners.append(callback)
+
+
+# --- Contention benchmark: one global lock vs immutable snapshots ---
+def _percentiles_us(samples):
+    samples = sorted(samples)
+    if not samples:
+        return "no samples"
+    pick = lambda f: samples[min(len(samples) - 1, int(f * len(samples)))] * 1e6
+    return f"p50 {pick(0.5):6.1f} | p99 {pick(0.99):7.1f} | max {samples[-1] * 1e6:8.1f} us ({len(samples)} ops)"
+
+
+def _run_threads(duration, radar_step, status_read, monitor_step, seizure_step, readers):
+    """Runs the radar, monitor and seizure loops plus `readers` status pollers for `duration` s."""
+    stop = threading.Event()
+    radar_lat, status_lat = [], []
+
+    def radar_loop():
+        angle = 0
+        while not stop.is_set():
+            t0 = time.perf_counter()
+            radar_step(angle)
+            radar_lat.append(time.perf_counter() - t0)
+            angle = (angle + 5) % 185
+            time.sleep(0.0005)
+
+    def status_loop():
+        while not stop.is_set():
+            t0 = time.perf_counter()
+            status_read()
+            status_lat.append(time.perf_counter() - t0)
+            time.sleep(0.0001)
+
+    def background(step):
+        def loop():
+            while not stop.is_set():
+                step()
+                time.sleep(0.0002)
+        return loop
+
+    threads = [threading.Thread(target=radar_loop), threading.Thread(target=background(monitor_step)),
+               threading.Thread(target=background(seizure_step))]
+    threads += [threading.Thread(target=status_loop) for _ in range(readers)]
+    for thread in threads:
+        thread.start()
+    time.sleep(duration)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    return radar_lat, status_lat
+
+
+def benchmark(duration=2.0, readers=4):
+    # Before: every field behind one threading.Lock, copied out by the status handler
+    lock = threading.Lock()
+    shared = {"state": "Stopped", "is_moving": False, "linear_speed": 20, "turn_speed": 20,
+              "is_radar_running": True, "is_seizure_detected": False, "test_row_index": 12,
+              "current_angle": 90, "radar_data": [(a, 50) for a in range(0, 181, 5)]}
+
+    def locked_radar_step(angle):
+        with lock:
+            shared["current_angle"] = angle
+
+    def locked_status_read():
+        with lock:
+            payload = dict(shared)
+            payload["radar_data"] = list(shared["radar_data"])
+        return payload
+
+    def locked_monitor_step():
+        with lock:
+            moving = shared["is_moving"]
+        if not moving:
+            with lock:
+                shared["state"] = "Stopped"
+
+    def locked_seizure_step():
+        with lock:
+            shared["is_seizure_detected"] = not shared["is_seizure_detected"]
+
+    # After: RobotState store + RadarSweep snapshot, readers never lock
+    store = StateStore(RobotState(radar_running=True, test_row_index=12))
+    sweep = Snapshot(RadarSweep(90, tuple((a, 50) for a in range(0, 181, 5))))
+
+    def snapshot_radar_step(angle):
+        sweep.update(lambda current: RadarSweep(angle, current.points))
+
+    def snapshot_status_read():
+        payload = store.get().to_dict()
+        current = sweep.get()
+        payload["current_angle"] = current.angle
+        payload["radar_data"] = current.points
+        return payload
+
+    def snapshot_monitor_step():
+        if not store.get().is_moving:
+            store.update(message="Stopped")
+
+    def snapshot_seizure_step():
+        store.update_with(lambda state: {"seizure_detected": not state.seizure_detected})
+
+    print(f"--- {readers} status readers + radar, monitor and seizure loops, {duration:.1f} s each ---")
+    radar_lat, status_lat = _run_threads(duration, locked_radar_step, locked_status_read,
+                                         locked_monitor_step, locked_seizure_step, readers)
+    print(f"global lock  radar step : {_percentiles_us(radar_lat)}")
+    print(f"global lock  status read: {_percentiles_us(status_lat)}")
+    radar_lat, status_lat = _run_threads(duration, snapshot_radar_step, snapshot_status_read,
+                                         snapshot_monitor_step, snapshot_seizure_step, readers)
+    print(f"snapshots    radar step : {_percentiles_us(radar_lat)}")
+    print(f"snapshots    status read: {_percentiles_us(status_lat)}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Contention benchmark for the shared robot state")
+    parser.add_argument("--duration", type=float, default=2.0, help="Seconds per variant")
+    parser.add_argument("--readers", type=int, default=4, help="Concurrent status readers")
+    args = parser.parse_args()
+    benchmark(args.duration, args.readers)
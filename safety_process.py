@@ -0,0 +1,463 @@
+"""Obstacle stop loop and motor output in their own process (optionally SCHED_FIFO, pinned).
+
+The web process (usirapli.py with SAFETY_PROCESS = True) never touches the motor pins: it
+writes the wanted drive mode into a shared-memory command block and reads the loop's
+state block (mode, sensor readings, stop latency, heartbeat). Neither side ever blocks
+the other: both blocks are seqlocks with a single writer each.
+
+Measure worst-case stop latency (fake sensors, obstacle appears at random times) with the
+loop as a thread in a busy interpreter vs in this separate process:
+
+    python safety_process.py --measure 20 --load-threads 4
+"""
+import argparse
+import gc
+import os
+import random
+import signal
+import struct
+import subprocess
+import sys
+import threading
+import time
+from multiprocessing import shared_memory
+
+from actuator import PIN_PATTERNS
+from avoidance import AvoidanceConfig, SensorReading, decide, plan, STOP, AVOID_LEFT, AVOID_RIGHT
+from shm_seqlock import SeqlockBlock, StaleRead, attach_shared_memory, HEADER_SIZE
+
+DRIVE_MODES = ["stop", "forward", "backward", "left", "right"]
+# Loop-reported modes; same order as telemetry_log.MODE_NAMES / robot_state.MotionMode values
+STATE_MODES = ["stopped", "forward", "backward", "left", "right", "avoid_left", "avoid_right", "auto_stop"]
+
+# Command block (web -> safety): desired drive mode and duties, submit time (time.monotonic)
+COMMAND = struct.Struct("<BBBBd")  # mode, duty, linear_duty, turn_duty, submitted_at
+# State block (safety -> web)
+STATE = struct.Struct("<BBBBfffIIIffffdII")
+STATE_FIELDS = ["mode", "moving", "ir_left", "ir_right", "front", "left", "right",
+                "loops", "stops", "events", "last_stop_ms", "worst_stop_ms", "worst_loop_ms",
+                "last_command_ms", "heartbeat", "applied_seq", "pid"]
+_BLOCK = 64  # Both blocks fit in one cache line each (plus the seqlock header)
+SHM_SIZE = 2 * (HEADER_SIZE + _BLOCK)
+
+# Same BCM pins as usirapli.py
+IN1, IN2, IN3, IN4, EN_A, EN_B = 26, 19, 13, 6, 12, 5
+LEFT_IR_PIN, RIGHT_IR_PIN = 22, 16
+FRONT_TRIG_PIN, FRONT_ECHO_PIN = 20, 21
+LEFT_TRIG_PIN, LEFT_ECHO_PIN = 24, 25
+RIGHT_TRIG_PIN, RIGHT_ECHO_PIN = 17, 4
+PWM_FREQ = 100
+COMMAND_POLL_S = 0.002  # Between sensor reads the loop checks for new commands this often
+
+
+class SafetyLink:
+    """Both shared-memory blocks. The web side uses submit()/stats() like an Actuator."""
+
+    def __init__(self, shm, owner, speeds=None):
+        self.shm = shm
+        self.name = shm.name
+        self._owner = owner
+        self.command = SeqlockBlock(shm.buf, 0, COMMAND)
+        self.state_block = SeqlockBlock(shm.buf, HEADER_SIZE + _BLOCK, STATE)
+        self.speeds = speeds or (lambda: (0, 0))  # () -> (linear_duty, turn_duty) for avoid maneuvers
+        self._mode = "stop"
+        self._duty = 0
+        self._lock = threading.Lock()  # Web-side writers (actuator calls from several threads)
+        self._last_state = dict.fromkeys(STATE_FIELDS, 0)
+
+    @classmethod
+    def create(cls, speeds=None):
+        shm = shared_memory.SharedMemory(create=True, size=SHM_SIZE)
+        shm.buf[:SHM_SIZE] = bytes(SHM_SIZE)
+        return cls(shm, owner=True, speeds=speeds)
+
+    @classmethod
+    def attach(cls, name):
+        return cls(attach_shared_memory(name), owner=False)
+
+    # --- Web side ---
+    def submit(self, mode, duty=0, source=""):
+        """Same contract as Actuator.submit(): the latest drive intent wins, "speed" keeps the mode."""
+        if mode != "speed" and mode not in PIN_PATTERNS:
+            raise ValueError(f"Unknown drive mode: {mode}")
+        with self._lock:
+            if mode == "speed":
+                if self._mode == "stop":
+                    return
+            else:
+                self._mode = mode
+            self._duty = 0 if self._mode == "stop" else duty
+            linear, turn = self.speeds()
+            self.command.write(DRIVE_MODES.index(self._mode), self._duty, linear, turn, time.monotonic())
+
+    def state(self):
+        """Latest safety loop state. If the block is stuck mid-write (the safety process died while
+        writing), the last good state is returned; its heartbeat then ages and shows the loop as dead."""
+        try:
+            self._last_state = dict(zip(STATE_FIELDS, self.state_block.read()[1]))
+        except StaleRead:
+            pass
+        return self._last_state
+
+    def stats(self):
+        state = self.state()
+        return {
+            "mode": STATE_MODES[state["mode"]],
+            "duty": self._duty,
+            "process_alive": time.monotonic() - state["heartbeat"] < 1.0,
+            "pid": state["pid"],
+            "loops": state["loops"],
+            "stops": state["stops"],
+            "latency_ms": {"last_stop": round(state["last_stop_ms"], 3), "worst_stop": round(state["worst_stop_ms"], 3),
+                           "worst_loop_overrun": round(state["worst_loop_ms"], 3),
+                           "last_command": round(state["last_command_ms"], 3)},
+        }
+
+    def close(self):
+        self.shm.close()
+        if self._owner:
+            self.shm.unlink()
+
+
+# --- Hardware ---
+class GPIOHardware:
+    """The motor driver, IR and ultrasonic sensors (imported here so only this process owns them)."""
+
+    def __init__(self):
+        import RPi.GPIO as GPIO
+        self.GPIO = GPIO
+        GPIO.setmode(GPIO.BCM)
+        GPIO.setwarnings(False)
+        for pin in [IN1, IN2, IN3, IN4, EN_A, EN_B, FRONT_TRIG_PIN, LEFT_TRIG_PIN, RIGHT_TRIG_PIN]:
+            GPIO.setup(pin, GPIO.OUT)
+        for pin in [LEFT_IR_PIN, RIGHT_IR_PIN, FRONT_ECHO_PIN, LEFT_ECHO_PIN, RIGHT_ECHO_PIN]:
+            GPIO.setup(pin, GPIO.IN)
+        self.pwm = [GPIO.PWM(EN_A, PWM_FREQ), GPIO.PWM(EN_B, PWM_FREQ)]
+        for pwm in self.pwm:
+            pwm.start(0)
+
+    def read_distance(self, trig, echo):
+        GPIO = self.GPIO
+        GPIO.output(trig, True)
+        time.sleep(0.00001)
+        GPIO.output(trig, False)
+        pulse_start = pulse_end = time.monotonic()
+        deadline = pulse_start + 0.05
+        while GPIO.input(echo) == 0 and pulse_start < deadline:
+            pulse_start = time.monotonic()
+        deadline = pulse_start + 0.05
+        while GPIO.input(echo) == 1 and pulse_end < deadline:
+            pulse_end = time.monotonic()
+        distance = round((pulse_end - pulse_start) * 17150, 2)
+        return distance if 2 <= distance <= 400 else 0
+
+    def read_sensors(self):
+        return SensorReading(self.GPIO.input(LEFT_IR_PIN), self.GPIO.input(RIGHT_IR_PIN),
+                             self.read_distance(FRONT_TRIG_PIN, FRONT_ECHO_PIN),
+                             self.read_distance(LEFT_TRIG_PIN, LEFT_ECHO_PIN),
+                             self.read_distance(RIGHT_TRIG_PIN, RIGHT_ECHO_PIN))
+
+    def obstacle_since(self):
+        return None  # Unknown on real hardware: latency is measured from the sensor read
+
+    def drive(self, levels, duty):
+        if any(levels):
+            for pwm in self.pwm:
+                pwm.ChangeDutyCycle(duty)
+            self.GPIO.output([IN1, IN2, IN3, IN4], list(levels))
+        else:
+            # Pins low first so the motors stop even if the PWM update is slow
+            self.GPIO.output([IN1, IN2, IN3, IN4], list(levels))
+            for pwm in self.pwm:
+                pwm.ChangeDutyCycle(0)
+
+    def close(self):
+        self.drive(PIN_PATTERNS["stop"], 0)
+        self.GPIO.cleanup([IN1, IN2, IN3, IN4, EN_A, EN_B])
+
+
+class FakeHardware:
+    """Clear road with a front obstacle appearing at random times while driving forward."""
+
+    def __init__(self, seed=0, read_time_s=0.006, gap_s=(0.2, 0.8)):
+        self.rng = random.Random(seed)
+        self.read_time_s = read_time_s  # Three echo round trips at ~1 m
+        self.gap_s = gap_s
+        self.levels = PIN_PATTERNS["stop"]
+        self.obstacle_at = None
+
+    def read_sensors(self):
+        time.sleep(self.read_time_s)
+        close = self.obstacle_at is not None and time.monotonic() >= self.obstacle_at
+        return SensorReading(1, 1, 10.0 if close else 150.0, 150.0, 150.0)
+
+    def obstacle_since(self):
+        return self.obstacle_at
+
+    def drive(self, levels, duty):
+        self.levels = levels
+        if levels == PIN_PATTERNS["forward"]:
+            self.obstacle_at = time.monotonic() + self.rng.uniform(*self.gap_s)
+        elif not any(levels):
+            self.obstacle_at = None
+
+    def close(self):
+        pass
+
+
+# --- The loop ---
+def set_realtime(priority=0, cpu=None):
+    """Best effort SCHED_FIFO and CPU pinning for this process. Returns what was applied."""
+    applied = {"sched_fifo": False, "cpu": None}
+    if cpu is not None and hasattr(os, "sched_setaffinity"):
+        try:
+            os.sched_setaffinity(0, {cpu})
+            applied["cpu"] = cpu
+        except OSError as e:
+            print(f"Safety loop: CPU pinning not allowed ({e}).")
+    if priority and hasattr(os, "SCHED_FIFO"):
+        try:
+            os.sched_setscheduler(0, os.SCHED_FIFO, os.sched_param(priority))
+            applied["sched_fifo"] = True
+        except (OSError, PermissionError) as e:
+            print(f"Safety loop: SCHED_FIFO not allowed ({e}); running with normal priority.")
+    return applied
+
+
+class SafetyLoop:
+    """Applies commands, reads the sensors and stops/avoids: obstacle_monitor plus the actuator."""
+
+    def __init__(self, link, hardware, config=AvoidanceConfig()):
+        self.link = link
+        self.hw = hardware
+        self.config = config
+        self.running = True
+        self.mode = "stopped"
+        self.moving = False
+        self.reading = SensorReading(1, 1, 0.0, 0.0, 0.0)
+        self.loops = self.stops = self.events = 0
+        self.last_stop_ms = self.worst_stop_ms = self.worst_loop_ms = self.last_command_ms = 0.0
+        self.applied_seq = 0
+        self.duties = (0, 0)
+
+    def _drive(self, mode, duty):
+        self.hw.drive(PIN_PATTERNS[mode], duty)
+
+    def _read_command(self):
+        """(seq, values) of the command block, or None (motors stopped) if it is stuck mid-write."""
+        try:
+            return self.link.command.read()
+        except StaleRead:
+            if self.moving:
+                print("Safety loop: command block stuck mid-write, stopping motors.")
+            self._drive("stop", 0)
+            self.mode, self.moving = "stopped", False
+            return None
+
+    def _apply_command(self):
+        command = self._read_command()
+        if command is None:
+            return
+        seq, (mode_index, duty, linear, turn, submitted_at) = command
+        if seq == self.applied_seq:
+            return
+        self.applied_seq = seq
+        self.duties = (linear, turn)
+        mode = DRIVE_MODES[mode_index]
+        self._drive(mode, duty)
+        self.last_command_ms = (time.monotonic() - submitted_at) * 1000
+        self.mode = "stopped" if mode == "stop" else mode
+        self.moving = mode != "stop"
+
+    def _publish(self):
+        r = self.reading
+        self.link.state_block.write(
+            STATE_MODES.index(self.mode), self.moving, r.left_ir, r.right_ir, r.front, r.left, r.right,
+            self.loops, self.stops, self.events, self.last_stop_ms, self.worst_stop_ms, self.worst_loop_ms,
+            self.last_command_ms, time.monotonic(), self.applied_seq, os.getpid())
+
+    def _step(self):
+        """One loop iteration. Returns True if it ran an avoid maneuver (which sleeps on purpose)."""
+        self._apply_command()
+        if not self.moving:
+            return False
+        read_start = time.monotonic()
+        self.reading = self.hw.read_sensors()
+        action = decide(self.reading, self.config)
+        if action == STOP:
+            seen = self.hw.obstacle_since() or read_start
+            self._drive("stop", 0)
+            self.last_stop_ms = (time.monotonic() - seen) * 1000
+            self.worst_stop_ms = max(self.worst_stop_ms, self.last_stop_ms)
+            self.stops += 1
+            self.events += 1
+            self.mode, self.moving = "auto_stop", False
+        elif action in (AVOID_LEFT, AVOID_RIGHT):
+            self.events += 1
+            self.mode = action
+            self._publish()
+            linear, turn = self.duties
+            for delay, command in plan(action, self.config):
+                if delay:
+                    time.sleep(delay)
+                self._drive(command, turn if command in ("left", "right") else linear)
+            self.mode = "forward"
+            return True
+        return False
+
+    def _idle_until(self, deadline):
+        # Apply manual commands as they arrive instead of once per sensor poll
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return
+            time.sleep(min(COMMAND_POLL_S, remaining))
+            command = self._read_command()
+            if command is None:
+                self._publish()
+            elif command[0] != self.applied_seq:
+                self._apply_command()
+                self._publish()
+
+    def run(self, parent_pid=None):
+        next_tick = time.monotonic()
+        while self.running:
+            if parent_pid is not None and os.getppid() != parent_pid:
+                print("Safety loop: web process is gone, stopping motors.")
+                break
+            maneuver = self._step()
+            self.loops += 1
+            self._publish()
+            next_tick += self.config.poll_s
+            now = time.monotonic()
+            if now > next_tick:
+                # Overran (slow echo or preempted; avoid maneuvers sleep on purpose): don't try to catch up
+                if not maneuver:
+                    self.worst_loop_ms = max(self.worst_loop_ms, (now - next_tick) * 1000)
+                next_tick = now
+            else:
+                self._idle_until(next_tick)
+        self._drive("stop", 0)
+        self.mode, self.moving = "stopped", False
+        self._publish()
+
+
+def start_safety_process(link, priority=0, cpu=None, config=AvoidanceConfig(), fake=False):
+    """Starts this file as a fresh interpreter (nothing inherited from the web process)."""
+    args = [sys.executable, os.path.abspath(__file__), "--shm", link.name, "--parent", str(os.getpid()),
+            "--priority", str(priority), "--avoid-distance", str(config.avoid_distance_cm),
+            "--poll-s", str(config.poll_s)]
+    if cpu is not None:
+        args += ["--cpu", str(cpu)]
+    if fake:
+        args.append("--fake")
+    return subprocess.Popen(args)
+
+
+# --- Stop latency measurement ---
+def _gil_load(stop_event):
+    # Pure-Python work standing in for Flask request handling, pandas and sklearn glue code
+    data = list(range(2000))
+    while not stop_event.is_set():
+        sum(x * x for x in data)
+        sorted(data, reverse=True)
+
+
+def _drive_until(link, duration_s):
+    """Keeps re-issuing forward after every stop; returns the per-stop latencies (ms)."""
+    latencies = []
+    seen_stops = 0
+    end = time.monotonic() + duration_s
+    link.submit("forward", 50)
+    while time.monotonic() < end:
+        state = link.state()
+        if state["stops"] != seen_stops:
+            seen_stops = state["stops"]
+            latencies.append(state["last_stop_ms"])
+            link.submit("forward", 50)
+        time.sleep(0.005)
+    link.submit("stop")
+    return latencies
+
+
+def _report(title, latencies):
+    latencies = sorted(latencies)
+    if not latencies:
+        print(f"{title}: no stops recorded")
+        return
+    pick = lambda f: latencies[min(len(latencies) - 1, int(f * len(latencies)))]
+    print(f"{title}: {len(latencies)} stops | p50 {pick(0.5):.1f} ms | p99 {pick(0.99):.1f} ms | "
+          f"worst {latencies[-1]:.1f} ms")
+
+
+def measure(duration_s, load_threads, priority=0, cpu=None, config=AvoidanceConfig()):
+    stop_load = threading.Event()
+    loaders = [threading.Thread(target=_gil_load, args=(stop_load,), daemon=True) for _ in range(load_threads)]
+    for loader in loaders:
+        loader.start()
+    print(f"Obstacle every 0.2-0.8 s while driving, poll {config.poll_s * 1000:.0f} ms, "
+          f"{load_threads} GIL-bound load threads in the web process")
+    try:
+        # Before: the loop as a thread of the busy interpreter
+        link = SafetyLink.create()
+        loop = SafetyLoop(link, FakeHardware(), config)
+        thread = threading.Thread(target=loop.run, daemon=True)
+        thread.start()
+        _report("thread in web process ", _drive_until(link, duration_s))
+        loop.running = False
+        thread.join()
+        link.close()
+
+        # After: separate process
+        link = SafetyLink.create()
+        process = start_safety_process(link, priority, cpu, config, fake=True)
+        try:
+            _report("separate safety process", _drive_until(link, duration_s))
+        finally:
+            process.terminate()
+            process.wait()
+            link.close()
+    finally:
+        stop_load.set()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--shm", help="Shared memory block created by the web process")
+    parser.add_argument("--parent", type=int, help="Exit (motors stopped) when this process goes away")
+    parser.add_argument("--priority", type=int, default=0, help="SCHED_FIFO priority (1-99), 0 = normal")
+    parser.add_argument("--cpu", type=int, help="Pin the loop to this CPU")
+    parser.add_argument("--avoid-distance", type=float, default=AvoidanceConfig().avoid_distance_cm)
+    parser.add_argument("--poll-s", type=float, default=AvoidanceConfig().poll_s)
+    parser.add_argument("--fake", action="store_true", help="Simulated sensors/motors instead of GPIO")
+    parser.add_argument("--measure", type=float, metavar="SECONDS",
+                        help="Compare stop latency: loop thread in a loaded process vs this process")
+    parser.add_argument("--load-threads", type=int, default=4)
+    args = parser.parse_args()
+    config = AvoidanceConfig(avoid_distance_cm=args.avoid_distance, poll_s=args.poll_s)
+
+    if args.measure:
+        measure(args.measure, args.load_threads, args.priority, args.cpu, config)
+        return
+    if not args.shm:
+        parser.error("--shm is required (or use --measure)")
+
+    applied = set_realtime(args.priority, args.cpu)
+    gc.disable()  # The loop allocates no reference cycles; avoid collector pauses
+    link = SafetyLink.attach(args.shm)
+    hardware = FakeHardware() if args.fake else GPIOHardware()
+    loop = SafetyLoop(link, hardware, config)
+    # terminate() from the web process: leave the loop normally so the motors are stopped
+    signal.signal(signal.SIGTERM, lambda signum, frame: setattr(loop, "running", False))
+    print(f"Safety loop running (pid {os.getpid()}, SCHED_FIFO: {applied['sched_fifo']}, CPU: {applied['cpu']}).")
+    try:
+        loop.run(parent_pid=args.parent)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        hardware.close()
+        link.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,190 @@
+"""Two-stage seizure detector: a cheap first stage clears obvious negatives, the full model sees the rest.
+
+Stage 1 looks at two numbers per window, line length and standard deviation. A seizure
+raises both. It is either a pair of thresholds set just below the quietest seizure in
+the training data, or a depth-2 tree on the same two features. Windows it cannot clear
+go to the full model. A Cascade is pickled with joblib like any other model, so the
+inference process (eeg_shm.py) and `Eplipsy.py score` load it in place of the decision tree:
+
+    python seizure_cascade.py build --stage1 threshold --out cascade.joblib
+    python seizure_cascade.py bench --cascade cascade.joblib --minutes 30
+"""
+import argparse
+import time
+
+import joblib
+import numpy as np
+
+DATA_PATH = '/home/naveen/Desktop/Final/project/Seizure_detection.xlsx'
+MODEL_PATH = '/home/naveen/Desktop/LED/decision_tree_model.joblib'
+CASCADE_PATH = '/home/naveen/Desktop/LED/seizure_cascade.joblib'
+
+
+def window_features(X):
+    """(n, samples) -> (n, 2) float32: mean absolute first difference (line length) and std."""
+    X = np.asarray(X, dtype=np.float32)
+    line_length = np.abs(np.diff(X, axis=1)).mean(axis=1)
+    return np.stack([line_length, X.std(axis=1)], axis=1)
+
+
+class ThresholdStage:
+    """Uncertain if any feature reaches `margin` x its smallest value over the training seizures."""
+
+    def __init__(self, margin=0.8):
+        self.margin = margin
+        self.thresholds = None
+
+    def fit(self, X, y):
+        self.thresholds = window_features(X[y == 1]).min(axis=0) * self.margin
+        return self
+
+    def uncertain(self, X):
+        return (window_features(X) >= self.thresholds).any(axis=1)
+
+
+class TreeStage:
+    """Depth-2 tree on the window features; uncertain unless P(seizure) < clear_below."""
+
+    def __init__(self, max_depth=2, clear_below=0.05):
+        self.max_depth = max_depth
+        self.clear_below = clear_below
+        self.tree = None
+
+    def fit(self, X, y):
+        from sklearn.tree import DecisionTreeClassifier
+        self.tree = DecisionTreeClassifier(max_depth=self.max_depth, class_weight="balanced", random_state=0)
+        self.tree.fit(window_features(X), y)
+        return self
+
+    def uncertain(self, X):
+        proba = self.tree.predict_proba(window_features(X))[:, list(self.tree.classes_).index(1)]
+        return proba >= self.clear_below
+
+
+STAGES = {"threshold": ThresholdStage, "tree": TreeStage}
+
+
+class Cascade:
+    """sklearn-style classifier: predict()/predict_proba() with an early exit for cleared windows.
+
+    Cleared windows are reported as class 0 with probability 1. stats() gives the stage-1
+    pass rate and the average time per window since the last reset_stats().
+    """
+
+    def __init__(self, stage1, full_model):
+        self.stage1 = stage1
+        self.full = full_model
+        self.classes_ = full_model.classes_
+        self.n_features_in_ = getattr(full_model, "n_features_in_", None)
+        self._negative = list(self.classes_).index(0)
+        self.reset_stats()
+
+    def reset_stats(self):
+        self.windows = 0
+        self.passed = 0
+        self.stage1_s = 0.0
+        self.stage2_s = 0.0
+
+    def predict_proba(self, X):
+        X = np.asarray(X, dtype=np.float32)
+        t0 = time.perf_counter()
+        uncertain = self.stage1.uncertain(X)
+        t1 = time.perf_counter()
+        proba = np.zeros((len(X), len(self.classes_)))
+        proba[~uncertain, self._negative] = 1.0
+        if uncertain.any():
+            proba[uncertain] = self.full.predict_proba(X[uncertain])
+        self.stage1_s += t1 - t0
+        self.stage2_s += time.perf_counter() - t1
+        self.windows += len(X)
+        self.passed += int(uncertain.sum())
+        return proba
+
+    def predict(self, X):
+        return self.classes_[np.argmax(self.predict_proba(X), axis=1)]
+
+    def stats(self):
+        windows = max(self.windows, 1)
+        return {"windows": self.windows, "pass_rate": round(self.passed / windows, 4),
+                "ms_per_window": round(1000 * (self.stage1_s + self.stage2_s) / windows, 4),
+                "stage1_ms_per_window": round(1000 * self.stage1_s / windows, 4),
+                "stage2_ms_per_passed": round(1000 * self.stage2_s / max(self.passed, 1), 4)}
+
+
+# --- Build / benchmark ---
+def build(full_model_path=MODEL_PATH, data_path=DATA_PATH, stage1="threshold", out=CASCADE_PATH):
+    from train_model import load_dataset
+    X, y = load_dataset(data_path)
+    full = joblib.load(full_model_path)
+    cascade = Cascade(STAGES[stage1]().fit(X, y), full)
+    predictions = cascade.predict(X)
+    full_predictions = full.predict(X)
+    print(f"{stage1} stage 1 on {len(X)} recordings: pass rate {cascade.stats()['pass_rate']:.2f}, "
+          f"seizures passed {int(cascade.stage1.uncertain(X[y == 1]).sum())}/{int((y == 1).sum())}")
+    print(f"accuracy: full {np.mean(full_predictions == y):.3f}, cascade {np.mean(predictions == y):.3f}, "
+          f"agreement {np.mean(predictions == full_predictions):.3f}")
+    cascade.reset_stats()
+    joblib.dump(cascade, out)
+    print(f"Cascade saved to {out}")
+    return cascade
+
+
+def _time_per_window(model, windows):
+    """Seconds per window when predicting one window at a time, as the inference process does."""
+    t0 = time.perf_counter()
+    predictions = [model.predict(window.reshape(1, -1))[0] for window in windows]
+    return (time.perf_counter() - t0) / len(windows), np.array(predictions)
+
+
+def _report(label, cascade, windows):
+    cascade.reset_stats()
+    full_s, full_predictions = _time_per_window(cascade.full, windows)
+    cascade_s, predictions = _time_per_window(cascade, windows)
+    print(f"{label}: {len(windows)} windows | full {1000 * full_s:.3f} ms/window | cascade "
+          f"{1000 * cascade_s:.3f} ms/window ({full_s / cascade_s:.1f}x throughput) | "
+          f"agreement {np.mean(predictions == full_predictions):.3f} | {cascade.stats()}")
+
+
+def benchmark(cascade_path=CASCADE_PATH, data_path=DATA_PATH, minutes=30.0, burst_every_s=300.0,
+              burst_s=15.0, hop=1000):
+    """Cascade vs full model on the dataset recordings and on a synthetic continuous stream."""
+    from eeg_recording import load_feature_matrix
+    from eeg_synth import SynthEEG
+    cascade = joblib.load(cascade_path)
+    _report("dataset", cascade, load_feature_matrix(data_path).values)
+
+    size = cascade.n_features_in_
+    synth = SynthEEG()
+    synth.schedule(burst_every_s, burst_s, minutes * 60)
+    signal = synth.block(int(minutes * 60 * synth.sample_rate))[:, 0]
+    windows = np.lib.stride_tricks.sliding_window_view(signal, size)[::hop]
+    _report(f"synthetic {minutes:g} min, {len(synth.bursts)} bursts", cascade, windows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    sub = parser.add_subparsers(dest="command", required=True)
+    b = sub.add_parser("build", help="Fit stage 1 on the dataset and save the cascade")
+    b.add_argument("--full", default=MODEL_PATH, help="Full model (joblib)")
+    b.add_argument("--data", default=DATA_PATH)
+    b.add_argument("--stage1", choices=sorted(STAGES), default="threshold")
+    b.add_argument("--out", default=CASCADE_PATH)
+    bench = sub.add_parser("bench", help="Pass rate and per-window latency vs the full model alone")
+    bench.add_argument("--cascade", default=CASCADE_PATH)
+    bench.add_argument("--data", default=DATA_PATH)
+    bench.add_argument("--minutes", type=float, default=30.0, help="Synthetic stream length")
+    bench.add_argument("--burst-every", type=float, default=300.0)
+    bench.add_argument("--hop", type=int, default=1000)
+    args = parser.parse_args()
+
+    if args.command == "build":
+        build(args.full, args.data, args.stage1, args.out)
+    else:
+        benchmark(args.cascade, args.data, args.minutes, args.burst_every, hop=args.hop)
+
+
+if __name__ == "__main__":
+    # Run main() from the importable module, not from __main__: otherwise the classes are
+    # pickled as __main__.Cascade and no other interpreter (eeg_shm.py infer, Eplipsy.py) can load them
+    import seizure_cascade
+    seizure_cascade.main()
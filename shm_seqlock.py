@@ -0,0 +1,60 @@
+import struct
+import time
+from multiprocessing import resource_tracker, shared_memory
+
+_HEADER = struct.Struct("<Q")  # Sequence counter: odd while a write is in progress
+HEADER_SIZE = _HEADER.size
+READ_TIMEOUT_S = 0.005  # Writes take microseconds; longer means the writer died mid-write
+
+
+class StaleRead(Exception):
+    """The block stayed mid-write for longer than the read timeout."""
+
+
+def attach_shared_memory(name):
+    """Attaches to a block created by another process without taking ownership of it."""
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)  # Python 3.13+
+    except TypeError:
+        shm = shared_memory.SharedMemory(name=name)
+        # Otherwise this process's resource tracker unlinks the block when it exits
+        resource_tracker.unregister(shm._name, "shared_memory")
+        return shm
+
+
+class SeqlockBlock:
+    """One struct in shared memory with a sequence counter; one writer, any number of readers.
+
+    Readers retry if the counter was odd (write in progress) or changed while they read,
+    so they never see a torn record and never make the writer wait. If that goes on for
+    `timeout_s`, read() raises StaleRead instead of spinning forever.
+    """
+
+    def __init__(self, buf, offset, layout):
+        self.buf = buf
+        self.offset = offset
+        self.layout = layout
+
+    @property
+    def size(self):
+        return HEADER_SIZE + self.layout.size
+
+    def write(self, *values):
+        seq = _HEADER.unpack_from(self.buf, self.offset)[0]
+        _HEADER.pack_into(self.buf, self.offset, seq + 1)
+        self.layout.pack_into(self.buf, self.offset + HEADER_SIZE, *values)
+        _HEADER.pack_into(self.buf, self.offset, seq + 2)
+
+    def read(self, timeout_s=READ_TIMEOUT_S):
+        """Returns (version, values); version 0 means nothing was written yet."""
+        deadline = None
+        while True:
+            before = _HEADER.unpack_from(self.buf, self.offset)[0]
+            if not before & 1:
+                values = self.layout.unpack_from(self.buf, self.offset + HEADER_SIZE)
+                if _HEADER.unpack_from(self.buf, self.offset)[0] == before:
+                    return before // 2, values
+            if deadline is None:
+                deadline = time.monotonic() + timeout_s
+            elif time.monotonic() > deadline:
+                raise StaleRead(f"seqlock at offset {self.offset} stuck at {before}")
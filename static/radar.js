@@ -0,0 +1,83 @@
+// Dependency-free 180° radar plot for the ultrasonic sweep (replaces the Chart.js CDN bundle).
+// Angle 0° is drawn on the left, 180° on the right, distance grows outwards from the bottom centre.
+class RadarPlot {
+    constructor(canvas, maxDistance) {
+        this.canvas = canvas;
+        this.ctx = canvas.getContext('2d');
+        this.maxDistance = maxDistance;
+        this.points = [];
+        this.scanAngle = 90;
+        window.addEventListener('resize', () => this.draw());
+    }
+
+    update(radarData, currentAngle) {
+        this.points = radarData.filter(([angle, distance]) => distance > 0 && distance < this.maxDistance);
+        this.scanAngle = currentAngle;
+        this.draw();
+    }
+
+    toCanvas(angle, distance, cx, cy, radius) {
+        const rad = Math.PI * (1 - angle / 180);
+        const r = radius * distance / this.maxDistance;
+        return [cx + r * Math.cos(rad), cy - r * Math.sin(rad)];
+    }
+
+    draw() {
+        const dpr = window.devicePixelRatio || 1;
+        const width = this.canvas.clientWidth;
+        const height = this.canvas.clientHeight;
+        if (!width || !height) return;
+        if (this.canvas.width !== Math.round(width * dpr)) {
+            this.canvas.width = Math.round(width * dpr);
+            this.canvas.height = Math.round(height * dpr);
+        }
+        const ctx = this.ctx;
+        ctx.setTransform(dpr, 0, 0, dpr, 0, 0);
+        ctx.clearRect(0, 0, width, height);
+
+        const cx = width / 2;
+        const cy = height - 4;
+        const radius = Math.min(width / 2, height) - 8;
+
+        // Range rings and 30° angle lines
+        ctx.strokeStyle = 'rgba(0, 255, 0, 0.3)';
+        ctx.lineWidth = 1;
+        for (let i = 1; i <= 4; i++) {
+            ctx.beginPath();
+            ctx.arc(cx, cy, radius * i / 4, Math.PI, 2 * Math.PI);
+            ctx.stroke();
+        }
+        for (let angle = 0; angle <= 180; angle += 30) {
+            const [x, y] = this.toCanvas(angle, this.maxDistance, cx, cy, radius);
+            ctx.beginPath();
+            ctx.moveTo(cx, cy);
+            ctx.lineTo(x, y);
+            ctx.stroke();
+        }
+
+        // Obstacles: red (< 30 cm), orange (< 100 cm), blue (further)
+        this.points.forEach(([angle, distance]) => {
+            const [x, y] = this.toCanvas(angle, distance, cx, cy, radius);
+            ctx.fillStyle = distance < 30 ? 'rgba(255, 0, 0, 0.8)'
+                          : distance < 100 ? 'rgba(255, 165, 0, 0.8)'
+                          : 'rgba(0, 200, 255, 0.8)';
+            ctx.beginPath();
+            ctx.arc(x, y, 6, 0, 2 * Math.PI);
+            ctx.fill();
+            ctx.strokeStyle = 'white';
+            ctx.stroke();
+        });
+
+        // Scanning line
+        const [sx, sy] = this.toCanvas(this.scanAngle, this.maxDistance, cx, cy, radius);
+        ctx.save();
+        ctx.strokeStyle = 'rgba(0, 255, 0, 0.8)';
+        ctx.lineWidth = 2;
+        ctx.setLineDash([5, 5]);
+        ctx.beginPath();
+        ctx.moveTo(cx, cy);
+        ctx.lineTo(sx, sy);
+        ctx.stroke();
+        ctx.restore();
+    }
+}
@@ -0,0 +1,51 @@
+import gzip
+import hashlib
+import mimetypes
+import os
+from collections import namedtuple
+
+from flask import Response, request
+
+# body / gzip_body are built once at startup; version is a short content hash for cache-busting URLs
+Asset = namedtuple("Asset", ["body", "gzip_body", "content_type", "etag", "version"])
+
+IMMUTABLE = "public, max-age=31536000, immutable"  # For versioned URLs (?v=<hash>)
+REVALIDATE = "no-cache"                            # Cached, but checked with If-None-Match each time
+
+
+def build_asset(body, content_type):
+    digest = hashlib.sha1(body).hexdigest()
+    return Asset(body, gzip.compress(body, compresslevel=9, mtime=0), content_type, digest[:16], digest[:8])
+
+
+def load_static_dir(path):
+    """Reads and pre-compresses every file in `path`. Returns {filename: Asset}."""
+    assets = {}
+    if not os.path.isdir(path):
+        print(f"Warning: static directory {path} not found.")
+        return assets
+    for name in sorted(os.listdir(path)):
+        full_path = os.path.join(path, name)
+        if not os.path.isfile(full_path):
+            continue
+        mimetype = mimetypes.guess_type(name)[0] or "application/octet-stream"
+        if mimetype.startswith("text/") or mimetype in ("application/javascript", "image/svg+xml"):
+            mimetype += "; charset=utf-8"
+        with open(full_path, "rb") as f:
+            assets[name] = build_asset(f.read(), mimetype)
+    return assets
+
+
+def asset_response(asset, cache_control=IMMUTABLE):
+    """Serves an Asset with gzip when accepted, a strong ETag and 304 on If-None-Match."""
+    if request.if_none_match.contains(asset.etag):
+        response = Response(status=304)
+    elif "gzip" in request.accept_encodings:
+        response = Response(asset.gzip_body, content_type=asset.content_type)
+        response.headers["Content-Encoding"] = "gzip"
+    else:
+        response = Response(asset.body, content_type=asset.content_type)
+    response.set_etag(asset.etag)
+    response.headers["Cache-Control"] = cache_control
+    response.headers["Vary"] = "Accept-Encoding"
+    return response
@@ -0,0 +1,227 @@
+import argparse
+import glob
+import os
+import queue
+import struct
+import threading
+import time
+
+import numpy as np
+
+# Record kinds: what triggered the record. Every record carries the latest value of
+# every field, so any single row is a complete picture of the robot at that moment.
+SENSORS = 1   # IR + ultrasonic readings
+COMMAND = 2   # Motor pins / PWM duty written by the actuator
+STATE = 3     # RobotState transition (mode, version)
+RADAR = 4     # One radar step (angle, distance)
+SEIZURE = 5   # Seizure model prediction
+
+KIND_NAMES = {SENSORS: "sensors", COMMAND: "command", STATE: "state", RADAR: "radar", SEIZURE: "seizure"}
+
+# One fixed-size little-endian record, no padding. FIELDS/RECORD_DTYPE must match RECORD.
+RECORD = struct.Struct("<dBBBfffBBhfbBI")
+FIELDS = [
+    ("timestamp", "<f8"),     # time.time()
+    ("kind", "u1"),
+    ("ir_left", "u1"),        # 1 = clear, 0 = detected (raw GPIO level)
+    ("ir_right", "u1"),
+    ("us_front", "<f4"),      # cm, 0 = no echo
+    ("us_left", "<f4"),
+    ("us_right", "<f4"),
+    ("motor_pins", "u1"),     # IN1..IN4 packed as bits 0..3
+    ("duty", "u1"),           # PWM duty cycle (both enables)
+    ("radar_angle", "<i2"),
+    ("radar_distance", "<f4"),
+    ("seizure", "i1"),        # -1 = no prediction yet, else the model output
+    ("mode", "u1"),           # Index into MODE_NAMES
+    ("state_version", "<u4"),
+]
+RECORD_DTYPE = np.dtype(FIELDS)
+assert RECORD_DTYPE.itemsize == RECORD.size
+
+# Stored as an index so the record stays fixed-size (order must never change, only append)
+MODE_NAMES = ["stopped", "forward", "backward", "left", "right", "avoid_left", "avoid_right", "auto_stop"]
+
+_INITIAL_VALUES = {
+    "ir_left": 1, "ir_right": 1, "us_front": 0.0, "us_left": 0.0, "us_right": 0.0,
+    "motor_pins": 0, "duty": 0, "radar_angle": 90, "radar_distance": 0.0,
+    "seizure": -1, "mode": 0, "state_version": 0,
+}
+_FIELD_ORDER = [name for name, _ in FIELDS[2:]]
+
+
+def pack_pins(levels):
+    """(IN1, IN2, IN3, IN4) levels -> 4-bit value."""
+    return sum(1 << i for i, level in enumerate(levels) if level)
+
+
+class TelemetryLog:
+    """Append-only binary log written in batches by a background thread.
+
+    record() only puts a small tuple on a queue, so it is safe to call from the control
+    loops; if the writer falls behind the record is dropped and counted, never waited on.
+    Segments are named telemetry_<start>_<n>.bin and rotated at `segment_bytes`.
+    """
+
+    def __init__(self, log_dir, segment_bytes=32 * 1024 * 1024, batch_records=512,
+                 flush_interval_s=1.0, max_pending=20000):
+        self.log_dir = log_dir
+        self.segment_bytes = segment_bytes - segment_bytes % RECORD.size
+        self.batch_records = batch_records
+        self.flush_interval_s = flush_interval_s
+        self._pending = queue.Queue(maxsize=max_pending)
+        self.records_written = 0
+        self.records_dropped = 0
+        self.segments = 0
+        self._file = None
+        self._file_bytes = 0
+        self._session = time.strftime("%Y%m%d-%H%M%S")
+        self._closed = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def record(self, kind, **values):
+        """Logs the changed fields; unchanged fields keep their last logged value."""
+        try:
+            self._pending.put_nowait((time.time(), kind, values))
+        except queue.Full:
+            self.records_dropped += 1
+
+    def stats(self):
+        return {
+            "records_written": self.records_written,
+            "records_dropped": self.records_dropped,
+            "pending": self._pending.qsize(),
+            "segments": self.segments,
+            "segment": self._file.name if self._file else None,
+        }
+
+    def close(self, timeout=5.0):
+        self._closed.set()
+        self._thread.join(timeout)
+
+    def _run(self):
+        current = dict(_INITIAL_VALUES)
+        batch = bytearray()
+        count = 0
+        last_flush = time.monotonic()
+        while True:
+            try:
+                timestamp, kind, values = self._pending.get(timeout=self.flush_interval_s)
+                # Merge into a copy: a value that fails to pack must not stay in `current`
+                merged = {**current, **values}
+                batch += RECORD.pack(timestamp, kind, *[merged[name] for name in _FIELD_ORDER])
+                current = merged
+                count += 1
+            except queue.Empty:
+                pass
+            except struct.error as e:
+                print(f"Telemetry record skipped ({e}): {values}")
+            closing = self._closed.is_set() and self._pending.empty()
+            if count and (count >= self.batch_records or closing
+                          or time.monotonic() - last_flush >= self.flush_interval_s):
+                try:
+                    self._write(batch)
+                    self.records_written += count
+                except OSError as e:
+                    print(f"Telemetry write error: {e}")
+                    self.records_dropped += count
+                batch = bytearray()
+                count = 0
+                last_flush = time.monotonic()
+            if closing:
+                break
+        if self._file:
+            self._file.close()
+
+    def _write(self, data):
+        view = memoryview(data)
+        while view:
+            if self._file is None or self._file_bytes >= self.segment_bytes:
+                self._rotate()
+            room = self.segment_bytes - self._file_bytes
+            chunk = view[:room]
+            self._file.write(chunk)
+            self._file_bytes += len(chunk)
+            view = view[len(chunk):]
+        self._file.flush()
+
+    def _rotate(self):
+        if self._file:
+            self._file.close()
+        os.makedirs(self.log_dir, exist_ok=True)
+        path = os.path.join(self.log_dir, f"telemetry_{self._session}_{self.segments:04d}.bin")
+        self._file = open(path, "ab")
+        self._file_bytes = self._file.tell()
+        self.segments += 1
+
+
+# --- Reading ---
+def read_segment(path):
+    """Memory-maps one segment as a structured array (no copy; a torn last record is ignored)."""
+    count = os.path.getsize(path) // RECORD.size
+    if count == 0:
+        return np.zeros(0, dtype=RECORD_DTYPE)
+    return np.memmap(path, dtype=RECORD_DTYPE, mode="r", shape=(count,))
+
+
+def segment_paths(log_dir):
+    return sorted(glob.glob(os.path.join(log_dir, "telemetry_*.bin")))
+
+
+def read_log(path):
+    """Memory-mapped segments (time order) of one segment file or a log directory.
+
+    Segments are returned separately, never concatenated, so a long log is not copied into RAM.
+    """
+    if os.path.isfile(path):
+        return [read_segment(path)]
+    return [segment for segment in map(read_segment, segment_paths(path)) if len(segment)]
+
+
+def summarize(segments):
+    segments = [segment for segment in segments if len(segment)]
+    if not segments:
+        print("No records.")
+        return
+    total = sum(len(segment) for segment in segments)
+    span = segments[-1]["timestamp"][-1] - segments[0]["timestamp"][0]
+    print(f"{total} records over {span:.1f} s")
+    counts = sum(np.bincount(segment["kind"], minlength=256) for segment in segments)
+    for kind in np.nonzero(counts)[0]:
+        print(f"  {KIND_NAMES.get(int(kind), kind):8s}: {counts[kind]}")
+    for name in ("us_front", "us_left", "us_right"):
+        # Only this one float32 column of the sensor records is gathered
+        columns = [segment[name][(segment["kind"] == SENSORS) & (segment[name] > 0)] for segment in segments]
+        valid = np.concatenate(columns)
+        if len(valid):
+            print(f"  {name}: min {valid.min():.1f} cm | median {np.median(valid):.1f} cm")
+
+
+def benchmark(log_dir, count=1_000_000):
+    log = TelemetryLog(log_dir, max_pending=count + 1)
+    t0 = time.perf_counter()
+    for i in range(count):
+        log.record(SENSORS, us_front=float(i % 400), ir_left=i & 1)
+    enqueue_s = time.perf_counter() - t0
+    log.close(timeout=120)
+    written_s = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    segments = read_log(log_dir)
+    records = sum(len(segment) for segment in segments)
+    front_mean = sum(float(segment["us_front"].sum(dtype=np.float64)) for segment in segments) / max(records, 1)
+    read_s = time.perf_counter() - t0
+    print(f"record(): {enqueue_s / count * 1e6:.2f} us/call | all written after {written_s:.2f} s "
+          f"({log.records_written} records, {log.segments} segments)")
+    print(f"memmap load + column mean of {records} records: {read_s * 1000:.1f} ms (mean {front_mean:.1f})")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Summarize (or benchmark) a telemetry log")
+    parser.add_argument("path", help="Segment file or log directory")
+    parser.add_argument("--bench", type=int, default=0, metavar="N",
+                        help="Write N synthetic records into PATH first and time the round trip")
+    args = parser.parse_args()
+    if args.bench:
+        benchmark(args.path, args.bench)
+    summarize(read_log(args.path))
@@ -0,0 +1,30 @@
+"""Picklable stand-in for the full seizure model, importable from a fresh interpreter."""
+import numpy as np
+
+
+class ConstantModel:
+    """Always 80% seizure; takes 4 features."""
+
+    classes_ = np.array([0, 1])
+    n_features_in_ = 4
+
+    def predict_proba(self, X):
+        return np.tile([0.2, 0.8], (len(X), 1))
+
+    def predict(self, X):
+        return np.ones(len(X), dtype=np.int64)
+
+
+class CountingModel(ConstantModel):
+    """ConstantModel that records which prediction method each call went to."""
+
+    def __init__(self):
+        self.calls = []
+
+    def predict_proba(self, X):
+        self.calls.append("predict_proba")
+        return super().predict_proba(X)
+
+    def predict(self, X):
+        self.calls.append("predict")
+        return super().predict(X)
@@ -0,0 +1,108 @@
+import threading
+import time
+
+import pytest
+
+from actuator import PIN_PATTERNS, Actuator
+
+
+class FakeMotors:
+    """Records every pin/duty write. While `gate` is clear, pin writes block, holding the
+    actuator thread inside its first command so later submissions stay queued."""
+
+    def __init__(self):
+        self.calls = []
+        self.gate = threading.Event()
+        self.busy = threading.Event()
+
+    def write_pins(self, pins):
+        self.busy.set()
+        self.gate.wait(5)
+        self.calls.append(("pins", pins))
+
+    def set_duty(self, duty):
+        self.calls.append(("duty", duty))
+
+
+@pytest.fixture
+def motors():
+    motors = FakeMotors()
+    yield motors
+    motors.gate.set()
+
+
+def _blocked_actuator(motors):
+    actuator = Actuator(motors.write_pins, motors.set_duty)
+    actuator.submit("forward", 30, "test")
+    assert motors.busy.wait(5)  # The actuator thread is now stuck applying "forward"
+    return actuator
+
+
+def _queued(actuator):
+    return [(command.mode, command.duty) for command in actuator._queue]
+
+
+def _drain(actuator, applied):
+    deadline = time.monotonic() + 5
+    while actuator.stats()["applied"] < applied and time.monotonic() < deadline:
+        time.sleep(0.001)
+    assert actuator.stats()["applied"] == applied
+
+
+def test_drive_command_replaces_queued_drive_commands(motors):
+    actuator = _blocked_actuator(motors)
+    actuator.submit("left", 20)
+    actuator.submit("right", 25)
+    actuator.submit("backward", 40)
+    assert _queued(actuator) == [("backward", 40)]
+    assert actuator.stats()["merged"] == 2
+
+    motors.gate.set()
+    _drain(actuator, 2)
+    assert motors.calls == [("duty", 30), ("pins", PIN_PATTERNS["forward"]),
+                            ("duty", 40), ("pins", PIN_PATTERNS["backward"])]
+    assert (actuator.mode, actuator.duty) == ("backward", 40)
+
+
+def test_stop_flushes_the_queue_and_writes_pins_before_duty(motors):
+    actuator = _blocked_actuator(motors)
+    actuator.submit("left", 20)
+    actuator.submit("stop")
+    assert _queued(actuator) == [("stop", 0)]
+
+    motors.gate.set()
+    _drain(actuator, 2)
+    assert motors.calls[2:] == [("pins", PIN_PATTERNS["stop"]), ("duty", 0)]
+    assert (actuator.mode, actuator.duty) == ("stop", 0)
+
+
+def test_speed_folds_into_the_queued_drive_command(motors):
+    actuator = _blocked_actuator(motors)
+    actuator.submit("left", 20)
+    original = actuator._queue[0].timestamp
+    actuator.submit("speed", 60)
+    assert _queued(actuator) == [("left", 60)]
+    assert actuator._queue[0].timestamp == original  # Latency still counts from the drive command
+
+    motors.gate.set()
+    _drain(actuator, 2)
+    assert motors.calls[2:] == [("duty", 60), ("pins", PIN_PATTERNS["left"])]
+
+
+def test_speed_after_a_queued_stop_is_queued_and_ignored_while_stopped(motors):
+    actuator = _blocked_actuator(motors)
+    actuator.submit("stop")
+    actuator.submit("speed", 60)
+    assert _queued(actuator) == [("stop", 0), ("speed", 60)]
+
+    motors.gate.set()
+    _drain(actuator, 3)
+    assert motors.calls[2:] == [("pins", PIN_PATTERNS["stop"]), ("duty", 0)]  # No duty while stopped
+    assert (actuator.mode, actuator.duty) == ("stop", 0)
+
+
+def test_unknown_mode_is_rejected(motors):
+    motors.gate.set()
+    actuator = Actuator(motors.write_pins, motors.set_duty)
+    with pytest.raises(ValueError):
+        actuator.submit("sideways", 10)
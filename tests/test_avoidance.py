@@ -0,0 +1,35 @@
+import pytest
+
+from avoidance import (AVOID_LEFT, AVOID_RIGHT, CONTINUE, IR_DETECTED, STOP, AvoidanceConfig, SensorReading,
+                       decide, plan)
+
+CLEAR = 1  # IR level with nothing in front
+
+
+@pytest.mark.parametrize("reading, action", [
+    (SensorReading(CLEAR, CLEAR, 100, 100, 100), CONTINUE),
+    (SensorReading(CLEAR, CLEAR, 0, 0, 0), CONTINUE),                # 0 = no echo, not an obstacle
+    (SensorReading(CLEAR, CLEAR, 10, 100, 100), STOP),
+    (SensorReading(IR_DETECTED, IR_DETECTED, 100, 100, 100), STOP),
+    (SensorReading(CLEAR, CLEAR, 10, 10, 10), STOP),                 # Front wins over the sides
+    (SensorReading(CLEAR, CLEAR, 100, 10, 100), AVOID_RIGHT),
+    (SensorReading(IR_DETECTED, CLEAR, 100, 100, 100), AVOID_RIGHT),
+    (SensorReading(CLEAR, CLEAR, 100, 100, 10), AVOID_LEFT),
+    (SensorReading(CLEAR, IR_DETECTED, 100, 100, 100), AVOID_LEFT),
+    (SensorReading(CLEAR, CLEAR, 100, 10, 10), AVOID_RIGHT),         # Left is checked first
+])
+def test_decide(reading, action):
+    assert decide(reading) == action
+
+
+def test_decide_uses_the_configured_distance():
+    reading = SensorReading(CLEAR, CLEAR, 25, 100, 100)
+    assert decide(reading) == CONTINUE
+    assert decide(reading, AvoidanceConfig(avoid_distance_cm=30)) == STOP
+
+
+def test_plan():
+    config = AvoidanceConfig(stop_pause_s=0.1, turn_s=0.4)
+    assert plan(CONTINUE, config) == []
+    assert plan(STOP, config) == [(0.0, "stop")]
+    assert plan(AVOID_LEFT, config) == [(0.0, "stop"), (0.1, "left"), (0.4, "stop"), (0.0, "forward")]
@@ -0,0 +1,61 @@
+import pytest
+
+pytest.importorskip("numpy")
+pytest.importorskip("cv2")
+
+from camera_stream import CameraStream, FakeCapture, open_cameras
+
+
+class BusyPool:
+    """A vision pool whose slots are always taken."""
+    slot_bytes = 1 << 30
+
+    def submit(self, *args, **kwargs):
+        return False
+
+
+def _first_frame(stream, timeout=5.0):
+    seq, jpeg = stream.wait_frame(0, timeout=timeout)
+    assert seq > 0, "no frame published"
+    return jpeg
+
+
+def test_every_fake_camera_streams_on_its_own_thread():
+    streams = {camera_id: CameraStream(capture, name=f"cam{camera_id}")
+               for camera_id, capture in open_cameras(fake_count=2).items()}
+    for stream in streams.values():
+        stream.start()
+    try:
+        for stream in streams.values():
+            assert _first_frame(stream)[:2] == b"\xff\xd8"  # JPEG SOI
+    finally:
+        for stream in streams.values():
+            stream.stop()
+    assert sorted(streams) == [0, 1]
+    assert all(stream.stats()["frames_published"] > 0 for stream in streams.values())
+
+
+def test_preview_is_encoded_only_for_preview_clients():
+    stream = CameraStream(FakeCapture(width=64, height=48, fps=200), preview_width=32)
+    stream.start()
+    try:
+        _first_frame(stream)
+        assert stream.wait_frame(0, profile="preview")[1] is None
+        stream.track_preview_client(+1)
+        seq = stream.seq
+        stream.wait_frame(seq, timeout=5.0)
+        assert stream.wait_frame(0, profile="preview")[1][:2] == b"\xff\xd8"
+    finally:
+        stream.stop()
+
+
+def test_busy_pool_counts_dropped_frames():
+    stream = CameraStream(FakeCapture(width=64, height=48, fps=0, fail_after=10), pool=BusyPool())
+    stream.start()
+    stream._thread.join(timeout=30)
+    stats = stream.stats()
+    assert stats["frames_captured"] == 10
+    assert stats["frames_dropped"] == 10
+    assert stats["frames_published"] == 0
+    assert stats["read_failures"] > 50
+    assert not stats["running"]
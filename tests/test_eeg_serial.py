@@ -0,0 +1,51 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from eeg_serial import FrameDecoder, encode_frames
+
+
+def _samples(frames, channels=2, samples_per_frame=10):
+    return np.arange(frames * samples_per_frame * channels, dtype=np.int16).reshape(-1, channels)
+
+
+def test_decodes_frames_split_across_chunks():
+    samples = _samples(5)
+    data = encode_frames(samples)
+    decoder = FrameDecoder(channels=2)
+    out = np.concatenate([decoder.feed(data[:7]), decoder.feed(data[7:50]), decoder.feed(data[50:])])
+    np.testing.assert_array_equal(out, samples.astype(np.float32))
+    assert decoder.stats() == {"frames_ok": 5, "frames_bad": 0, "frames_missed": 0, "bytes_skipped": 0}
+
+
+def test_resyncs_after_a_corrupted_byte():
+    samples = _samples(5)
+    data = bytearray(encode_frames(samples))
+    size = FrameDecoder(channels=2).frame_size
+    data[2 * size + 5] ^= 0xFF  # A sample byte of frame 2: its checksum no longer matches
+
+    decoder = FrameDecoder(channels=2)
+    out = decoder.feed(bytes(data))
+    expected = np.concatenate([samples[:20], samples[30:]]).astype(np.float32)
+    np.testing.assert_array_equal(out, expected)
+    assert decoder.frames_ok == 4
+    assert decoder.frames_bad == 1
+    assert decoder.frames_missed == 1  # The corrupt frame shows up as a seq gap
+    assert decoder.bytes_skipped == size
+
+
+def test_skips_garbage_before_the_first_sync():
+    samples = _samples(2)
+    decoder = FrameDecoder(channels=2)
+    out = decoder.feed(b"\x00\x11\xa5" + encode_frames(samples))
+    np.testing.assert_array_equal(out, samples.astype(np.float32))
+    assert decoder.bytes_skipped == 3
+
+
+def test_counts_sequence_gaps_across_feeds_and_wraparound():
+    decoder = FrameDecoder(channels=2)
+    decoder.feed(encode_frames(_samples(2), start_seq=0xFFFE))           # seq 65534, 65535
+    decoder.feed(encode_frames(_samples(1), start_seq=0))                # wraps without a gap
+    decoder.feed(encode_frames(_samples(2), start_seq=4))                # 1, 2, 3 missing
+    assert decoder.frames_ok == 5
+    assert decoder.frames_missed == 3
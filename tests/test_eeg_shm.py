@@ -0,0 +1,41 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from eeg_shm import EEGShared
+
+
+@pytest.fixture
+def ring():
+    shared = EEGShared.create(capacity=8, channels=2)
+    yield shared.ring
+    shared.close()
+
+
+def _rows(first, count):
+    return np.arange(first, first + count, dtype=np.float32)[:, None].repeat(2, axis=1)
+
+
+def test_latest_is_contiguous_across_the_wraparound(ring):
+    ring.write(_rows(0, 6))
+    ring.write(_rows(6, 5))  # Wraps: write index 11 with capacity 8
+    end, window = ring.latest(6)
+    assert end == 11
+    np.testing.assert_array_equal(window, _rows(5, 6))
+
+
+def test_oversized_write_keeps_the_last_capacity_samples(ring):
+    ring.write(_rows(0, 20))
+    end, window = ring.latest(8)
+    assert end == 20
+    np.testing.assert_array_equal(window, _rows(12, 8))
+
+
+def test_still_valid_until_the_window_is_overwritten(ring):
+    ring.write(_rows(0, 8))
+    end, _ = ring.latest(6)
+    assert ring.still_valid(end, 6)
+    ring.write(_rows(8, 2))  # Overwrites samples 0 and 1, the window starts at 2
+    assert ring.still_valid(end, 6)
+    ring.write(_rows(10, 1))  # Sample 2 is gone
+    assert not ring.still_valid(end, 6)
@@ -0,0 +1,116 @@
+import asyncio
+import time
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from eeg_serial import encode_frames
+from eeg_shm import EEGShared
+from eeg_tcp import HELLO, IngestServer
+
+
+class FakeShared:
+    """A real sample ring with a status block the test controls (no inference process)."""
+
+    def __init__(self, shared):
+        self.ring = shared.ring
+        self.window_end = 0
+        self.heartbeat = time.monotonic()
+
+    def status(self):
+        return {"heartbeat": self.heartbeat, "window_end": self.window_end}
+
+
+@pytest.fixture
+def shared():
+    shared = EEGShared.create(capacity=2000, channels=1)
+    yield FakeShared(shared)
+    shared.close()
+
+
+def _frames(count, start_seq=0):
+    return encode_frames(np.ones((count * 10, 1), dtype=np.int16), start_seq=start_seq)
+
+
+async def _wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        await asyncio.sleep(0.005)
+
+
+async def _with_server(server, scenario):
+    listener = await asyncio.start_server(server.handle, "127.0.0.1", 0)
+    port = listener.sockets[0].getsockname()[1]
+    try:
+        await scenario(port)
+    finally:
+        listener.close()
+        await listener.wait_closed()
+
+
+def test_bad_hello_is_refused(shared):
+    server = IngestServer(shared, max_lag=10_000)
+
+    async def scenario(port):
+        for hello in (b"XYZ\x01", HELLO + b"\x02"):  # Wrong magic, wrong channel count
+            reader, writer = await asyncio.open_connection("127.0.0.1", port)
+            writer.write(hello)
+            assert await asyncio.wait_for(reader.read(), 5) == b""  # Closed by the server
+            writer.close()
+
+    asyncio.run(_with_server(server, scenario))
+    assert server.rejected == 2
+    assert not server.connections and not server.closed
+
+
+def test_second_sender_is_refused_while_one_streams(shared):
+    server = IngestServer(shared, max_lag=10_000)
+
+    async def scenario(port):
+        _, first = await asyncio.open_connection("127.0.0.1", port)
+        first.write(HELLO + b"\x01" + _frames(5))
+        await _wait_for(lambda: server.connections and shared.ring.write_index == 50)
+
+        reader, second = await asyncio.open_connection("127.0.0.1", port)
+        second.write(HELLO + b"\x01")
+        assert await asyncio.wait_for(reader.read(), 5) == b""
+        second.close()
+
+        first.close()
+        await _wait_for(lambda: server.closed)
+
+    asyncio.run(_with_server(server, scenario))
+    assert server.rejected == 1
+    closed = server.stats()["closed"]
+    assert [(c["samples"], c["frames_ok"]) for c in closed] == [(50, 5)]
+    assert closed[0]["samples_per_s"] > 0  # Average over the connection, not the open-connection rate
+
+
+def test_backpressure_pauses_reading_until_inference_catches_up(shared):
+    server = IngestServer(shared, max_lag=100)
+
+    async def scenario(port):
+        _, writer = await asyncio.open_connection("127.0.0.1", port)
+        writer.write(HELLO + b"\x01" + _frames(20))  # 200 samples: past max_lag
+        await writer.drain()
+        await _wait_for(lambda: server.connections and next(iter(server.connections.values()))["pauses"] == 1)
+        await asyncio.sleep(0.05)
+        paused_at = shared.ring.write_index
+        writer.write(_frames(5, start_seq=20))
+        await writer.drain()
+        await asyncio.sleep(0.05)
+        assert shared.ring.write_index == paused_at  # Not read while inference lags
+
+        shared.window_end = shared.ring.write_index  # Inference took a newer window
+        await _wait_for(lambda: shared.ring.write_index == 250)
+        writer.close()
+        await _wait_for(lambda: server.closed)
+
+    asyncio.run(_with_server(server, scenario))
+    closed = server.closed[0]
+    assert closed["pauses"] == 1
+    assert closed["paused_s"] >= 0.1
+    assert closed["max_lag_samples"] >= 100
+    assert closed["frames_missed"] == 0
@@ -0,0 +1,22 @@
+import json
+
+import pytest
+
+np = pytest.importorskip("numpy")
+joblib = pytest.importorskip("joblib")
+
+import Eplipsy
+from cascade_models import CountingModel
+
+
+def test_score_calls_the_model_once_per_chunk(tmp_path):
+    np.save(tmp_path / "rec.npy", np.zeros((4, 5), dtype=np.float32))
+    (tmp_path / "rec.npy.json").write_text(json.dumps({"columns": list("abcde")}))
+    joblib.dump(CountingModel(), tmp_path / "model.joblib")
+
+    summary = Eplipsy.score(str(tmp_path / "rec.npy"), str(tmp_path / "model.joblib"), chunk=2, workers=1)
+    assert Eplipsy._worker["model"].calls == ["predict_proba"] * 3  # 5 columns in chunks of 2
+    scores = np.load(tmp_path / "rec.scores.npy")
+    assert scores["prediction"].tolist() == [1] * 5
+    assert np.allclose(scores["probability"], 0.8)
+    assert summary["positive"] == 5
@@ -0,0 +1,84 @@
+import glob
+import os
+import threading
+import time
+
+from frame_ring import ClipWriter, FrameRing, read_clip
+
+
+def _wait_for_clips(clip_dir, count, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while len(glob.glob(os.path.join(clip_dir, "*.idx"))) < count:
+        assert time.monotonic() < deadline, "clip not written"
+        time.sleep(0.01)
+    return sorted(glob.glob(os.path.join(clip_dir, "*.mjpeg")))
+
+
+def test_ring_is_bounded_by_bytes():
+    ring = FrameRing(max_bytes=10, max_age_s=60)
+    for i in range(6):
+        ring.push(bytes([i]) * 3, timestamp=100.0 + i)
+    assert [jpeg[0] for _, jpeg in ring.snapshot()] == [3, 4, 5]  # 9 bytes; a 4th frame would be 12
+    assert ring.stats() == {"frames": 3, "bytes": 9, "seconds": 2.0}
+
+
+def test_ring_is_bounded_by_age():
+    ring = FrameRing(max_bytes=1 << 20, max_age_s=2.0)
+    for t in (100.0, 101.0, 102.5, 103.0):
+        ring.push(b"x", timestamp=t)
+    assert [t for t, _ in ring.snapshot()] == [101.0, 102.5, 103.0]
+
+
+def test_clip_round_trip(tmp_path):
+    ring = FrameRing()
+    frames = [(1000.0 + i / 10, b"\xff\xd8" + bytes([i]) * (i + 1) + b"\xff\xd9") for i in range(5)]
+    for timestamp, jpeg in frames:
+        ring.push(jpeg, timestamp)
+    writer = ClipWriter(ring, str(tmp_path), name="cam1")
+    assert writer.dump("auto_stop")
+
+    [clip] = _wait_for_clips(str(tmp_path), 1)
+    assert os.path.basename(clip).startswith("clip_cam1_") and clip.endswith("_auto_stop.mjpeg")
+    assert list(read_clip(clip)) == frames
+    with open(clip, "rb") as f:
+        assert f.read() == b"".join(jpeg for _, jpeg in frames)  # Plain concatenated MJPEG
+    assert not glob.glob(os.path.join(str(tmp_path), "*.tmp"))
+
+
+def test_dump_is_rate_limited_per_reason(tmp_path):
+    ring = FrameRing()
+    ring.push(b"frame")
+    writer = ClipWriter(ring, str(tmp_path), min_interval_s=60)
+    assert writer.dump("auto_stop")
+    assert not writer.dump("auto_stop")
+    assert writer.dump("seizure")  # Other reasons have their own limit
+    _wait_for_clips(str(tmp_path), 2)
+
+
+def test_concurrent_dumps_pass_the_rate_limit_once(tmp_path):
+    ring = FrameRing()
+    ring.push(b"frame")
+    writer = ClipWriter(ring, str(tmp_path), min_interval_s=60, max_pending=64)
+    start = threading.Barrier(16)
+    results = []
+
+    def trigger():
+        start.wait()
+        results.append(writer.dump("auto_stop"))
+
+    threads = [threading.Thread(target=trigger) for _ in range(16)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert results.count(True) == 1
+    _wait_for_clips(str(tmp_path), 1)
+
+
+def test_empty_ring_dumps_nothing_and_keeps_the_rate_limit_free(tmp_path):
+    ring = FrameRing()
+    writer = ClipWriter(ring, str(tmp_path), min_interval_s=60)
+    assert not writer.dump("auto_stop")
+    ring.push(b"frame")
+    assert writer.dump("auto_stop")
+    _wait_for_clips(str(tmp_path), 1)
@@ -0,0 +1,48 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from lane_detect import LaneDetector, SteeringController, run_on_directory
+
+
+def _lane_frame(centre, width=320, height=240, line_width=6, lane_width=140):
+    """Dark floor with two white tape lines either side of `centre` (column at the bottom)."""
+    frame = np.full((height, width, 3), 40, dtype=np.uint8)
+    for x in (centre - lane_width // 2, centre + lane_width // 2):
+        frame[:, x - line_width // 2:x + line_width // 2] = 230
+    return frame
+
+
+def test_centred_lane_has_no_offset():
+    lane = LaneDetector().detect(_lane_frame(160))
+    assert abs(lane.offset) < 0.05
+    assert abs(lane.heading) < 0.05
+    assert set(lane.timings) == {"crop", "gray", "threshold", "fit"}
+
+
+def test_offset_sign_follows_the_lane():
+    detector = LaneDetector()
+    assert detector.detect(_lane_frame(200)).offset > 0.1
+    assert detector.detect(_lane_frame(120)).offset < -0.1
+
+
+def test_blank_frame_has_no_lane():
+    assert LaneDetector().detect(np.full((240, 320, 3), 40, dtype=np.uint8)) is None
+
+
+def test_steering_turns_towards_the_lane():
+    left, right = SteeringController(base_duty=25).update(0.5, 0.0, now=0.0)
+    assert left > 25 > right
+
+
+def test_run_on_directory_of_recorded_frames(tmp_path):
+    for i, centre in enumerate([160, 200, 120]):
+        np.save(tmp_path / f"{i:03d}.npy", _lane_frame(centre))
+    np.save(tmp_path / "003.npy", np.full((240, 320, 3), 40, dtype=np.uint8))
+
+    detector = LaneDetector()
+    results = run_on_directory(str(tmp_path), detector, verbose=False)
+    assert [name for name, *_ in results] == ["000.npy", "001.npy", "002.npy", "003.npy"]
+    assert results[1][1] > 0 > results[2][1]
+    assert results[3][1] is None and results[3][3] == (0.0, 0.0)
+    assert set(detector.timer.summary()) == {"crop", "gray", "threshold", "fit"}
@@ -0,0 +1,60 @@
+import time
+
+from robot_log import RobotLog
+
+
+def _log(**kwargs):
+    kwargs.setdefault("echo", False)
+    return RobotLog(**kwargs)
+
+
+def test_repeats_are_suppressed_and_reported_with_the_next_line():
+    log = _log(min_repeat_s=0.05, max_per_s=1000)
+    assert log.info("Obstacle", key="obstacle")
+    assert not log.info("Obstacle", key="obstacle")
+    assert not log.warning("Obstacle again", key="obstacle")  # Same key, different text
+    assert log.stats()["suppressed"] == 2
+
+    time.sleep(0.06)  # Repeat window over
+    assert log.info("Obstacle", key="obstacle")
+    log.flush()
+    entries = log.recent()
+    assert [(e["message"], e["repeats"]) for e in entries] == [("Obstacle", 0), ("Obstacle", 2)]
+
+
+def test_dedup_tables_are_bounded_by_max_keys():
+    log = _log(min_repeat_s=0.05, max_per_s=100000, max_keys=10)
+    for i in range(200):
+        log.info(f"distance {i} cm")
+    time.sleep(0.06)
+    log.info("after the window")
+    assert list(log._last_logged) == ["after the window"]
+    assert not log._suppressed
+
+
+def test_expired_keys_keep_no_suppressed_count():
+    log = _log(min_repeat_s=0.05, max_per_s=100000, max_keys=1)
+    log.info("a")
+    log.info("a")  # Suppressed once
+    time.sleep(0.06)
+    log.info("b")  # Over max_keys: "a" has expired and is forgotten with its count
+    assert "a" not in log._last_logged and "a" not in log._suppressed
+
+
+def test_token_bucket_drops_over_the_rate():
+    log = _log(min_repeat_s=0.0, max_per_s=5)
+    accepted = [log.info(f"line {i}") for i in range(20)]
+    assert accepted[:5] == [True] * 5
+    assert accepted.count(True) < 10
+    assert log.stats()["dropped"] == accepted.count(False)
+
+
+def test_recent_limits():
+    log = _log(min_repeat_s=0.0, max_per_s=1000)
+    for i in range(5):
+        log.info(f"line {i}")
+    log.flush()
+    assert log.recent(limit=0) == []
+    assert log.recent(limit=-1) == []
+    assert [e["message"] for e in log.recent(limit=2)] == ["line 3", "line 4"]
+    assert [e["seq"] for e in log.recent(since=3)] == [4, 5]
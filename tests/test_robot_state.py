@@ -0,0 +1,65 @@
+import threading
+
+from robot_state import MotionMode, RadarSweep, RobotState, Snapshot, StateStore
+
+
+def test_version_bumps_only_on_real_changes():
+    store = StateStore(RobotState())
+    seen = []
+    store.add_listener(seen.append)
+
+    state = store.update(mode=MotionMode.FORWARD, is_moving=True)
+    assert state.version == 1 and state.is_moving
+    assert store.update(mode=MotionMode.FORWARD, is_moving=True) is state  # Same values: no new version
+    assert store.update_with(lambda s: None) is state
+    assert store.update(linear_speed=40).version == 2
+    assert [s.version for s in seen] == [1, 2]
+
+
+def test_wait_for_change():
+    store = StateStore(RobotState())
+    assert store.wait_for_change(0, timeout=0.01).version == 0  # Times out unchanged
+    timer = threading.Timer(0.05, lambda: store.update(seizure_detected=True))
+    timer.start()
+    state = store.wait_for_change(0, timeout=5)
+    timer.join()
+    assert state.version == 1 and state.seizure_detected
+
+
+def test_update_with_is_atomic():
+    store = StateStore(RobotState())
+
+    def toggle_many():
+        for _ in range(1000):
+            store.update_with(lambda s: {"test_row_index": s.test_row_index + 1})
+
+    threads = [threading.Thread(target=toggle_many) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert store.get().test_row_index == 4000
+    assert store.version == 4000
+
+
+def test_snapshot_update():
+    sweep = Snapshot(RadarSweep())
+    sweep.update(lambda current: RadarSweep(45, current.points))
+    sweep.set(RadarSweep(90, ((90, 12.5),)))
+    assert sweep.get() == RadarSweep(90, ((90, 12.5),))
+    assert sweep.seq == 2
+
+
+def test_failing_listener_does_not_reach_the_publisher(capsys):
+    store = StateStore(RobotState())
+    seen = []
+
+    def broken(state):
+        raise RuntimeError("Event loop is closed")
+
+    store.add_listener(broken)
+    store.add_listener(seen.append)
+    state = store.update(is_moving=True)
+    assert state.version == 1 and store.get() is state
+    assert seen == [state]  # Later listeners still run
+    assert "Event loop is closed" in capsys.readouterr().err
@@ -0,0 +1,46 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+np = pytest.importorskip("numpy")
+joblib = pytest.importorskip("joblib")
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TESTS = os.path.dirname(os.path.abspath(__file__))
+
+
+def _run(args, cwd):
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join([REPO, TESTS]))
+    return subprocess.run([sys.executable] + args, cwd=cwd, env=env, capture_output=True, text=True, check=True)
+
+
+def test_cascade_built_by_the_cli_loads_in_a_fresh_interpreter(tmp_path):
+    from cascade_models import ConstantModel
+
+    # 6 recordings x 4 samples, sample-major as eeg_recording stores them; the last 3 are seizures
+    quiet = np.zeros((3, 4), dtype=np.float32)
+    seizure = np.array([[0, 50, -50, 50]] * 3, dtype=np.float32)
+    np.save(tmp_path / "rec.npy", np.concatenate([quiet, seizure]).T.copy())
+    (tmp_path / "rec.npy.json").write_text(json.dumps({"columns": list("abcdef"), "labels": [0, 0, 0, 1, 1, 1]}))
+    joblib.dump(ConstantModel(), tmp_path / "full.joblib")
+
+    _run([os.path.join(REPO, "seizure_cascade.py"), "build", "--full", "full.joblib", "--data", "rec.npy",
+          "--out", "cascade.joblib"], tmp_path)
+    out = _run(["-c", "import joblib, numpy as np\n"
+                      "c = joblib.load('cascade.joblib')\n"
+                      "print(type(c).__module__, c.predict(np.zeros((1, 4)))[0], c.predict(np.array([[0, 50, -50, 50]]))[0])"],
+               tmp_path).stdout.split()
+    assert out == ["seizure_cascade", "0", "1"]
+
+
+def test_threshold_stage_clears_quiet_windows_only():
+    from cascade_models import ConstantModel
+    from seizure_cascade import Cascade, ThresholdStage
+
+    X = np.array([[0, 0, 0, 0], [0, 50, -50, 50]], dtype=np.float32)
+    cascade = Cascade(ThresholdStage().fit(X, np.array([0, 1])), ConstantModel())
+    assert cascade.predict(X).tolist() == [0, 1]
+    assert cascade.stats()["pass_rate"] == 0.5
@@ -0,0 +1,26 @@
+import struct
+
+import pytest
+
+from shm_seqlock import HEADER_SIZE, SeqlockBlock, StaleRead
+
+LAYOUT = struct.Struct("<Idf")
+
+
+def test_round_trip():
+    block = SeqlockBlock(bytearray(64), 8, LAYOUT)
+    assert block.read() == (0, (0, 0.0, 0.0))  # Nothing written yet
+    block.write(7, 1.5, 0.25)
+    assert block.read() == (1, (7, 1.5, 0.25))
+    block.write(8, -2.0, 0.5)
+    assert block.read() == (2, (8, -2.0, 0.5))
+    assert block.size == HEADER_SIZE + LAYOUT.size
+
+
+def test_read_of_a_block_stuck_mid_write_raises_stale_read():
+    buf = bytearray(64)
+    block = SeqlockBlock(buf, 0, LAYOUT)
+    block.write(1, 1.0, 1.0)
+    struct.pack_into("<Q", buf, 0, 3)  # Odd counter: a writer died between its two header stores
+    with pytest.raises(StaleRead):
+        block.read(timeout_s=0.01)
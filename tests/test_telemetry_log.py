@@ -0,0 +1,51 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from telemetry_log import COMMAND, RECORD, SENSORS, TelemetryLog, read_log, segment_paths, summarize
+
+
+def _write(log_dir, records, segment_records=3):
+    log = TelemetryLog(str(log_dir), segment_bytes=segment_records * RECORD.size, flush_interval_s=0.05)
+    for kind, values in records:
+        log.record(kind, **values)
+    log.close()
+    return log
+
+
+def test_a_record_that_fails_to_pack_does_not_poison_later_ones(tmp_path, capsys):
+    records = [(SENSORS, {"ir_left": 0, "us_front": float(i)}) for i in range(4)]
+    records.append((SENSORS, {"ir_left": 300, "us_front": 99.0}))  # ir_left is a u1: struct.error
+    records += [(SENSORS, {"us_front": float(i)}) for i in range(4, 8)]
+    records.append((COMMAND, {"motor_pins": 9, "duty": 40}))
+    log = _write(tmp_path, records)
+    assert "Telemetry record skipped" in capsys.readouterr().out
+
+    segments = read_log(str(tmp_path))
+    assert [len(segment) for segment in segments] == [3, 3, 3]  # Rotated every 3 records
+    assert all(isinstance(segment, np.memmap) for segment in segments)
+    assert log.records_written == 9
+
+    front = np.concatenate([segment["us_front"] for segment in segments])
+    ir_left = np.concatenate([segment["ir_left"] for segment in segments])
+    assert front.tolist() == [0, 1, 2, 3, 4, 5, 6, 7, 7]  # 99.0 never reached the log
+    assert ir_left.tolist() == [0] * 9  # The last good value, not the one that failed
+    last = segments[-1][-1]
+    assert (last["kind"], last["motor_pins"], last["duty"]) == (COMMAND, 9, 40)
+
+
+def test_read_log_of_one_segment_file(tmp_path):
+    _write(tmp_path, [(SENSORS, {"us_front": 10.0})] * 5)
+    paths = segment_paths(str(tmp_path))
+    assert len(paths) == 2
+    segments = read_log(paths[1])
+    assert len(segments) == 1 and len(segments[0]) == 2
+
+
+def test_summarize_across_segments(tmp_path, capsys):
+    _write(tmp_path, [(SENSORS, {"us_front": float(d)}) for d in (30, 10, 20, 40)] + [(COMMAND, {"duty": 20})])
+    summarize(read_log(str(tmp_path)))
+    out = capsys.readouterr().out
+    assert out.startswith("5 records over")
+    assert "sensors : 4" in out and "command : 1" in out
+    assert "us_front: min 10.0 cm | median 25.0 cm" in out
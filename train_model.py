@@ -0,0 +1,137 @@
+"""Trains the seizure decision tree that the EEG inference process loads.
+
+Cross-validated grid search over tree depth and leaf size runs across all cores. Every
+candidate is then refitted on the whole dataset and timed the way inference calls it
+(one float32 window per predict). With --min-accuracy the fastest candidate that still
+reaches that CV accuracy is exported; otherwise the most accurate one (the faster one on ties).
+The model is written to TRAINED_PATH, not over the deployed MODEL_PATH; copy it there once
+it has been checked. An existing --out file is kept as <out>.bak:
+
+    python train_model.py                                   # best accuracy
+    python train_model.py --min-accuracy 0.9 --out fast.joblib
+"""
+import argparse
+import io
+import json
+import os
+import shutil
+import time
+
+import joblib
+import numpy as np
+
+from eeg_recording import load_feature_matrix
+
+DATA_PATH = '/home/naveen/Desktop/Final/project/Seizure_detection.xlsx'
+MODEL_PATH = '/home/naveen/Desktop/LED/decision_tree_model.joblib'           # Loaded by the inference process
+TRAINED_PATH = '/home/naveen/Desktop/LED/decision_tree_model_trained.joblib'  # Default export, reviewed before deploying
+
+PARAM_GRID = {
+    "max_depth": [1, 2, 3, 4, 6, 8, None],
+    "min_samples_leaf": [1, 2, 4, 8],
+}
+
+
+def load_dataset(data_path):
+    """(X, y): one row per recording, float32 (what inference feeds the model), integer labels."""
+    features = load_feature_matrix(data_path)
+    if features.labels is None:
+        raise ValueError(f"{data_path} has no label row")
+    return features.values, features.labels.astype(np.int64)
+
+
+def model_size(model):
+    """Bytes of the joblib file the model would be saved as."""
+    buffer = io.BytesIO()
+    joblib.dump(model, buffer)
+    return buffer.tell()
+
+
+def predict_latency_ms(model, X, repeats=200):
+    """Median / p95 latency of predict() on a single (1, n_features) row, as run_inference calls it."""
+    window = np.ascontiguousarray(X[:1])
+    model.predict(window)  # Warm-up
+    times = []
+    for i in range(repeats):
+        window = X[i % len(X)].reshape(1, -1)
+        t0 = time.perf_counter()
+        model.predict(window)
+        times.append((time.perf_counter() - t0) * 1000)
+    return float(np.median(times)), float(np.percentile(times, 95))
+
+
+def search(X, y, folds=5, n_jobs=-1, seed=0):
+    """Grid search in parallel; returns one dict per candidate with accuracy, latency and size."""
+    from sklearn.model_selection import GridSearchCV, StratifiedKFold
+    from sklearn.tree import DecisionTreeClassifier
+
+    # Each class needs a sample in every fold; the shipped dataset only has a handful per class
+    folds = max(2, min(folds, int(np.bincount(y).min())))
+    grid = GridSearchCV(DecisionTreeClassifier(random_state=seed), PARAM_GRID,
+                        cv=StratifiedKFold(folds, shuffle=True, random_state=seed),
+                        scoring="accuracy", n_jobs=n_jobs, refit=False)
+    t0 = time.perf_counter()
+    grid.fit(X, y)
+    print(f"Grid search: {len(grid.cv_results_['params'])} candidates x {folds} folds "
+          f"in {time.perf_counter() - t0:.1f} s")
+
+    candidates = []
+    for params, mean, std in zip(grid.cv_results_["params"], grid.cv_results_["mean_test_score"],
+                                 grid.cv_results_["std_test_score"]):
+        model = DecisionTreeClassifier(random_state=seed, **params).fit(X, y)
+        p50, p95 = predict_latency_ms(model, X)
+        candidates.append({"params": params, "accuracy": round(float(mean), 4), "accuracy_std": round(float(std), 4),
+                           "latency_ms": round(p50, 4), "latency_ms_p95": round(p95, 4),
+                           "size_bytes": model_size(model), "nodes": int(model.tree_.node_count),
+                           "depth": int(model.get_depth()), "model": model})
+    return candidates
+
+
+def choose(candidates, min_accuracy=None):
+    """Fastest candidate meeting min_accuracy, or the most accurate (ties: fastest, then smallest)."""
+    if min_accuracy is not None:
+        eligible = [c for c in candidates if c["accuracy"] >= min_accuracy]
+        if not eligible:
+            best = max(c["accuracy"] for c in candidates)
+            raise ValueError(f"No candidate reaches accuracy {min_accuracy} (best {best})")
+        return min(eligible, key=lambda c: (c["latency_ms"], c["size_bytes"], -c["accuracy"]))
+    return min(candidates, key=lambda c: (-c["accuracy"], c["latency_ms"], c["size_bytes"]))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--data", default=DATA_PATH, help=".xlsx/.csv/.npy dataset (cached as .npy on first use)")
+    parser.add_argument("--out", default=TRAINED_PATH,
+                        help=f"Exported joblib file (copy it to {MODEL_PATH} to deploy)")
+    parser.add_argument("--min-accuracy", type=float, help="Export the fastest model with at least this CV accuracy")
+    parser.add_argument("--folds", type=int, default=5)
+    parser.add_argument("--jobs", type=int, default=-1, help="Parallel CV fits (-1: all cores)")
+    parser.add_argument("--top", type=int, default=10, help="Candidates to list")
+    args = parser.parse_args()
+
+    X, y = load_dataset(args.data)
+    print(f"Dataset: {X.shape[0]} recordings x {X.shape[1]} samples, labels {np.bincount(y).tolist()}")
+    candidates = search(X, y, args.folds, args.jobs)
+
+    print(f"{'max_depth':>9} {'leaf':>4} {'accuracy':>13} {'latency ms':>11} {'p95':>7} {'bytes':>7} {'nodes':>5}")
+    for c in sorted(candidates, key=lambda c: (-c["accuracy"], c["latency_ms"]))[:args.top]:
+        print(f"{str(c['params']['max_depth']):>9} {c['params']['min_samples_leaf']:>4} "
+              f"{c['accuracy']:>6.3f} ± {c['accuracy_std']:.3f} {c['latency_ms']:>11.4f} "
+              f"{c['latency_ms_p95']:>7.4f} {c['size_bytes']:>7} {c['nodes']:>5}")
+
+    chosen = choose(candidates, args.min_accuracy)
+    for path in (args.out, args.out + ".json"):
+        if os.path.exists(path):
+            shutil.copy2(path, path + ".bak")
+    joblib.dump(chosen["model"], args.out)
+    report = {k: v for k, v in chosen.items() if k != "model"}
+    report.update({"data": args.data, "trained_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+                   "n_samples": int(X.shape[0]), "n_features": int(X.shape[1]), "min_accuracy": args.min_accuracy})
+    with open(args.out + ".json", "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Exported {chosen['params']} (accuracy {chosen['accuracy']:.3f}, {chosen['latency_ms']:.4f} ms, "
+          f"{chosen['size_bytes']} bytes) -> {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,24 @@
-from flask import Flask, render_template_string, Response, jsonify, request
-import cv2
+from flask import Flask, Response, jsonify, request
 import RPi.GPIO as GPIO
 import time
 import threading
 import sys
-import pandas as pd
-import joblib
+import os
+import uuid
+import logging
+
+from frame_ring import FrameRing, ClipWriter
+from camera_stream import CameraStream, open_cameras
+from frame_pool import SharedFramePool
+from actuator import Actuator
+from safety_process import SafetyLink, start_safety_process, STATE_MODES
+from eeg_shm import EEGShared, start_eeg_processes
+from eeg_tcp import fetch_stats as fetch_eeg_tcp_stats
+from robot_state import RobotState, StateStore, MotionMode, LINEAR_MODES, RadarSweep, Snapshot
+from avoidance import AvoidanceConfig, SensorReading, decide, plan, STOP, AVOID_LEFT, AVOID_RIGHT
+from robot_log import RobotLog
+from telemetry_log import TelemetryLog, SENSORS, COMMAND, STATE, RADAR, SEIZURE, MODE_NAMES, pack_pins
+from static_assets import load_static_dir, build_asset, asset_response, REVALIDATE
 
 # Make sure you have adafruit-circuitpython-servokit installed:
 # pip3 install adafruit-circuitpython-servokit
@@ -26,38 +39,118 @@ except ImportError:
 
 # -------------------------------------------------------------
 # FIX: Initialize the Flask app instance immediately after imports
-app = Flask(__name__)
+app = Flask(__name__, static_folder=None)  # /static is served pre-gzipped by static_file()
 # -------------------------------------------------------------
 
-# --- Global State, Thread Setup, and LOCK ---
-current_state = "Stopped"
-is_moving = False 
+# --- VISION WORKER PROCESSES ---
+# JPEG encoding (and other per-frame work) runs in separate processes so it does not
+# compete with the control threads for the GIL. Frames are passed through shared memory.
+# The pool forks its workers, so it must be created before any thread is started.
+VISION_WORKERS = 3  # Leave one core of the Pi for Flask and the control loops
+FRAME_SLOT_BYTES = 1280 * 720 * 3  # Largest frame the pool accepts (bigger ones are encoded in-process)
+try:
+    frame_pool = SharedFramePool(workers=VISION_WORKERS, slot_bytes=FRAME_SLOT_BYTES)
+except Exception as e:
+    print(f"Warning: Could not start vision worker processes ({e}). Encoding in-process.")
+    frame_pool = None
+# -----------------------------------
+
+# --- SAFETY PROCESS ---
+# True: motor output and the obstacle stop loop run in safety_process.py (a separate
+# interpreter, optionally SCHED_FIFO and pinned) and talk to this process through shared
+# memory only, so Flask/OpenCV/pandas/sklearn load cannot delay an emergency stop.
+SAFETY_PROCESS = False
+SAFETY_RT_PRIORITY = 50  # SCHED_FIFO priority (needs root or CAP_SYS_NICE); 0 = normal scheduling
+SAFETY_CPU = 3           # Core the loop is pinned to (None = no pinning)
+# -----------------------------------
+
+# --- Global State and Thread Setup ---
+# Motion mode, speeds and flags live in robot_state (versioned, see below) and the
+# radar angle/points in radar_sweep. Both are immutable snapshots: readers never lock.
 monitor_thread = None
 radar_thread = None
-is_radar_running = True 
-radar_data = [] 
-state_lock = threading.Lock() 
+radar_sweep = Snapshot(RadarSweep())
 SERVO_DELAY_S = 0.03 
-current_angle = 90 
 ULTRASONIC_AVOID_DISTANCE_CM = 20 # NEW: Threshold for US obstacle avoidance
+AVOIDANCE = AvoidanceConfig(avoid_distance_cm=ULTRASONIC_AVOID_DISTANCE_CM)  # Timings: see avoidance.py / replay.py
 
 # Speed Constants (Defaults)
 INITIAL_LINEAR_SPEED = 20      
 INITIAL_TURN_SPEED = 20      
 
-# DYNAMIC SPEED VARIABLES (Controlled by Sliders)
-current_duty_cycle = INITIAL_LINEAR_SPEED    
-current_turn_duty_cycle = INITIAL_TURN_SPEED 
 PWM_FREQ = 100
 
 # --- SEIZURE DETECTION GLOBALS ---
 SEIZURE_LED_PIN_BCM = 27  # BCM pin 27 (Physical Pin 13)
-IS_SEIZURE_DETECTED = False
 SEIZURE_THREAD = None
 IS_SEIZURE_MONITORING = True 
 MODEL_PATH = '/home/naveen/Desktop/LED/decision_tree_model.joblib' 
 DATA_PATH = '/home/naveen/Desktop/Final/project/Seizure_detection.xlsx'
-TEST_ROW_INDEX = 12 
+INITIAL_TEST_ROW_INDEX = 12 
+# -----------------------------------
+
+# --- SENSOR POLLING / STATUS LONG-POLL ---
+SENSOR_POLL_S = 0.5        # How often the sensor summary is read and published into robot_state
+SENSOR_ROUND_CM = 5        # Distances are rounded so echo jitter doesn't create a new state version
+# Overlapping HC-SR04 pings hear each other's echoes: radar, obstacle_monitor and sensor_poll
+# take turns on this lock, and sensor_poll reuses obstacle_monitor's reading when it is recent
+sensor_lock = threading.Lock()
+last_reading = None        # (time.monotonic(), read_sensors() tuple) of the latest full read
+STATUS_MAX_WAIT_S = 30     # Upper bound for /status?wait=
+STATE_BOOT_ID = uuid.uuid4().hex[:8]  # Keeps ETags from a previous run from matching after a restart
+# -----------------------------------
+
+# --- EEG ACQUISITION + INFERENCE PROCESSES ---
+# The dataset player and the model run in their own processes and exchange samples
+# through shared memory (eeg_shm.py); this process only reads the small status block.
+EEG_STATUS_STALE_S = 5.0  # Warn if the inference process has not published for this long
+EEG_STARTUP_GRACE_S = 30.0  # Time allowed for loading the model/dataset before the first heartbeat
+EEG_SERIAL_PORT = None    # e.g. '/dev/ttyUSB0': live framed EEG (eeg_serial.py) instead of the dataset
+EEG_SERIAL_BAUD = 921600
+EEG_TCP_PORT = None       # e.g. 5555: accept EEG from a networked acquisition box (eeg_tcp.py)
+EEG_SYNTHETIC = False     # Generated EEG with periodic seizure-like bursts (eeg_synth.py), for testing
+eeg = EEGShared.create()
+eeg.set_test_row(INITIAL_TEST_ROW_INDEX)
+eeg_processes = start_eeg_processes(eeg, DATA_PATH, MODEL_PATH, EEG_SERIAL_PORT, EEG_SERIAL_BAUD, EEG_TCP_PORT,
+                                    EEG_SYNTHETIC)
+EEG_STARTED_AT = time.monotonic()
+# -----------------------------------
+
+# --- VERSIONED ROBOT STATE ---
+# Speeds (controlled by the sliders), motion mode, radar/seizure flags and the test row.
+# Every real change bumps robot_state.version; readers can wait_for_change() on it.
+robot_state = StateStore(RobotState(linear_speed=INITIAL_LINEAR_SPEED,
+                                    turn_speed=INITIAL_TURN_SPEED,
+                                    test_row_index=INITIAL_TEST_ROW_INDEX))
+# -----------------------------------
+
+# --- LOGGING (queued, deduplicated, written in batches; recent lines served at /logs) ---
+LOG_PATH = '/home/naveen/Desktop/Final/project/logs/robot.log'
+log = RobotLog(LOG_PATH)
+# Werkzeug prints one access line per request from the request thread; keep only its warnings/errors
+logging.getLogger('werkzeug').setLevel(logging.WARNING)
+# -----------------------------------
+
+# --- BINARY TELEMETRY LOG (sensors, motor commands, state transitions, radar, seizure) ---
+TELEMETRY_DIR = '/home/naveen/Desktop/Final/project/telemetry'
+telemetry = TelemetryLog(TELEMETRY_DIR)
+robot_state.add_listener(lambda state: telemetry.record(
+    STATE, mode=MODE_NAMES.index(state.mode.value), state_version=state.version))
+# -----------------------------------
+
+# --- CAMERAS + PRE-EVENT VIDEO RING BUFFERS ---
+MAX_CAMERA_INDEX = 4   # Probe /dev/video0 .. /dev/video3
+FAKE_CAMERAS = 0       # >0: use synthetic FakeCapture sources instead of real cameras
+FRAME_RING_SECONDS = 10
+FRAME_RING_MAX_BYTES = 8 * 1024 * 1024  # Hard cap on buffered JPEG bytes, per camera
+CLIP_DIR = '/home/naveen/Desktop/Final/project/clips'
+camera_streams = {}  # camera id -> CameraStream (filled in by the camera setup below)
+clip_writers = {}    # camera id -> ClipWriter
+
+def dump_clips(reason):
+    """Saves the pre-event frames of every camera. Never blocks the caller."""
+    for writer in list(clip_writers.values()):
+        writer.dump(reason)
 # -----------------------------------
 
 # --- Motor Pin Setup (BCM) ---
@@ -90,60 +183,67 @@ GPIO.setwarnings(False)
 
 # Setup GPIO Pins 
 # TRIG pins, Motor pins, and LED are outputs
-for pin in [IN1, IN2, IN3, IN4, en_a, en_b, FRONT_TRIG_PIN, LEFT_TRIG_PIN, RIGHT_TRIG_PIN, SEIZURE_LED_PIN_BCM]:
+# (With SAFETY_PROCESS the motor and sensor pins belong to the safety process and are left alone here:
+# two processes triggering the same HC-SR04 corrupt each other's echoes)
+motor_output_pins = [] if SAFETY_PROCESS else [IN1, IN2, IN3, IN4, en_a, en_b]
+sensor_trig_pins = [] if SAFETY_PROCESS else [FRONT_TRIG_PIN, LEFT_TRIG_PIN, RIGHT_TRIG_PIN]
+for pin in motor_output_pins + sensor_trig_pins + [SEIZURE_LED_PIN_BCM]:
     GPIO.setup(pin, GPIO.OUT)
 
 # ECHO pins and IR pins are inputs
-for pin in [LEFT_IR_PIN, RIGHT_IR_PIN, FRONT_ECHO_PIN, LEFT_ECHO_PIN, RIGHT_ECHO_PIN]:
+for pin in [] if SAFETY_PROCESS else [LEFT_IR_PIN, RIGHT_IR_PIN, FRONT_ECHO_PIN, LEFT_ECHO_PIN, RIGHT_ECHO_PIN]:
     GPIO.setup(pin, GPIO.IN) 
 
-p = GPIO.PWM(en_a, PWM_FREQ)
-p.start(0) 
+if not SAFETY_PROCESS:
+    p = GPIO.PWM(en_a, PWM_FREQ)
+    p.start(0) 
 
-q = GPIO.PWM(en_b, PWM_FREQ)
-q.start(0) 
+    q = GPIO.PWM(en_b, PWM_FREQ)
+    q.start(0) 
+
+# --- Motor Output (only ever called from the actuator thread) ---
+MOTOR_PINS = [IN1, IN2, IN3, IN4]
 
-# --- Motor Control Functions (No change) ---
 def set_speed(duty_cycle):
     p.ChangeDutyCycle(duty_cycle)
     q.ChangeDutyCycle(duty_cycle)
+    telemetry.record(COMMAND, duty=int(duty_cycle))
+
+def write_motor_pins(levels):
+    GPIO.output(MOTOR_PINS, list(levels))  # All four direction pins in one call
+    telemetry.record(COMMAND, motor_pins=pack_pins(levels))
 
-def forward():
-    set_speed(current_duty_cycle)
-    GPIO.output(IN1, True)
-    GPIO.output(IN2, False)
-    GPIO.output(IN3, False) 
-    GPIO.output(IN4, True)
-
-def stop_motors():
-    set_speed(0)
-    for pin in [IN1, IN2, IN3, IN4]:
-        GPIO.output(pin, False)
-
-def backward():
-    set_speed(current_duty_cycle)
-    GPIO.output(IN1, False)
-    GPIO.output(IN2, True)
-    GPIO.output(IN3, True)
-    GPIO.output(IN4, False)
-
-def left():
-    set_speed(current_turn_duty_cycle)
-    GPIO.output(IN1, True)
-    GPIO.output(IN2, False)
-    GPIO.output(IN3, False) 
-    GPIO.output(IN4, False)
+if SAFETY_PROCESS:
+    # Same submit()/stats() interface as Actuator; commands go to the safety process
+    actuator = SafetyLink.create(speeds=lambda: (robot_state.get().linear_speed, robot_state.get().turn_speed))
+    safety_proc = start_safety_process(actuator, SAFETY_RT_PRIORITY, SAFETY_CPU, AVOIDANCE)
+else:
+    actuator = Actuator(write_motor_pins, set_speed)
+
+# --- Motor Control Functions (queue a command for the actuator thread) ---
+def forward(source="manual"):
+    actuator.submit("forward", robot_state.get().linear_speed, source)
+
+def stop_motors(source="manual"):
+    actuator.submit("stop", 0, source)
+
+def backward(source="manual"):
+    actuator.submit("backward", robot_state.get().linear_speed, source)
+
+def left(source="manual"):
+    actuator.submit("left", robot_state.get().turn_speed, source)
     
-def right():
-    set_speed(current_turn_duty_cycle)
-    GPIO.output(IN1, False)
-    GPIO.output(IN2, False)
-    GPIO.output(IN3, False)
-    GPIO.output(IN4, True)
+def right(source="manual"):
+    actuator.submit("right", robot_state.get().turn_speed, source)
 
 # --- Generalized Ultrasonic Sensor Function (MODIFIED) ---
 def read_distance(TRIG_PIN_IN, ECHO_PIN_IN):
-    """Measures distance for a specific TRIG/ECHO pair."""
+    """Measures distance for a specific TRIG/ECHO pair. One ping at a time across all threads."""
+    with sensor_lock:
+        return _ping(TRIG_PIN_IN, ECHO_PIN_IN)
+
+def _ping(TRIG_PIN_IN, ECHO_PIN_IN):
+    """One trigger/echo measurement; callers hold sensor_lock (use read_distance)."""
     
     # 1. Reset/Clear Trigger
     GPIO.output(TRIG_PIN_IN, False)
@@ -181,227 +281,268 @@ def read_distance(TRIG_PIN_IN, ECHO_PIN_IN):
 # --- Radar Function (MODIFIED to use FRONT sensor pins) ---
 def radar():
     """Runs the servo sweep and collects angle/distance data using the FRONT sensor."""
-    global radar_data, is_radar_running, current_angle
-    
     servo1.angle = 90
     time.sleep(1) 
 
-    while is_radar_running: 
+    while robot_state.get().radar_running: 
         current_data = [] 
 
         # Sweep from 0 to 180 degrees
         for angle in range(0, 181, 5): 
-            with state_lock:
-                if not is_radar_running: break
+            if not robot_state.get().radar_running: break
             
             servo1.angle = angle
             time.sleep(SERVO_DELAY_S) 
             # Use the FRONT sensor for the radar sweep
             distance = read_distance(FRONT_TRIG_PIN, FRONT_ECHO_PIN)
             current_data.append((angle, distance))
+            telemetry.record(RADAR, radar_angle=angle, radar_distance=distance)
             
-            with state_lock:
-                current_angle = angle 
+            radar_sweep.update(lambda sweep: RadarSweep(angle, sweep.points))
             
-        if not is_radar_running: break 
+        if not robot_state.get().radar_running: break 
             
         # Sweep from 180 to 0 degrees
         for angle in range(180, -1, -5):
-            with state_lock:
-                if not is_radar_running: break
+            if not robot_state.get().radar_running: break
             
             servo1.angle = angle
             time.sleep(SERVO_DELAY_S) 
             # Use the FRONT sensor for the radar sweep
             distance = read_distance(FRONT_TRIG_PIN, FRONT_ECHO_PIN)
             current_data.append((angle, distance))
+            telemetry.record(RADAR, radar_angle=angle, radar_distance=distance)
             
-            with state_lock:
-                current_angle = angle 
+            radar_sweep.update(lambda sweep: RadarSweep(angle, sweep.points))
             
-        # Safely update the shared global radar data
-        with state_lock:
-            if is_radar_running: 
-                radar_data = current_data
+        # Publish the completed sweep unless the radar was stopped meanwhile. The check and the
+        # publish run under the state lock, the same lock radar_command(False) clears the points under
+        points = tuple(current_data)
+
+        def publish(state):
+            if state.radar_running:
+                radar_sweep.update(lambda sweep: RadarSweep(sweep.angle, points))
+
+        robot_state.update_with(publish)
         
         # Pause before the next full sweep
         time.sleep(0.5)
 
     servo1.angle = 90
-    with state_lock:
-        current_angle = 90 
-    print("Radar sweep stopped.")
+    radar_sweep.update(lambda sweep: RadarSweep(90, sweep.points))
+    log.info("Radar sweep stopped.")
 
 def start_radar_thread():
     """Starts the radar thread if it's not already running."""
-    global radar_thread, is_radar_running
-    with state_lock:
-        if not is_radar_running:
-            is_radar_running = True
-            radar_thread = threading.Thread(target=radar, daemon=True)
-            radar_thread.start()
-            print("Radar thread started.")
-        else:
-            print("Radar thread is already running.")
+    global radar_thread
+    if SAFETY_PROCESS:
+        # The radar pings the front ultrasonic sensor, which the safety loop owns in this mode
+        log.warning("Radar is disabled while SAFETY_PROCESS is on (the safety loop owns the front sensor).")
+        return
+    claimed = []
+
+    def claim(state):
+        if state.radar_running:
+            return None
+        claimed.append(True)
+        return {"radar_running": True}
+
+    robot_state.update_with(claim)
+    if claimed:
+        radar_thread = threading.Thread(target=radar, daemon=True)
+        radar_thread.start()
+        log.info("Radar thread started.")
+    else:
+        log.info("Radar thread is already running.")
 
 
 # --- IR and Ultrasonic Sensor Reading & Monitoring Functions (MODIFIED) ---
-def get_sensor_status():
-    """Reads and formats status for all 5 sensors (2 IR, 3 US)."""
-    left_ir_state = GPIO.input(LEFT_IR_PIN)
-    right_ir_state = GPIO.input(RIGHT_IR_PIN)
-    
-    # Read all three ultrasonic sensors
-    front_dist = read_distance(FRONT_TRIG_PIN, FRONT_ECHO_PIN)
-    left_dist = read_distance(LEFT_TRIG_PIN, LEFT_ECHO_PIN)
-    right_dist = read_distance(RIGHT_TRIG_PIN, RIGHT_ECHO_PIN)
+def read_sensors():
+    """Reads all 5 sensors once and logs them. Returns (left_ir, right_ir, front_cm, left_cm, right_cm)."""
+    global last_reading
+    if SAFETY_PROCESS:
+        # Latest readings of the safety loop (only updated while driving; no second echo ping)
+        status = actuator.state()
+        left_ir_state, right_ir_state = status["ir_left"], status["ir_right"]
+        front_dist, left_dist, right_dist = status["front"], status["left"], status["right"]
+    else:
+        left_ir_state = GPIO.input(LEFT_IR_PIN)
+        right_ir_state = GPIO.input(RIGHT_IR_PIN)
+        front_dist = read_distance(FRONT_TRIG_PIN, FRONT_ECHO_PIN)
+        left_dist = read_distance(LEFT_TRIG_PIN, LEFT_ECHO_PIN)
+        right_dist = read_distance(RIGHT_TRIG_PIN, RIGHT_ECHO_PIN)
+    telemetry.record(SENSORS, ir_left=int(left_ir_state), ir_right=int(right_ir_state),
+                     us_front=front_dist, us_left=left_dist, us_right=right_dist)
+    reading = (left_ir_state, right_ir_state, front_dist, left_dist, right_dist)
+    last_reading = (time.monotonic(), reading)
+    return reading
+
+def get_sensor_status(round_to=SENSOR_ROUND_CM, max_age_s=SENSOR_POLL_S):
+    """Formats status for all 5 sensors (2 IR, 3 US). Distances are rounded to `round_to` cm.
+
+    Uses the latest reading (e.g. obstacle_monitor's) if it is under `max_age_s` old, else reads the sensors.
+    """
+    latest = last_reading
+    if latest is not None and time.monotonic() - latest[0] < max_age_s:
+        reading = latest[1]
+    else:
+        reading = read_sensors()
+    left_ir_state, right_ir_state, *distances = reading
+    front_dist, left_dist, right_dist = (int(round(d / round_to) * round_to) for d in distances)
     
     left_status = "DETECTED" if left_ir_state == GPIO.LOW else "Clear"
     right_status = "DETECTED" if right_ir_state == GPIO.LOW else "Clear"
     
     return f"IR L: {left_status} | IR R: {right_status} | US F: {front_dist}cm | US L: {left_dist}cm | US R: {right_dist}cm"
 
-def obstacle_monitor():
-    """Continuously monitors IR and Ultrasonic sensors for auto-avoidance."""
-    global current_state, is_moving
-    
+def sensor_poll():
+    """Publishes the sensor summary into robot_state; a new version only when the rounded text changes."""
     while True:
-        with state_lock:
-            moving_status = is_moving
+        try:
+            robot_state.update(sensor_status=get_sensor_status())
+        except Exception as e:
+            log.error(f"Sensor poll error: {e}", key="sensor_poll_error")
+        time.sleep(SENSOR_POLL_S)
 
-        if moving_status:
-            left_ir_state = GPIO.input(LEFT_IR_PIN)
-            right_ir_state = GPIO.input(RIGHT_IR_PIN)
-            
-            front_dist = read_distance(FRONT_TRIG_PIN, FRONT_ECHO_PIN)
-            left_dist = read_distance(LEFT_TRIG_PIN, LEFT_ECHO_PIN)
-            right_dist = read_distance(RIGHT_TRIG_PIN, RIGHT_ECHO_PIN)
+def obstacle_monitor():
+    """Continuously monitors IR and Ultrasonic sensors for auto-avoidance (decisions in avoidance.py)."""
+    drive = {"stop": stop_motors, "forward": forward, "left": left, "right": right}
+    while True:
+        if robot_state.get().is_moving:
+            reading = SensorReading(*read_sensors())
+            action = decide(reading, AVOIDANCE)
             
             # --- PRIMARY CHECK: STOP if Critical Obstacle Detected ---
             # 1. Front US is too close OR
             # 2. Both IRs detected (e.g., about to fall into a hole/cliff)
-            if (front_dist > 0 and front_dist < ULTRASONIC_AVOID_DISTANCE_CM) or \
-               (left_ir_state == GPIO.LOW and right_ir_state == GPIO.LOW):
-                
-                stop_motors()
-                with state_lock:
-                    current_state = f"🚨 AUTO STOP: Obstacle Front ({front_dist}cm) or Both IRs"
-                    is_moving = False
-                print(current_state)
+            if action == STOP:
+                stop_motors("monitor")
+                state = robot_state.update(mode=MotionMode.AUTO_STOP, is_moving=False,
+                                           message=f"🚨 AUTO STOP: Obstacle Front ({reading.front}cm) or Both IRs")
+                log.warning(state.message, key="auto_stop")
+                dump_clips("auto_stop")
                 # Continue loop iteration to allow manual control resumption later
-                time.sleep(0.05)
+                time.sleep(AVOIDANCE.poll_s)
                 continue
             
             # --- SECONDARY CHECK: Auto Avoidance Turn ---
-            
-            # Left Obstacle (US or IR) -> Turn Right
-            elif (left_dist > 0 and left_dist < ULTRASONIC_AVOID_DISTANCE_CM) or (left_ir_state == GPIO.LOW):
-                stop_motors()
-                time.sleep(0.05)
-                right() # Obstacle left -> turn right
-                
-                with state_lock:
-                    new_state = f"➡️ AUTO AVOID: Obstacle Left. Turned Right ({current_turn_duty_cycle}%)"
-                    current_state = new_state
-                print(current_state)
-
-                time.sleep(0.3)
-                stop_motors()
-                forward() # Resume forward movement
-            
-            # Right Obstacle (US or IR) -> Turn Left
-            elif (right_dist > 0 and right_dist < ULTRASONIC_AVOID_DISTANCE_CM) or (right_ir_state == GPIO.LOW):
-                stop_motors()
-                time.sleep(0.05)
-                left()  # Obstacle right -> turn left
+            # Left obstacle (US or IR) -> turn right, right obstacle -> turn left, then resume forward
+            if action in (AVOID_LEFT, AVOID_RIGHT):
+                if action == AVOID_RIGHT:
+                    state = robot_state.update_with(lambda s: {
+                        "mode": MotionMode.AVOID_RIGHT,
+                        "message": f"➡️ AUTO AVOID: Obstacle Left. Turned Right ({s.turn_speed}%)"})
+                else:
+                    state = robot_state.update_with(lambda s: {
+                        "mode": MotionMode.AVOID_LEFT,
+                        "message": f"⬅️ AUTO AVOID: Obstacle Right. Turned Left ({s.turn_speed}%)"})
+                log.info(state.message, key=action)
+                for delay, command in plan(action, AVOIDANCE):
+                    if delay:
+                        time.sleep(delay)
+                    drive[command]("monitor")
                 
-                with state_lock:
-                    new_state = f"⬅️ AUTO AVOID: Obstacle Right. Turned Left ({current_turn_duty_cycle}%)"
-                    current_state = new_state
-                print(current_state)
+        time.sleep(AVOIDANCE.poll_s) 
 
-                time.sleep(0.3)
-                stop_motors()
-                forward() # Resume forward movement
-                
-        time.sleep(0.05) 
+def safety_monitor():
+    """SAFETY_PROCESS mode: mirrors the safety loop's stops and avoid turns into robot_state."""
+    seen_stops = seen_events = 0
+    while True:
+        status = actuator.state()
+        mode = STATE_MODES[status["mode"]]
+        if status["stops"] != seen_stops:
+            state = robot_state.update(mode=MotionMode.AUTO_STOP, is_moving=False,
+                                       message=f"🚨 AUTO STOP: Obstacle Front ({status['front']:.0f}cm) or Both IRs")
+            log.warning(f"{state.message} (stop latency {status['last_stop_ms']:.1f} ms)", key="auto_stop")
+            dump_clips("auto_stop")
+        elif status["events"] != seen_events and mode in ("avoid_left", "avoid_right"):
+            if mode == "avoid_right":
+                state = robot_state.update_with(lambda s: {
+                    "mode": MotionMode.AVOID_RIGHT,
+                    "message": f"➡️ AUTO AVOID: Obstacle Left. Turned Right ({s.turn_speed}%)"})
+            else:
+                state = robot_state.update_with(lambda s: {
+                    "mode": MotionMode.AVOID_LEFT,
+                    "message": f"⬅️ AUTO AVOID: Obstacle Right. Turned Left ({s.turn_speed}%)"})
+            log.info(state.message, key=mode)
+        seen_stops, seen_events = status["stops"], status["events"]
+        if status["heartbeat"] and time.monotonic() - status["heartbeat"] > 1.0:
+            log.error("Safety process is not responding!", key="safety_heartbeat")
+        time.sleep(0.02)
 
 # -----------------------------------------------------
-# --- SEIZURE DETECTION THREAD FUNCTION (No change) ---
+# --- SEIZURE DETECTION THREAD FUNCTION (reads the EEG status block) ---
+def eeg_problem(status):
+    """None while acquisition and inference look healthy, otherwise what is wrong (for the log and /stats)."""
+    for process in eeg_processes:
+        code = process.poll()
+        if code is not None:
+            return f"EEG {process.args[2]} process (pid {process.pid}) exited with code {code}"
+    if not status["heartbeat"]:
+        if time.monotonic() - EEG_STARTED_AT > EEG_STARTUP_GRACE_S:
+            return f"Seizure inference has not started after {EEG_STARTUP_GRACE_S:.0f} s (model {MODEL_PATH})"
+    elif time.monotonic() - status["heartbeat"] > EEG_STATUS_STALE_S:
+        return "Seizure inference process is not responding!"
+    return None
+
 def seizure_detection_monitor():
-    """Continuously uses the loaded model and data to check for seizures, toggling the LED on detection."""
-    global IS_SEIZURE_DETECTED, IS_SEIZURE_MONITORING, TEST_ROW_INDEX
+    """Follows the inference process's status block, toggling the LED on detection (no model work here)."""
+    global IS_SEIZURE_MONITORING
     
-    # 1. Load Model and Data ONCE
-    try:
-        loaded_model = joblib.load(MODEL_PATH)
-        data = pd.read_excel(DATA_PATH)
-        df = pd.DataFrame(data)
-        df = df.drop(['Time'], axis=1)
-        df = df.transpose()
-        x_data = df.iloc[:, :-1]
-        print("Seizure Detection Model and Data loaded successfully.")
-        
-        GPIO.output(SEIZURE_LED_PIN_BCM, False) # Ensure LED starts OFF
-        
-    except FileNotFoundError as e:
-        print(f"Error: Required file not found: {e}. Seizure detection disabled.")
-        return
-    except Exception as e:
-        print(f"Error during initialization (Data/Model Load): {e}")
-        return
-        
-    print(f"Seizure Detection Monitor started (LED output on BCM {SEIZURE_LED_PIN_BCM}).")
+    GPIO.output(SEIZURE_LED_PIN_BCM, False) # Ensure LED starts OFF
+    log.info(f"Seizure Detection Monitor started (LED output on BCM {SEIZURE_LED_PIN_BCM}).")
+    last_inference = 0
 
     while IS_SEIZURE_MONITORING:
         try:
-            # Get the current row index from the global variable
-            current_n = TEST_ROW_INDEX 
+            # Pass the test row chosen in the web app on to the EEG player
+            current_n = robot_state.get().test_row_index 
+            if eeg.test_row() != current_n:
+                eeg.set_test_row(current_n)
             
-            # 2. Acquire Data Point
-            # Ensure the row index is within bounds
-            if current_n < 0 or current_n >= len(x_data):
-                print(f"Warning: Invalid row index {current_n}. Skipping detection cycle.")
-                time.sleep(1)
-                continue
-                
-            sample_query_column = x_data.iloc[current_n:current_n+1] 
-            
-            # 3. Make Prediction
-            prediction = loaded_model.predict(sample_query_column)
-            seizure_predicted = (prediction[0] == 1)
+            status = eeg.status()
+            problem = eeg_problem(status)
+            if problem:
+                log.error(problem, key="eeg_health")
+            if status["inferences"] != last_inference:
+                last_inference = status["inferences"]
+                telemetry.record(SEIZURE, seizure=status["prediction"])
             
-            # 4. Act based on the Prediction (LED Toggling Only)
-            if seizure_predicted:
-                with state_lock:
-                    IS_SEIZURE_DETECTED = True
+            # Act based on the latest prediction (LED Toggling Only)
+            if status["detected"]:
+                newly_detected = not robot_state.get().seizure_detected
+                robot_state.update(seizure_detected=True)
+                if newly_detected:
+                    dump_clips("seizure")
                     
                 # Blinking LED pattern (0.1s ON, 0.3s OFF)
                 GPIO.output(SEIZURE_LED_PIN_BCM, True)
                 time.sleep(0.1)
                 GPIO.output(SEIZURE_LED_PIN_BCM, False)
                 time.sleep(0.3)
-                print(f"🚨 SEIZURE ALERT: Detected at Row {current_n}! Toggling LED.") 
+                log.warning(f"🚨 SEIZURE ALERT: Detected at Row {current_n}! Toggling LED.") 
                 
             else:
-                with state_lock:
-                    IS_SEIZURE_DETECTED = False
+                robot_state.update(seizure_detected=False)
                     
                 GPIO.output(SEIZURE_LED_PIN_BCM, False)
-                time.sleep(1) # Check again after 1 second
+                time.sleep(0.2)
                 
         except Exception as e:
-            print(f"Seizure Detection Error during loop: {e}")
+            log.error(f"Seizure Detection Error during loop: {e}", key="seizure_loop_error")
             time.sleep(5) 
 
-    print("Seizure Detection Monitor stopped.")
+    log.info("Seizure Detection Monitor stopped.")
 # -----------------------------------------------------
 
 
 # --- Initialize and Start Threads (No change) ---
-monitor_thread = threading.Thread(target=obstacle_monitor, daemon=True)
+monitor_thread = threading.Thread(target=safety_monitor if SAFETY_PROCESS else obstacle_monitor, daemon=True)
 monitor_thread.start()
 
+sensor_thread = threading.Thread(target=sensor_poll, daemon=True)
+sensor_thread.start()
+
 start_radar_thread()
 
 # --- Initialize and Start NEW Seizure Detection Thread ---
@@ -409,111 +550,125 @@ SEIZURE_THREAD = threading.Thread(target=seizure_detection_monitor, daemon=True)
 SEIZURE_THREAD.start()
 # ---------------------------------------------------------
 
-# --- Camera Setup (No change) ---
+# --- Camera Setup (every detected camera, one capture thread each, frames encoded once) ---
 try:
-    camera = cv2.VideoCapture(0)
-    
-    if not camera.isOpened():
-        camera = cv2.VideoCapture(1)
-        if not camera.isOpened():
-             print("Warning: Could not open camera. Continuing without video feed.")
-             camera = None
-except cv2.error as e:
-    print(f"OpenCV Error: {e}")
-    camera = None
+    cameras = open_cameras(MAX_CAMERA_INDEX, fake_count=FAKE_CAMERAS)
+    if not cameras:
+        print("Warning: Could not open camera. Continuing without video feed.")
 except Exception as e:
     print(f"General Camera Error: {e}")
-    camera = None
-
-def gen_frames():
-    if not camera:
+    cameras = {}
+
+for cam_id, capture in cameras.items():
+    ring = FrameRing(max_bytes=FRAME_RING_MAX_BYTES, max_age_s=FRAME_RING_SECONDS)
+    clip_writers[cam_id] = ClipWriter(ring, CLIP_DIR, name=f"cam{cam_id}")
+    camera_streams[cam_id] = CameraStream(capture, ring=ring, pool=frame_pool, name=f"cam{cam_id}")
+    camera_streams[cam_id].start()
+print(f"Cameras streaming: {sorted(camera_streams)}")
+
+def gen_frames(cam_id=0, profile="full"):
+    stream = camera_streams.get(cam_id)
+    if not stream:
         return
-    
-    while True:
-        success, frame = camera.read()
-        if not success:
-            break
-        else:
-            ret, buffer = cv2.imencode('.jpg', frame)
-            frame = buffer.tobytes()
-            yield (b'--frame\r\n'
-                    b'Content-Type: image/jpeg\r\n\r\n' + frame + b'\r\n')
+    yield from stream.frames(profile)
 
 # --------------------------------------------------------------------------------------------------------------------------------------
 # --- Flask Routes (No functional change to routes, only status update in index) ---
 @app.route("/")
 def index():
-    sensor_status = get_sensor_status()
-    with state_lock:
-        current_state_locked = current_state
-        current_duty_cycle_locked = current_duty_cycle
-        current_turn_duty_cycle_locked = current_turn_duty_cycle
-        seizure_status = IS_SEIZURE_DETECTED 
-        test_row_index_locked = TEST_ROW_INDEX
-        
-    return render_template_string(html, 
-                                 current_state=current_state_locked, 
-                                 sensor_status=sensor_status,
-                                 LINEAR_SPEED=current_duty_cycle_locked, 
-                                 TURN_SPEED=current_turn_duty_cycle_locked,
-                                 IS_SEIZURE_DETECTED=seizure_status,
-                                 TEST_ROW_INDEX=test_row_index_locked) 
+    # Static page shell, rendered and gzipped once at startup; live values come from /status
+    return asset_response(index_page, cache_control=REVALIDATE)
+
+@app.route("/static/<path:filename>")
+def static_file(filename):
+    asset = static_assets.get(filename)
+    if asset is None:
+        return jsonify({"success": False, "error": "Not found"}), 404
+    return asset_response(asset)
 
 # ... (Speed, Index, Radar, Stop/Start, Video feed routes remain unchanged) ...
 
+# --- Setting / status helpers (shared by the Flask routes and the async server) ---
+def set_linear_speed_command(speed):
+    new_speed = max(0, min(100, int(speed)))
+    state = robot_state.update(linear_speed=new_speed)
+    if state.mode in LINEAR_MODES:
+        actuator.submit("speed", new_speed, "speed_slider")
+    return {"success": True, "new_speed": new_speed}
+
+def set_turn_speed_command(speed):
+    new_speed = max(0, min(100, int(speed)))
+    state = robot_state.update(turn_speed=new_speed)
+    if state.mode in (MotionMode.LEFT, MotionMode.RIGHT):
+        actuator.submit("speed", new_speed, "speed_slider")
+    return {"success": True, "new_speed": new_speed}
+
+def set_test_row_command(row_index):
+    new_index = max(0, int(row_index))
+    robot_state.update(test_row_index=new_index)
+    log.info(f"✅ TEST_ROW_INDEX updated to: {new_index}") 
+    return {"success": True, "new_index": new_index}
+
+def radar_payload():
+    sweep = radar_sweep.get()
+    return {
+        "data": sweep.points,
+        "current_angle": sweep.angle
+    }
+
+def status_etag(state):
+    """Unquoted /status ETag: changes exactly when the state version does."""
+    return f"{STATE_BOOT_ID}-{state.version}"
+
+def parse_wait(value):
+    """`wait=` query value in seconds, clamped to [0, STATUS_MAX_WAIT_S]; bad values mean no wait."""
+    try:
+        return max(0.0, min(float(value or 0), STATUS_MAX_WAIT_S))
+    except ValueError:
+        return 0.0
+
+def eeg_ingest_stats():
+    """Per-connection throughput/lag of the TCP ingestion process, if it is the EEG source."""
+    if not EEG_TCP_PORT:
+        return None
+    try:
+        return fetch_eeg_tcp_stats(port=EEG_TCP_PORT + 1, timeout=0.2)
+    except (OSError, ValueError) as e:
+        return {"error": str(e)}
+
+def stats_payload():
+    """Vision pool, camera, actuator and telemetry counters (these change constantly, so they are not in /status)."""
+    return {
+        "vision_pool": frame_pool.stats() if frame_pool else None,
+        "cameras": {cam_id: stream.stats() for cam_id, stream in camera_streams.items()},
+        "actuator": actuator.stats(),
+        "telemetry": telemetry.stats(),
+        "eeg": dict(eeg.status(), problem=eeg_problem(eeg.status())),
+        "eeg_ingest": eeg_ingest_stats(),
+        "log": log.stats()
+    }
+
 @app.route("/set_linear_speed", methods=['POST'])
 def set_linear_motor_speed():
-    global current_duty_cycle
     try:
         data = request.json
-        new_speed = int(data.get('speed', current_duty_cycle)) 
-        
-        new_speed = max(0, min(100, new_speed))
-        
-        with state_lock:
-            current_duty_cycle = new_speed
-            
-            if "Forward" in current_state or "Backward" in current_state:
-                set_speed(current_duty_cycle)
-                
-        return jsonify({"success": True, "new_speed": current_duty_cycle})
+        return jsonify(set_linear_speed_command(data.get('speed', robot_state.get().linear_speed)))
     except Exception as e:
         return jsonify({"success": False, "error": str(e)}), 400
 
 @app.route("/set_turn_speed", methods=['POST'])
 def set_turn_motor_speed():
-    global current_turn_duty_cycle
     try:
         data = request.json
-        new_speed = int(data.get('speed', current_turn_duty_cycle)) 
-        
-        new_speed = max(0, min(100, new_speed))
-        
-        with state_lock:
-            current_turn_duty_cycle = new_speed
-            
-            if "Turning Left" in current_state or "Turning Right" in current_state or "AUTO AVOID" in current_state:
-                pass 
-                
-        return jsonify({"success": True, "new_speed": current_turn_duty_cycle})
+        return jsonify(set_turn_speed_command(data.get('speed', robot_state.get().turn_speed)))
     except Exception as e:
         return jsonify({"success": False, "error": str(e)}), 400
 
 @app.route("/set_test_row_index", methods=['POST'])
 def set_test_row():
-    global TEST_ROW_INDEX
     try:
         data = request.json
-        new_index = int(data.get('row_index', TEST_ROW_INDEX)) 
-        
-        new_index = max(0, new_index)
-        
-        with state_lock:
-            TEST_ROW_INDEX = new_index
-            
-        print(f"✅ TEST_ROW_INDEX updated to: {TEST_ROW_INDEX}") 
-            
-        return jsonify({"success": True, "new_index": TEST_ROW_INDEX})
+        return jsonify(set_test_row_command(data.get('row_index', robot_state.get().test_row_index)))
     except ValueError:
         return jsonify({"success": False, "error": "Invalid index format (must be an integer)."}), 400
     except Exception as e:
@@ -523,153 +678,152 @@ def set_test_row():
 @app.route("/radar_data")
 def get_radar_data():
     """Returns the current angle/distance data and instantaneous angle."""
-    with state_lock:
-        data = list(radar_data) 
-        angle = current_angle 
-    return jsonify({
-        "data": data,
-        "current_angle": angle
-    })
+    return jsonify(radar_payload())
 
 @app.route("/status")
 def get_status_json():
-    """Returns the current state, sensor status, and running statuses as JSON, including seizure status and test index."""
-    with state_lock:
-        state = current_state
-        moving = is_moving
-        radar_running = is_radar_running 
-        linear_speed = current_duty_cycle
-        turn_speed = current_turn_duty_cycle 
-        seizure_status = IS_SEIZURE_DETECTED 
-        test_row_index = TEST_ROW_INDEX 
-    
-    sensor_data_string = get_sensor_status()
-    
-    return jsonify({
-        "state": state,
-        "is_moving": moving,
-        "sensor_status": sensor_data_string,
-        "is_radar_running": radar_running,
-        "linear_speed": linear_speed,
-        "turn_speed": turn_speed,
-        "is_seizure_detected": seizure_status,
-        "test_row_index": test_row_index
-    })
+    """Returns the current state, sensor status, and running statuses as JSON, including seizure status and test index.
+
+    The ETag is the state version. A matching If-None-Match gets a 304; with `?wait=<s>` the
+    request is held until the state changes (or the wait runs out) before answering.
+    """
+    state = robot_state.get()
+    if request.if_none_match.contains(status_etag(state)):
+        wait = parse_wait(request.args.get('wait'))
+        if wait:
+            state = robot_state.wait_for_change(state.version, wait)
+    if request.if_none_match.contains(status_etag(state)):
+        response = Response(status=304)
+    else:
+        response = jsonify(state.to_dict())
+    response.set_etag(status_etag(state))
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+@app.route("/logs")
+def get_logs_json():
+    """Recent log lines from the in-memory ring: `?since=<seq>` for only newer ones, `limit=` to cap."""
+    since = request.args.get('since', 0, type=int)
+    limit = request.args.get('limit', 100, type=int)
+    return jsonify({"entries": log.recent(since, limit), "last_seq": log.seq})
+
+@app.route("/stats")
+def get_stats_json():
+    """Vision pool, per-camera, actuator and telemetry counters."""
+    return jsonify(stats_payload())
+
+# --- Command API: queue the command and reply with a small JSON state delta ---
+# (The full HTML page is only rendered by "/"; nothing here reads the sensors.)
+def drive_command(mode):
+    """Queues a drive command for the actuator and updates the shared state. Returns the delta."""
+    def apply(state):
+        # Runs under the state store lock, so queued commands and state changes stay in order
+        if mode == "forward":
+            forward()
+            return {"mode": MotionMode.FORWARD, "is_moving": True,
+                    "message": f"Moving Forward (Speed: {state.linear_speed}%)"}
+        if mode == "backward":
+            backward()
+            return {"mode": MotionMode.BACKWARD, "is_moving": True,
+                    "message": f"Moving Backward (Speed: {state.linear_speed}%)"}
+        if mode == "left":
+            left()
+            return {"mode": MotionMode.LEFT, "is_moving": True,
+                    "message": f"Turning Left (Speed: {state.turn_speed}%)"}
+        if mode == "right":
+            right()
+            return {"mode": MotionMode.RIGHT, "is_moving": True,
+                    "message": f"Turning Right (Speed: {state.turn_speed}%)"}
+        stop_motors()
+        return {"mode": MotionMode.STOPPED, "is_moving": False, "message": "Stopped"}
+
+    state = robot_state.update_with(apply)
+    return {"state": state.message, "is_moving": state.is_moving, "version": state.version}
+
+def radar_command(run):
+    """Starts or stops the radar sweep. Returns the delta."""
+    if run:
+        start_radar_thread()
+    else:
+        def stop(state):
+            radar_sweep.update(lambda sweep: RadarSweep(sweep.angle, ()))
+            return {"radar_running": False}
+
+        robot_state.update_with(stop)
+        servo1.angle = 90 
+    state = robot_state.get()
+    return {"is_radar_running": state.radar_running, "version": state.version}
+
+def command_response(delta):
+    return jsonify({"success": True, "queued": True, **delta})
 
 @app.route("/stop_radar", methods=['POST'])
 def stop_radar_route():
-    global is_radar_running, radar_data
-    with state_lock:
-        is_radar_running = False
-        radar_data = [] 
-        servo1.angle = 90 
-    return index()
+    return command_response(radar_command(False))
 
 @app.route("/start_radar", methods=['POST'])
 def start_radar_route():
-    start_radar_thread()
-    return index()
+    return command_response(radar_command(True))
 
 @app.route("/forward", methods=['POST'])
 def go_forward():
-    global current_state, is_moving
-    forward()
-    with state_lock:
-        current_state = f"Moving Forward (Speed: {current_duty_cycle}%)"
-        is_moving = True 
-    return index()
+    return command_response(drive_command("forward"))
 
 @app.route("/backward", methods=['POST'])
 def go_backward():
-    global current_state, is_moving
-    backward()
-    with state_lock:
-        current_state = f"Moving Backward (Speed: {current_duty_cycle}%)"
-        is_moving = True 
-    return index()
+    return command_response(drive_command("backward"))
 
 @app.route("/left", methods=['POST'])
 def go_left():
-    global current_state, is_moving
-    left()
-    with state_lock:
-        current_state = f"Turning Left (Speed: {current_turn_duty_cycle}%)"
-        is_moving = True 
-    return index()
+    return command_response(drive_command("left"))
 
 @app.route("/right", methods=['POST'])
 def go_right():
-    global current_state, is_moving
-    right()
-    with state_lock:
-        current_state = f"Turning Right (Speed: {current_turn_duty_cycle}%)"
-        is_moving = True 
-    return index()
+    return command_response(drive_command("right"))
 
 @app.route("/stop", methods=['POST'])
 def go_stop():
-    global current_state, is_moving
-    stop_motors()
-    with state_lock:
-        current_state = "Stopped"
-        is_moving = False
-    return index()
+    return command_response(drive_command("stop"))
 
 @app.route("/video_feed")
-def video_feed():
-    return Response(gen_frames(),
+@app.route("/video_feed/<int:cam_id>")
+def video_feed(cam_id=0):
+    # ?profile=preview serves the shared low-resolution stream (phones / weak links)
+    if cam_id not in camera_streams:
+        return jsonify({"success": False, "error": f"Unknown camera {cam_id}"}), 404
+    profile = "preview" if request.args.get('profile') == "preview" else "full"
+    return Response(gen_frames(cam_id, profile),
                     mimetype='multipart/x-mixed-replace; boundary=frame')
+
+@app.route("/snapshot.jpg")
+@app.route("/snapshot/<int:cam_id>.jpg")
+def snapshot(cam_id=0):
+    """Serves the latest encoded frame from memory; supports If-None-Match for cheap polling."""
+    stream = camera_streams.get(cam_id)
+    if not stream:
+        return jsonify({"success": False, "error": "Camera unavailable"}), 503
+    etag, jpeg = stream.latest()
+    if jpeg is None:
+        return jsonify({"success": False, "error": "No frame captured yet"}), 503
+
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+    else:
+        response = Response(jpeg, mimetype='image/jpeg')
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
 # --------------------------------------------------------------------------------------------------------------------------------------
 
-# --- HTML Template (No change needed here, as the JS automatically polls the new sensor_status string) ---
+# --- HTML Template (static shell: rendered once below, dynamic values are filled in from /status) ---
 html = """
 <!doctype html>
 <html lang="en">
 <head>
     <meta name="viewport" content="width=device-width, initial-scale=1.0">
     <title>4WD Robot Control & Radar</title>
-    <script src="https://cdn.tailwindcss.com"></script>
-    <script src="https://cdn.jsdelivr.net/npm/chart.js@3.7.1/dist/chart.min.js"></script>
-    <style>
-        body { font-family: 'Inter', sans-serif; }
-        form { display: inline-block; margin: 0.5rem; }
-        .radar-container {
-            position: relative;
-            width: 100%;
-            padding-bottom: 50%; 
-            height: 0;
-            background-color: #1a1a1a;
-            border-radius: 0.5rem;
-            overflow: hidden; 
-        }
-        .radar-container canvas {
-            position: absolute;
-            width: 100% !important;
-            height: 100% !important;
-        }
-        .chart-grid-green .chartjs-render-monitor {
-            background-color: #1a1a1a !important; 
-        }
-        .range-lg {
-            -webkit-appearance: none;
-            height: 8px;
-            background: #d3d3d3;
-            outline: none;
-            opacity: 0.7;
-            -webkit-transition: .2s;
-            transition: opacity .2s;
-        }
-        .range-lg::-webkit-slider-thumb {
-            -webkit-appearance: none;
-            appearance: none;
-            width: 25px;
-            height: 25px;
-            border-radius: 50%;
-            background: #4F46E5;
-            cursor: pointer;
-            border: 2px solid white;
-        }
-    </style>
+    <link rel="stylesheet" href="{{ asset_url('robot.css') }}">
+    <script src="{{ asset_url('radar.js') }}" defer></script>
 </head>
 <body class="bg-gray-100 p-4 sm:p-8">
 
@@ -684,16 +838,17 @@ html = """
         <div class="grid grid-cols-1 mb-6">
             <div class="border-4 border-gray-200 rounded-lg overflow-hidden">
                 <h3 class="text-lg font-semibold p-2 bg-gray-200 text-center">Camera Feed</h3>
-                <img id="video-feed" src="/video_feed" class="w-full h-auto object-cover" onerror="this.src='https://placehold.co/640x480/E0E7FF/4338CA?text=Camera+Feed+Unavailable';" alt="Robot Camera Feed">
+                <img id="video-feed" class="w-full h-auto object-cover" onerror="this.onerror=null; this.src='{{ asset_url('camera-unavailable.svg') }}';" alt="Robot Camera Feed">
             </div>
+            <div id="extra-camera-feeds" class="grid grid-cols-2 gap-2 mt-2"></div>
         </div>
 
         <div class="mb-6 space-y-2">
             <h3 class="text-lg font-semibold p-2 bg-blue-50 rounded-lg shadow-inner">
-                Movement Status: <span id="movement-status" class="font-normal text-blue-700">{{ current_state }}</span>
+                Movement Status: <span id="movement-status" class="font-normal text-blue-700">Loading...</span>
             </h3> 
             <h3 class="text-lg font-semibold p-2 bg-green-50 rounded-lg shadow-inner">
-                Sensor Status: <span id="sensor-status" class="font-normal text-green-700">{{ sensor_status }}</span>
+                Sensor Status: <span id="sensor-status" class="font-normal text-green-700">Loading...</span>
             </h3>
             
             <h3 class="text-lg font-semibold p-2 rounded-lg shadow-inner" id="seizure-status-box">
@@ -706,14 +861,14 @@ html = """
                 </label>
                 <div class="flex space-x-2">
                     <input type="number" id="test-row-index-input" 
-                               value="{{ TEST_ROW_INDEX }}" min="0" 
+                               value="" min="0" 
                                class="flex-grow p-2 border border-gray-400 rounded-md shadow-sm focus:ring-blue-500 focus:border-blue-500"
                                placeholder="Enter row number">
                     <button id="set-index-btn" class="bg-indigo-500 hover:bg-indigo-600 text-white font-bold py-2 px-4 rounded-md transition duration-150">
                         Set Index
                     </button>
                 </div>
-                <p class="text-sm text-gray-600 mt-1">Current Active Index: <span id="current-test-index">{{ TEST_ROW_INDEX }}</span></p>
+                <p class="text-sm text-gray-600 mt-1">Current Active Index: <span id="current-test-index">-</span></p>
             </div>
             </div>
 
@@ -752,33 +907,33 @@ html = """
             </div>
 
 
-            <form action="/forward" method="POST" class="w-full">
+            <form action="/forward" method="POST" class="w-full command-form">
                 <button type="submit" class="w-full bg-blue-500 hover:bg-blue-600 text-white font-bold py-3 px-6 rounded-lg shadow-lg transition duration-150 ease-in-out">
                     ⬆️ Forward
                 </button>
             </form>
 
             <div class="flex justify-center space-x-4 w-full">
-                <form action="/left" method="POST" class="w-1/3">
+                <form action="/left" method="POST" class="w-1/3 command-form">
                     <button type="submit" class="w-full bg-yellow-500 hover:bg-yellow-600 text-white font-bold py-3 px-6 rounded-lg shadow-lg transition duration-150 ease-in-out">
                         ⬅️ Left
                     </button>
                 </form>
                 
-                <form action="/stop" method="POST" class="w-1/3">
+                <form action="/stop" method="POST" class="w-1/3 command-form">
                     <button type="submit" class="w-full bg-red-800 hover:bg-red-600 text-white font-bold py-3 px-6 rounded-lg shadow-lg transition duration-150 ease-in-out">
                         🛑 Stop Motors
                     </button>
                 </form>
 
-                <form action="/right" method="POST" class="w-1/3">
+                <form action="/right" method="POST" class="w-1/3 command-form">
                     <button type="submit" class="w-full bg-yellow-500 hover:bg-yellow-600 text-white font-bold py-3 px-6 rounded-lg shadow-lg transition duration-150 ease-in-out">
                         ➡️ Right
                     </button>
                 </form>
             </div>
 
-            <form action="/backward" method="POST" class="w-full">
+            <form action="/backward" method="POST" class="w-full command-form">
                 <button type="submit" class="w-full bg-blue-500 hover:bg-blue-600 text-white font-bold py-3 px-6 rounded-lg shadow-lg transition duration-150 ease-in-out">
                     ⬇️ Backward
                 </button>
@@ -795,12 +950,12 @@ html = """
             </h3>
             
             <div class="flex justify-center space-x-4 pt-4">
-                <form action="/start_radar" method="POST" class="w-1/3">
+                <form action="/start_radar" method="POST" class="w-1/3 command-form">
                     <button type="submit" id="start-radar-btn" class="w-full bg-green-500 hover:bg-green-600 text-white font-bold py-3 px-6 rounded-lg shadow-lg transition duration-150 ease-in-out">
                         ▶️ Start Radar
                     </button>
                 </form>
-                <form action="/stop_radar" method="POST" class="w-1/3" onsubmit="return confirm('Stop the servo sweep?');">
+                <form action="/stop_radar" method="POST" class="w-1/3 command-form" onsubmit="return confirm('Stop the servo sweep?');">
                     <button type="submit" id="stop-radar-btn" class="w-full bg-red-500 hover:bg-red-600 text-white font-bold py-3 px-6 rounded-lg shadow-lg transition duration-150 ease-in-out">
                         ⏹️ Stop Radar
                     </button>
@@ -819,46 +974,8 @@ html = """
     </div>
     
     <script>
-        let radarChart;
-        let MAX_DISTANCE = 200; 
-        let currentScanAngle = 90; 
-
-        // --- Chart.js Plugin to Draw Scanning Line ---
-        const scannerLinePlugin = {
-            id: 'scannerLine',
-            beforeDraw(chart) {
-                const ctx = chart.ctx;
-                
-                if (chart.options.plugins.scannerLine.enabled === false) return;
-
-                if (chart.options.scales.r) {
-                    const rScale = chart.scales.r;
-                    const center = {
-                        x: rScale.xCenter,
-                        y: rScale.yCenter
-                    };
-                    const maxRadius = rScale.drawingArea; 
-                    
-                    const mappedAngleRad = Math.PI * (1 - (currentScanAngle / 180));
-                    
-                    const xEnd = center.x + maxRadius * Math.cos(mappedAngleRad);
-                    const yEnd = center.y - maxRadius * Math.sin(mappedAngleRad); 
-
-                    ctx.save();
-                    ctx.beginPath();
-                    ctx.strokeStyle = 'rgba(0, 255, 0, 0.8)'; 
-                    ctx.lineWidth = 2;
-                    ctx.setLineDash([5, 5]); 
-                    ctx.moveTo(center.x, center.y);
-                    ctx.lineTo(xEnd, yEnd);
-                    ctx.stroke();
-                    ctx.restore();
-                }
-            }
-        };
-
-        Chart.register(scannerLinePlugin);
-
+        let radarPlot;
+        const MAX_DISTANCE = 200; 
 
         // --- Speed Slider Control Functions ---
         
@@ -931,227 +1048,134 @@ html = """
 
         // --- Radar Plotting Function ---
         function updateRadarPlot(radarData, currentAngle) {
-            currentScanAngle = currentAngle;
-
-            if (!radarChart) {
-                const ctx = document.getElementById('radarChart').getContext('2d');
-                radarChart = new Chart(ctx, {
-                    type: 'polarArea', // Using polarArea for simplicity, radar/scatter could also work
-                    data: {
-                        datasets: [{
-                            label: 'Obstacles',
-                            data: [],
-                            backgroundColor: 'rgba(255, 99, 132, 0.7)',
-                            borderColor: 'rgba(255, 99, 132, 1)',
-                            pointRadius: 6,
-                            pointStyle: 'circle',
-                            borderWidth: 1
-                        }]
-                    },
-                    options: {
-                        responsive: true,
-                        maintainAspectRatio: true,
-                        aspectRatio: 2, 
-                        layout: {
-                            padding: 0
-                        },
-                        scales: {
-                            r: {
-                                angleLines: {
-                                    display: true,
-                                    color: 'rgba(0, 255, 0, 0.3)' 
-                                },
-                                grid: {
-                                    color: 'rgba(0, 255, 0, 0.3)', 
-                                    circular: true
-                                },
-                                pointLabels: {
-                                    display: false 
-                                },
-                                ticks: {
-                                    display: false, 
-                                    max: MAX_DISTANCE, 
-                                    stepSize: MAX_DISTANCE / 4,
-                                    backdropColor: 'transparent',
-                                    color: 'rgba(0, 255, 0, 0.7)'
-                                },
-                                min: 0,
-                                max: MAX_DISTANCE, 
-                                beginAtZero: true
-                            },
-                            // Override the angular axis to show 0 to 180 degrees
-                            x: {
-                                display: false 
-                            },
-                            y: {
-                                display: false
-                            }
-                        },
-                        plugins: {
-                            legend: {
-                                display: false
-                            },
-                            tooltip: {
-                                callbacks: {
-                                    label: function(context) {
-                                        let label = context.dataset.label || '';
-                                        if (label) {
-                                            label += ': ';
-                                        }
-                                        label += Math.round(context.parsed.r) + ' cm at ' + context.label + '°';
-                                        return label;
-                                    }
-                                }
-                            },
-                            scannerLine: {
-                                enabled: true 
-                            }
-                        },
-                        // Custom drawing to crop the chart to 180 degrees
-                        // This logic is complex and usually done with a custom Chart.js plugin or container clipping
-                        // For simplicity, we rely on the points being plotted in the range [0, 180]
-                    }
-                });
+            if (!radarPlot) {
+                radarPlot = new RadarPlot(document.getElementById('radarChart'), MAX_DISTANCE);
             }
-
-            const points = [];
-            const labels = [];
-            const radarDataset = radarChart.data.datasets[0];
-
-            radarData.forEach(([angle, distance]) => {
-                if (distance > 0) {
-                    // Use only angles 0-180 (top half of the polar chart)
-                    labels.push(angle.toString());
-                    points.push({
-                        x: angle, // Angle is usually represented as the 'label' in polar charts, but we map it here
-                        r: distance // Distance is the radial value
-                    });
-                }
-            });
-
-            // For polar charts, data array usually contains radial values in the order of the labels.
-            // Since we are using an object-based data model for Chart.js scatter/polar, we need to adapt.
-            // Reinitializing the chart data structure for compatibility:
-            const polarLabels = Array.from({length: 181}, (_, i) => i.toString()); // Labels 0 to 180
-            const polarData = new Array(181).fill(null);
-            
-            radarDataset.data = []; // Clear old data
-
-            radarData.forEach(([angle, distance]) => {
-                if (distance > 0 && distance < MAX_DISTANCE) {
-                    // Convert the polar (angle, distance) data to Cartesian (x, y) for visualization
-                    // Chart.js polar area requires conversion or special plugin for plotting points like this.
-                    // Instead of full conversion, we will just pass the radial data for visualization:
-                    
-                    // We need the data structure to plot points at specific angles/distances.
-                    // The easiest way for this type of visualization is a scatter plot on a custom polar scale.
-                    // Since Chart.js polarArea is limited, we stick to the basic update:
-                    radarDataset.data.push({
-                        x: angle, // We treat x as angle
-                        y: distance // We treat y as distance (radial value)
-                    });
-                }
-            });
-            
-            // To properly plot on a polar chart, we need a dataset type that handles (angle, distance) pairs, 
-            // which in Chart.js is often a radar chart or a scatter plot on a radial axis.
-            // For now, we update the points in a simple way, assuming the angle is the index for simplicity.
-            
-            // Rebuild the radar chart data for a scatter-like polar effect:
-             const newDataset = {
-                label: 'Obstacles',
-                data: [],
-                backgroundColor: (context) => {
-                    const distance = context.raw.r;
-                    if (distance > 0 && distance < 30) return 'rgba(255, 0, 0, 0.8)'; // Red for very close
-                    if (distance >= 30 && distance < 100) return 'rgba(255, 165, 0, 0.8)'; // Orange for close
-                    return 'rgba(0, 200, 255, 0.8)'; // Blue for distant
-                },
-                borderColor: 'white',
-                pointRadius: 7,
-                pointStyle: 'circle',
-                borderWidth: 1,
-            };
-            
-            radarData.forEach(([angle, distance]) => {
-                if (distance > 0 && distance < MAX_DISTANCE) {
-                    // Use a scatter-like object {r: radial value, angle: angular value}
-                    newDataset.data.push({
-                        r: distance, 
-                        angle: angle // Custom property we need to manually map to the chart space
-                    });
-                }
-            });
-            
-            // Since Chart.js `polarArea` is designed for categorical data, 
-            // this custom plotting of points requires a complex, custom plugin.
-            // For this project, we assume a simplified data structure update.
-            // Let's ensure the dataset is replaced cleanly for best results:
-            radarChart.data.datasets = [newDataset];
-
-
-            radarChart.update('none'); // Update without animation
+            radarPlot.update(radarData, currentAngle);
         }
         
+        // --- Additional Cameras (camera 0 is the main feed) ---
+        let videoProfileQuery = '';
+        const extraCameraIds = new Set();
+        function updateExtraCameras(cameras) {
+            const container = document.getElementById('extra-camera-feeds');
+            Object.keys(cameras || {}).forEach(camId => {
+                if (camId === '0' || extraCameraIds.has(camId)) return;
+                extraCameraIds.add(camId);
+                const img = document.createElement('img');
+                img.src = `/video_feed/${camId}${videoProfileQuery}`;
+                img.alt = `Camera ${camId}`;
+                img.className = 'w-full h-auto rounded';
+                container.appendChild(img);
+            });
+        }
+
         // --- Status Polling Function ---
+        // Long-poll: the server answers as soon as the state version changes, or with 304 after 20 s
+        let statusEtag = null;
         function updateStatus() {
-            fetch('/status')
-                .then(response => response.json())
+            fetch('/status?wait=20', { headers: statusEtag ? { 'If-None-Match': statusEtag } : {}, cache: 'no-store' })
+                .then(response => {
+                    if (response.status === 304) return null;
+                    if (!response.ok) throw new Error(`HTTP ${response.status}`);
+                    statusEtag = response.headers.get('ETag');
+                    return response.json();
+                })
                 .then(data => {
-                    // Movement Status
-                    document.getElementById('movement-status').textContent = data.state;
-                    
-                    // Sensor Status (Updated to include 3 US sensors)
-                    document.getElementById('sensor-status').textContent = data.sensor_status;
-
-                    // Speed Displays
-                    document.getElementById('linear-speed-display').textContent = `${data.linear_speed}%`;
-                    document.getElementById('linear-speed-slider').value = data.linear_speed;
-                    document.getElementById('linear-speed-display-summary').textContent = `${data.linear_speed}%`;
-
-                    document.getElementById('turn-speed-display').textContent = `${data.turn_speed}%`;
-                    document.getElementById('turn-speed-slider').value = data.turn_speed;
-                    document.getElementById('turn-speed-display-summary').textContent = `${data.turn_speed}%`;
-
-                    // Seizure Status
-                    const statusBox = document.getElementById('seizure-status-box');
-                    const statusDisplay = document.getElementById('seizure-status-display');
-                    document.getElementById('current-test-index').textContent = data.test_row_index; // Update index display
-
-                    if (data.is_seizure_detected) {
-                        statusDisplay.textContent = "🚨 SEIZURE DETECTED! 🚨";
-                        statusBox.className = "text-lg font-semibold p-2 rounded-lg shadow-inner bg-red-200 text-red-800 animate-pulse";
-                    } else {
-                        statusDisplay.textContent = "All Clear.";
-                        statusBox.className = "text-lg font-semibold p-2 rounded-lg shadow-inner bg-green-100 text-green-700";
-                    }
-                    
-                    // Radar Status
-                    const radarStatus = document.getElementById('radar-last-update');
-                    if (data.is_radar_running) {
-                        radarStatus.textContent = `Running, Angle: ${data.current_angle}°`;
-                        // Fetch Radar Data if running
-                        fetchRadarData();
-                    } else {
-                        radarStatus.textContent = 'Stopped';
-                    }
+                    if (data) renderStatus(data);
+                    updateStatus();
                 })
-                .catch(error => console.error('Error fetching status:', error));
+                .catch(error => {
+                    console.error('Status poll failed:', error);
+                    setTimeout(updateStatus, 1000);
+                });
+        }
+
+        function renderStatus(data) {
+            // Movement Status
+            document.getElementById('movement-status').textContent = data.state;
+            
+            // Sensor Status (Updated to include 3 US sensors)
+            document.getElementById('sensor-status').textContent = data.sensor_status;
+
+            // Speed Displays
+            document.getElementById('linear-speed-display').textContent = `${data.linear_speed}%`;
+            document.getElementById('linear-speed-slider').value = data.linear_speed;
+            document.getElementById('linear-speed-display-summary').textContent = `${data.linear_speed}%`;
+
+            document.getElementById('turn-speed-display').textContent = `${data.turn_speed}%`;
+            document.getElementById('turn-speed-slider').value = data.turn_speed;
+            document.getElementById('turn-speed-display-summary').textContent = `${data.turn_speed}%`;
+
+            // Seizure Status
+            const statusBox = document.getElementById('seizure-status-box');
+            const statusDisplay = document.getElementById('seizure-status-display');
+            document.getElementById('current-test-index').textContent = data.test_row_index; // Update index display
+            const indexInput = document.getElementById('test-row-index-input');
+            if (indexInput.value === '') indexInput.value = data.test_row_index;
+
+            if (data.is_seizure_detected) {
+                statusDisplay.textContent = "🚨 SEIZURE DETECTED! 🚨";
+                statusBox.className = "text-lg font-semibold p-2 rounded-lg shadow-inner bg-red-200 text-red-800 animate-pulse";
+            } else {
+                statusDisplay.textContent = "All Clear.";
+                statusBox.className = "text-lg font-semibold p-2 rounded-lg shadow-inner bg-green-100 text-green-700";
+            }
+            
+            // Radar Status (the sweep itself is refreshed by fetchRadarData)
+            radarRunning = data.is_radar_running;
+            if (!radarRunning) {
+                document.getElementById('radar-last-update').textContent = 'Stopped';
+            }
         }
         
-        // --- Radar Data Fetcher ---
+        // --- Radar Data Fetcher (polled separately: the servo angle changes every step) ---
+        let radarRunning = false;
         function fetchRadarData() {
+             if (!radarRunning) return;
              fetch('/radar_data')
                 .then(response => response.json())
                 .then(data => {
                     // data.data is the list of [angle, distance] pairs
+                    document.getElementById('radar-last-update').textContent = `Running, Angle: ${data.current_angle}°`;
                     updateRadarPlot(data.data, data.current_angle);
                 })
                 .catch(error => console.error('Error fetching radar data:', error));
         }
 
+        // --- Command Buttons: POST in the background and apply the JSON state delta ---
+        function sendCommand(form) {
+            fetch(form.action, { method: 'POST' })
+                .then(response => response.json())
+                .then(data => {
+                    if (data.state !== undefined) {
+                        document.getElementById('movement-status').textContent = data.state;
+                    }
+                    if (data.is_radar_running !== undefined) {
+                        radarRunning = data.is_radar_running;
+                        document.getElementById('radar-last-update').textContent = data.is_radar_running ? 'Running' : 'Stopped';
+                    }
+                })
+                .catch(error => console.error('Error sending command:', error));
+        }
+
         // --- Event Listeners ---
         document.addEventListener('DOMContentLoaded', () => {
+            document.querySelectorAll('.command-form').forEach(form => {
+                form.addEventListener('submit', (e) => {
+                    if (e.defaultPrevented) return; // e.g. "Stop the servo sweep?" was cancelled
+                    e.preventDefault();
+                    sendCommand(form);
+                });
+            });
+
+            // Small screens and data-saver connections get the shared low-res preview stream
+            const connection = navigator.connection || {};
+            const usePreview = window.innerWidth < 768 || connection.saveData ||
+                               ['slow-2g', '2g', '3g'].includes(connection.effectiveType);
+            videoProfileQuery = usePreview ? '?profile=preview' : '';
+            document.getElementById('video-feed').src = '/video_feed' + videoProfileQuery;
+
             // Linear Speed Slider
             document.getElementById('linear-speed-slider').addEventListener('mouseup', (e) => {
                 sendLinearSpeedUpdate(e.target.value);
@@ -1179,26 +1203,70 @@ html = """
                 }
             });
             
-            // Initial call and set interval for updates
+            // Camera list is fixed at startup; status is long-polled, the radar sweep polled while running
+            fetch('/stats')
+                .then(response => response.json())
+                .then(stats => updateExtraCameras(stats.cameras))
+                .catch(error => console.error('Error fetching stats:', error));
             updateStatus();
-            setInterval(updateStatus, 500); // Poll status every 0.5 seconds
+            setInterval(fetchRadarData, 500); // Poll radar every 0.5 seconds
         });
         
     </script>
 </body>
 </html>
 """
-# ... (rest of the code) ...
+
+# --- Precompiled Page and Static Assets ---
+STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static')
+static_assets = load_static_dir(STATIC_DIR)
+
+def asset_url(name):
+    """Versioned URL, so assets can be cached forever and still update on deploy."""
+    asset = static_assets.get(name)
+    return f"/static/{name}?v={asset.version}" if asset else f"/static/{name}"
+
+index_page = build_asset(
+    app.jinja_env.from_string(html).render(asset_url=asset_url,
+                                           LINEAR_SPEED=INITIAL_LINEAR_SPEED,
+                                           TURN_SPEED=INITIAL_TURN_SPEED).encode('utf-8'),
+    'text/html; charset=utf-8')
 
 if __name__ == '__main__':
     try:
-        # Change host to '0.0.0.0' to listen on all public IPs, and port to 8000
-        app.run(host='0.0.0.0', port=8000, threaded=True) 
+        if '--async' in sys.argv:
+            # asyncio server: streams, SSE and commands are coroutines instead of one thread each
+            import async_server
+            async_server.run(sys.modules[__name__], host='0.0.0.0', port=8000)
+        else:
+            # Change host to '0.0.0.0' to listen on all public IPs, and port to 8000
+            app.run(host='0.0.0.0', port=8000, threaded=True) 
     except KeyboardInterrupt:
         print("Cleaning up GPIO...")
         GPIO.cleanup()
+        for stream in camera_streams.values():
+            stream.stop()
+            stream.capture.release()
+        if frame_pool:
+            frame_pool.close()
+        if SAFETY_PROCESS:
+            safety_proc.terminate()  # Stops the motors on its way out
+            actuator.close()
+        for process in eeg_processes:
+            process.terminate()
+        eeg.close()
+        telemetry.close()
         sys.exit()
     except Exception as e:
         print(f"An error occurred: {e}")
         GPIO.cleanup()
+        if frame_pool:
+            frame_pool.close()
+        if SAFETY_PROCESS:
+            safety_proc.terminate()  # Stops the motors on its way out
+            actuator.close()
+        for process in eeg_processes:
+            process.terminate()
+        eeg.close()
+        telemetry.close()
         sys.exit()
\ No newline at end of file